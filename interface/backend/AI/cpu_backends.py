@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from pathlib import Path
+import fcntl
+import logging
+import os
+import threading
+
+# Runtime used by the CPU detector: pytorch (the .pt as is), onnx, openvino, openvino-int8 or ncnn.
+CPU_BACKEND = os.environ.get("YOLO_CPU_BACKEND", "pytorch")
+# Calibration dataset for int8 quantization (an ultralytics dataset yaml). ultralytics downloads
+# coco8 on first use; offline, point this at a local dataset yaml, ideally frames of the camera.
+INT8_DATA = os.environ.get("YOLO_INT8_DATA", "coco8.yaml")
+
+# backend -> (ultralytics export arguments, exported file/directory name from the .pt stem)
+# dynamic shapes keep batched predict() calls and other input sizes working
+BACKENDS = {
+    "onnx": ({"format": "onnx", "dynamic": True, "simplify": True}, "{stem}.onnx"),
+    "openvino": ({"format": "openvino", "dynamic": True}, "{stem}_openvino_model"),
+    "openvino-int8": ({"format": "openvino", "dynamic": True, "int8": True}, "{stem}_int8_openvino_model"),
+    # NCNN is the fastest ultralytics runtime on ARM boards such as the Pi
+    "ncnn": ({"format": "ncnn"}, "{stem}_ncnn_model"),
+}
+
+# runtimes that only take one image per call, and at the size the model was exported with
+_SINGLE_IMAGE = {"ncnn"}
+_FIXED_INPUT_SIZE = {"ncnn"}
+
+_export_lock = threading.Lock()
+
+
+def max_batch_size(backend: str) -> int | None:
+    return 1 if backend in _SINGLE_IMAGE else None
+
+
+def supports_input_size(backend: str) -> bool:
+    return backend not in _FIXED_INPUT_SIZE
+
+
+def exported_path(model_path: Path, backend: str) -> Path:
+    _, name = BACKENDS[backend]
+    return model_path.with_name(name.format(stem=model_path.stem))
+
+
+def _is_fresh(exported: Path, model_path: Path) -> bool:
+    return exported.exists() and exported.stat().st_mtime >= model_path.stat().st_mtime
+
+
+def resolve_model(model_path: Path, backend: str | None = None) -> tuple[Path, str]:
+    """
+    Return (model to load, backend actually used).
+    Non-PyTorch backends are exported once next to the `.pt` and reused while newer than it.
+    If the export fails (runtime not installed...), the `.pt` is used.
+    """
+    backend = (backend or CPU_BACKEND).lower()
+    if backend == "pytorch" or model_path.suffix != ".pt":
+        return model_path, "pytorch" if model_path.suffix == ".pt" else model_path.suffix.lstrip(".")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown CPU backend: {backend} (expected pytorch or one of {', '.join(BACKENDS)})")
+
+    exported = exported_path(model_path, backend)
+    if _is_fresh(exported, model_path):
+        return exported, backend
+
+    # one export at a time, also across processes sharing the model directory
+    with _export_lock, open(model_path.with_name(f".{model_path.stem}.export.lock"), "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        if _is_fresh(exported, model_path):
+            return exported, backend
+        export_args, _ = BACKENDS[backend]
+        if export_args.get("int8"):
+            export_args = {**export_args, "data": INT8_DATA}
+        try:
+            from ultralytics import YOLO
+
+            result = YOLO(str(model_path)).export(**export_args, verbose=False)
+        except Exception:
+            logging.exception("Export of %s to %s failed, using the PyTorch model", model_path, backend)
+            return model_path, "pytorch"
+        result = Path(result)
+        if result != exported and result.exists():
+            # exporters name their output themselves, keep it where it will be looked up next time
+            result.replace(exported)
+        return exported, backend
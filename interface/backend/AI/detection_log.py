@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from pathlib import Path
+import os
+import struct
+
+import numpy as np
+
+# Write a per-frame detection log next to the summary JSON of every run ("0" to disable).
+DETECTION_LOG = os.environ.get("DETECTION_LOG", "1") != "0"
+# rows buffered in memory before they are appended to the file
+DETECTION_LOG_CHUNK_ROWS = int(os.environ.get("DETECTION_LOG_CHUNK_ROWS", "4096"))
+
+# one row per detection; boxes are normalized to the frame size so both backends compare
+DETECTION_DTYPE = np.dtype([
+    ("frame", "<u4"),
+    ("time", "<f4"),
+    ("class_id", "<i2"),
+    ("track_id", "<i4"),
+    ("confidence", "<f4"),
+    ("x1", "<f4"),
+    ("y1", "<f4"),
+    ("x2", "<f4"),
+    ("y2", "<f4"),
+])
+# fixed .npy header size: the row count is rewritten in place when the log is closed
+_HEADER_SIZE = 256
+_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def detection_log_path(target_path: Path) -> Path:
+    return target_path.with_name(f"{target_path.stem}.detections.npy")
+
+
+def _header(rows: int) -> bytes:
+    header = repr({"descr": np.lib.format.dtype_to_descr(DETECTION_DTYPE), "fortran_order": False, "shape": (rows,)})
+    header = header.ljust(_HEADER_SIZE - len(_MAGIC) - 2 - 1) + "\n"
+    return _MAGIC + struct.pack("<H", len(header)) + header.encode("latin1")
+
+
+class DetectionLog:
+    """
+    Append-only columnar log of detections, stored as a `.npy` structured array.
+    Rows are buffered and appended `chunk_rows` at a time; the file can be opened with
+    `np.load(path, mmap_mode="r")` once closed, or `read_detection_log` at any time.
+    """
+
+    def __init__(self, path: Path, chunk_rows: int = DETECTION_LOG_CHUNK_ROWS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self.frames = 0
+        self.class_names: dict[int, str] = {}
+        self._buffer = np.zeros(max(1, chunk_rows), dtype=DETECTION_DTYPE)
+        self._buffered = 0
+        self._file = open(self.path, "wb")
+        self._file.write(_header(0))
+
+    def append(self, frame: int, time: float | None, boxes, class_ids, confidences, track_ids=None):
+        """Log the detections of one frame: (N, 4) normalized xyxy boxes and N class ids / confidences."""
+        self.frames += 1
+        count = len(class_ids)
+        start = 0
+        while start < count:
+            if self._buffered == len(self._buffer):
+                self.flush()
+            end = min(count, start + len(self._buffer) - self._buffered)
+            rows = self._buffer[self._buffered:self._buffered + end - start]
+            rows["frame"] = frame
+            rows["time"] = np.nan if time is None else time
+            rows["class_id"] = class_ids[start:end]
+            rows["track_id"] = -1 if track_ids is None else track_ids[start:end]
+            rows["confidence"] = confidences[start:end]
+            box = np.asarray(boxes[start:end], dtype=np.float32)
+            rows["x1"], rows["y1"], rows["x2"], rows["y2"] = box[:, 0], box[:, 1], box[:, 2], box[:, 3]
+            self._buffered += end - start
+            start = end
+
+    def extend(self, rows: np.ndarray):
+        """Append rows that are already in DETECTION_DTYPE."""
+        self.flush()
+        self._file.write(memoryview(np.ascontiguousarray(rows, dtype=DETECTION_DTYPE)).cast("B"))
+        self.rows += len(rows)
+
+    def flush(self):
+        if self._buffered:
+            self._file.write(memoryview(self._buffer[:self._buffered]).cast("B"))
+            self.rows += self._buffered
+            self._buffered = 0
+            # visible to readers of a running log
+            self._file.flush()
+
+    def close(self) -> dict:
+        """Write the remaining rows and the final header; returns the summary entry of the log."""
+        if not self._file.closed:
+            self.flush()
+            self._file.seek(0)
+            self._file.write(_header(self.rows))
+            self._file.close()
+        return self.summary()
+
+    def move(self, path: Path):
+        """Rename the closed log (the recording it belongs to was renamed)."""
+        path = Path(path)
+        if path != self.path:
+            self.path = self.path.replace(path)
+
+    def summary(self) -> dict:
+        return {
+            "path": self.path.name,
+            "rows": self.rows + self._buffered,
+            "frames": self.frames,
+            "class_names": {str(class_id): name for class_id, name in sorted(self.class_names.items())},
+        }
+
+
+def read_detection_log(path: Path) -> np.ndarray:
+    """
+    Memory-map a detection log. Rows are counted from the file size, so the log of
+    a run that is still going (or crashed before closing it) can be read as well.
+    """
+    rows = (os.path.getsize(path) - _HEADER_SIZE) // DETECTION_DTYPE.itemsize
+    if rows <= 0:
+        return np.zeros(0, dtype=DETECTION_DTYPE)
+    return np.memmap(path, dtype=DETECTION_DTYPE, mode="r", offset=_HEADER_SIZE, shape=(rows,))
+
+
+def merge_detection_logs(paths: list[Path], output: Path, frame_counts: list[int]) -> DetectionLog:
+    """Concatenate the logs of consecutive runs of `frame_counts` frames into `output`, renumbering frames."""
+    log = DetectionLog(output)
+    offset = 0
+    for path, frames in zip(paths, frame_counts):
+        rows = read_detection_log(path)
+        for start in range(0, len(rows), DETECTION_LOG_CHUNK_ROWS):
+            chunk = np.array(rows[start:start + DETECTION_LOG_CHUNK_ROWS])
+            chunk["frame"] += offset
+            log.extend(chunk)
+        offset += frames
+    log.frames = offset
+    log.close()
+    return log
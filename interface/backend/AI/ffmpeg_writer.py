@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+FFMPEG_BIN = "ffmpeg"
+
+# x264 preset: ultrafast keeps encoding far below inference time on a Pi, at the cost of file size
+ENCODER_PRESET = os.environ.get("VIDEO_ENCODER_PRESET", "ultrafast")
+# constant quality used when no bitrate is requested (lower is better, 23 is x264's default)
+ENCODER_CRF = int(os.environ.get("VIDEO_ENCODER_CRF", "23"))
+# ffmpeg encoder threads, 0 lets it decide
+ENCODER_THREADS = int(os.environ.get("VIDEO_ENCODER_THREADS", "0"))
+# Move the MP4 index to the front when the recording ends instead of writing a fragmented file.
+# The file then plays from the first byte once finished, but can't be watched while it is recorded.
+ENCODER_FASTSTART = os.environ.get("VIDEO_ENCODER_FASTSTART", "0") == "1"
+# frames waiting for the encoder process before write() blocks
+ENCODER_QUEUE_DEPTH = int(os.environ.get("VIDEO_ENCODER_QUEUE_DEPTH", "4"))
+
+_END = object()
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def codec_arguments(
+    suffix: str,
+    *,
+    preset: str = ENCODER_PRESET,
+    crf: int = ENCODER_CRF,
+    bitrate_kbps: int | None = None,
+    threads: int = ENCODER_THREADS,
+    faststart: bool = ENCODER_FASTSTART,
+) -> list[str] | None:
+    """
+    ffmpeg output arguments for a container, None when it is not supported.
+    Without faststart, containers are written so they can be played while still being written:
+    fragmented MP4 (moov first, one fragment per keyframe) and live Matroska/WebM.
+    """
+    suffix = suffix.lower()
+    if suffix == ".webm":
+        # VP8: realtime deadline and fastest cpu-used, the only usable speed on a Pi
+        rate = ["-b:v", f"{bitrate_kbps}k" if bitrate_kbps else "2M"]
+        return ["-c:v", "libvpx", "-deadline", "realtime", "-cpu-used", "8", *rate,
+                "-threads", str(threads), "-live", "1", "-f", "webm"]
+
+    if suffix not in (".mp4", ".mkv"):
+        return None
+    if bitrate_kbps:
+        # average bitrate with a bounded peak, as x264enc does in the Hailo pipeline
+        rate = ["-b:v", f"{bitrate_kbps}k", "-maxrate", f"{bitrate_kbps}k", "-bufsize", f"{2 * bitrate_kbps}k"]
+    else:
+        rate = ["-crf", str(crf)]
+    h264 = ["-c:v", "libx264", "-preset", preset, *rate, "-pix_fmt", "yuv420p", "-threads", str(threads)]
+    if suffix == ".mkv":
+        return [*h264, "-live", "1", "-f", "matroska"]
+    if faststart:
+        return [*h264, "-movflags", "+faststart", "-f", "mp4"]
+    return [*h264, "-movflags", "frag_keyframe+empty_moov+default_base_moof", "-f", "mp4"]
+
+
+class FfmpegPipeWriter:
+    """
+    `cv2.VideoWriter` replacement encoding through an ffmpeg process.
+    Frames are queued and piped by a worker thread, so the caller only waits when the
+    encoder falls `queue_depth` frames behind. `write(frame, on_written)` hands the frame
+    over without copying it and calls `on_written(frame)` once it has been piped.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        fps: float,
+        width: int,
+        height: int,
+        key_interval: int = 30,
+        *,
+        preset: str = ENCODER_PRESET,
+        crf: int = ENCODER_CRF,
+        bitrate_kbps: int | None = None,
+        threads: int = ENCODER_THREADS,
+        faststart: bool = ENCODER_FASTSTART,
+        queue_depth: int = ENCODER_QUEUE_DEPTH,
+    ):
+        codec_args = codec_arguments(
+            path.suffix, preset=preset, crf=crf, bitrate_kbps=bitrate_kbps, threads=threads, faststart=faststart
+        )
+        if codec_args is None or not ffmpeg_available():
+            raise RuntimeError(f"Unable to open ffmpeg writer for: {path}")
+        cmd = [
+            FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", f"{fps:.3f}",
+            "-i", "-",
+            "-g", str(key_interval),
+            *codec_args,
+            str(path),
+        ]
+        self.settings = {
+            "codec": codec_args[1],
+            "preset": preset if codec_args[1] == "libx264" else None,
+            "bitrate_kbps": bitrate_kbps,
+            "crf": None if bitrate_kbps else crf,
+            "threads": threads,
+            "faststart": faststart and path.suffix.lower() == ".mp4",
+        }
+        self.process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        self.frames = 0
+        self._pipe_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._cpu_seconds = None
+        self._error: BaseException | None = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, queue_depth))
+        self._thread = threading.Thread(target=self._pipe_frames, name="ffmpeg-writer", daemon=True)
+        self._thread.start()
+
+    def isOpened(self) -> bool:
+        return self._error is None and self.process.poll() is None
+
+    def _pipe_frames(self):
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            frame, on_written = item
+            try:
+                if self._error is None:
+                    start = time.perf_counter()
+                    # the frame buffer is written as is, without a tobytes() copy
+                    self.process.stdin.write(memoryview(frame).cast("B"))
+                    self._pipe_seconds += time.perf_counter() - start
+                    self.frames += 1
+            except BaseException as exc:
+                # ffmpeg died (bad arguments, disk full...): reported by the next write()/release()
+                self._error = exc
+            finally:
+                if on_written is not None:
+                    on_written(frame)
+
+    def write(self, frame, on_written: Callable | None = None):
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg writer failed: {self._error}") from self._error
+        if on_written is None:
+            # the caller may reuse its buffer right away: keep a copy
+            frame = frame.copy()
+        elif not frame.flags.c_contiguous:
+            frame, original = frame.copy(), frame
+            on_written(original)
+            on_written = None
+        start = time.perf_counter()
+        self._queue.put((frame, on_written))
+        self._wait_seconds += time.perf_counter() - start
+
+    def release(self):
+        self._queue.put(_END)
+        self._thread.join()
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            # reap ffmpeg ourselves to read the CPU time it spent encoding
+            _, status, usage = os.wait4(self.process.pid, 0)
+            self.process.returncode = os.waitstatus_to_exitcode(status)
+            self._cpu_seconds = usage.ru_utime + usage.ru_stime
+        except ChildProcessError:
+            self.process.wait()
+        if self.process.returncode != 0:
+            raise RuntimeError(f"ffmpeg exited with code {self.process.returncode}")
+        if self._error is not None:
+            raise RuntimeError(f"ffmpeg writer failed: {self._error}") from self._error
+
+    def abort(self):
+        """Stop encoding without finishing the file (the run failed): ffmpeg is killed, queued frames dropped."""
+        self.process.kill()
+        if self._thread.is_alive():
+            # frames still queued fail on the closed pipe and are only handed back
+            self._queue.put(_END)
+            self._thread.join()
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+        self.process.wait()
+
+    def stats(self) -> dict:
+        """Encoder settings and per-frame costs (CPU time of ffmpeg is known once released)."""
+        frames = max(1, self.frames)
+        return {
+            **self.settings,
+            "frames_encoded": self.frames,
+            "encode_cpu_ms_per_frame": round(1000 * self._cpu_seconds / frames, 3) if self._cpu_seconds is not None else None,
+            "pipe_ms_per_frame": round(1000 * self._pipe_seconds / frames, 3),
+            "queue_wait_ms_per_frame": round(1000 * self._wait_seconds / frames, 3),
+        }
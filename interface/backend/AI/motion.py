@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import os
+
+import cv2
+import numpy as np
+
+# Share of thumbnail pixels that must change before a frame goes through the model again
+# (e.g. 0.01); 0 runs inference on every frame.
+MOTION_THRESHOLD = float(os.environ.get("YOLO_MOTION_THRESHOLD", "0"))
+# gray level difference from which a thumbnail pixel counts as changed
+MOTION_PIXEL_DELTA = int(os.environ.get("YOLO_MOTION_PIXEL_DELTA", "15"))
+# run inference at least once every this many frames, even on a static scene
+MOTION_MAX_SKIP = int(os.environ.get("YOLO_MOTION_MAX_SKIP", "30"))
+# width of the thumbnails that are compared
+THUMBNAIL_WIDTH = 64
+
+
+class MotionGate:
+    """
+    Skip inference on frames that look like the last frame the model saw.
+    Frames are reduced to small blurred gray thumbnails (area averaging removes most sensor
+    noise) and compared with the thumbnail of the last inferred frame, so slow changes
+    add up until they trigger a new inference.
+    """
+
+    def __init__(
+        self,
+        threshold: float = MOTION_THRESHOLD,
+        *,
+        pixel_delta: int = MOTION_PIXEL_DELTA,
+        max_skip: int = MOTION_MAX_SKIP,
+        width: int = THUMBNAIL_WIDTH,
+    ):
+        self.threshold = threshold
+        self.enabled = threshold > 0
+        self.pixel_delta = pixel_delta
+        self.max_skip = max(1, max_skip)
+        self.width = width
+        self.frames_checked = 0
+        self.frames_skipped = 0
+        self._reference = None
+        self._skipped_in_row = 0
+
+    def _thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        thumbnail = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(thumbnail, (3, 3), 0)
+
+    def changed_ratio(self, thumbnail: np.ndarray) -> float:
+        diff = cv2.absdiff(thumbnail, self._reference)
+        return cv2.countNonZero(cv2.threshold(diff, self.pixel_delta, 255, cv2.THRESH_BINARY)[1]) / diff.size
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """True when `frame` must go through the model (it then becomes the reference)."""
+        if not self.enabled:
+            return True
+        self.frames_checked += 1
+        thumbnail = self._thumbnail(frame)
+        if (
+            self._reference is not None
+            and self._skipped_in_row < self.max_skip
+            and self.changed_ratio(thumbnail) < self.threshold
+        ):
+            self._skipped_in_row += 1
+            self.frames_skipped += 1
+            return False
+        self._reference = thumbnail
+        self._skipped_in_row = 0
+        return True
+
+    def report(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "frames_checked": self.frames_checked,
+            "frames_skipped": self.frames_skipped,
+            "skipped_ratio": round(self.frames_skipped / self.frames_checked, 3) if self.frames_checked else 0.0,
+        }
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+# ultralytics default palette (RGB), so annotated videos look the same as with result.plot()
+_PALETTE_HEX = (
+    "042AFF", "0BDBEB", "F3F3F3", "00DFB7", "111F68", "FF6FDD", "FF444F", "CCED00", "00F344", "BD00FF",
+    "00B4FF", "DD00BA", "00FFFF", "26C000", "01FFB3", "7D24FF", "7B0068", "FF1B6C", "FC6D2F", "A2FF0B",
+)
+PALETTE_BGR = [(int(c[4:6], 16), int(c[2:4], 16), int(c[0:2], 16)) for c in _PALETTE_HEX]
+_DARK_TEXT = (104, 31, 17)
+_LIGHT_TEXT = (255, 255, 255)
+
+
+def _text_color(background):
+    b, g, r = background
+    return _DARK_TEXT if 0.299 * r + 0.587 * g + 0.114 * b > 140 else _LIGHT_TEXT
+
+
+class OverlayRenderer:
+    """
+    Draw detection boxes and "name 0.87" labels directly on a frame (no copy).
+    Label pieces are rendered once and cached as small image patches: one per class name
+    and one per confidence character and color, then pasted with numpy slicing.
+    """
+
+    def __init__(self, names: dict, frame_shape: tuple, line_width: int | None = None):
+        self.names = names
+        height, width = frame_shape[:2]
+        # same sizing rule as ultralytics' Annotator
+        self.line_width = line_width or max(round((height + width + 3) / 2 * 0.003), 2)
+        self.font_thickness = max(self.line_width - 1, 1)
+        self.font_scale = self.line_width / 3
+        text_height = cv2.getTextSize("0", 0, self.font_scale, self.font_thickness)[0][1]
+        self.label_height = text_height + 3
+        self._patches: dict[tuple, np.ndarray] = {}
+
+    def color(self, class_id: int):
+        return PALETTE_BGR[class_id % len(PALETTE_BGR)]
+
+    def _patch(self, text: str, color) -> np.ndarray:
+        key = (text, color)
+        patch = self._patches.get(key)
+        if patch is None:
+            text_width = cv2.getTextSize(text, 0, self.font_scale, self.font_thickness)[0][0]
+            patch = np.empty((self.label_height, text_width, 3), dtype=np.uint8)
+            patch[:] = color
+            cv2.putText(
+                patch, text, (0, self.label_height - 2), 0, self.font_scale,
+                _text_color(color), thickness=self.font_thickness, lineType=cv2.LINE_AA,
+            )
+            self._patches[key] = patch
+        return patch
+
+    def _label_patches(self, class_id: int, confidence: float) -> list[np.ndarray]:
+        color = self.color(class_id)
+        pieces = [self._patch(f"{self.names.get(class_id, class_id)} ", color)]
+        pieces.extend(self._patch(char, color) for char in f"{confidence:.2f}")
+        return pieces
+
+    @staticmethod
+    def _paste(frame: np.ndarray, patch: np.ndarray, x: int, y: int):
+        """Copy `patch` with its top-left corner at (x, y), clipped to the frame."""
+        height, width = frame.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + patch.shape[1], width), min(y + patch.shape[0], height)
+        if x1 > x0 and y1 > y0:
+            frame[y0:y1, x0:x1] = patch[y0 - y:y1 - y, x0 - x:x1 - x]
+
+    def draw(self, frame: np.ndarray, boxes: np.ndarray, class_ids: np.ndarray, confidences: np.ndarray):
+        """Draw (N, 4) xyxy boxes with their labels on `frame`, in place."""
+        frame_width = frame.shape[1]
+        for (x1, y1, x2, y2), class_id, confidence in zip(boxes.astype(int).tolist(), class_ids.tolist(), confidences.tolist()):
+            class_id = int(class_id)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), self.color(class_id), self.line_width, cv2.LINE_AA)
+
+            pieces = self._label_patches(class_id, confidence)
+            label_width = sum(piece.shape[1] for piece in pieces)
+            # above the box when it fits, otherwise inside; kept within the right edge
+            y = y1 - self.label_height if y1 >= self.label_height else y1
+            x = min(x1, frame_width - label_width)
+            for piece in pieces:
+                self._paste(frame, piece, x, y)
+                x += piece.shape[1]
+
+
+def detections_of(result) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(xyxy boxes, class ids, confidences) of an ultralytics result, as numpy arrays."""
+    boxes = result.boxes
+    if boxes is None or not len(boxes):
+        return np.empty((0, 4)), np.empty(0), np.empty(0)
+    return boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy()
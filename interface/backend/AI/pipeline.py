@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Callable, Iterator
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Frames decoded ahead of inference, and results waiting to be annotated/encoded.
+DECODE_QUEUE_DEPTH = int(os.environ.get("YOLO_DECODE_QUEUE_DEPTH", "8"))
+ENCODE_QUEUE_DEPTH = int(os.environ.get("YOLO_ENCODE_QUEUE_DEPTH", "8"))
+
+# how often a thread blocked on a full/empty queue checks whether the pipeline is stopping (seconds)
+_POLL_SECONDS = 0.1
+_END = object()
+
+
+class StageTimer:
+    """Time a pipeline stage spends working (not waiting on its queues)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.busy_seconds = 0.0
+        self.items = 0
+
+    @contextmanager
+    def working(self, items: int = 1):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.busy_seconds += time.perf_counter() - start
+            self.items += items
+
+
+class FramePool:
+    """
+    Preallocated frame buffers that circulate decode -> inference -> encode and back,
+    so decoding a frame (`cap.retrieve(image=...)`) does not allocate a new array.
+    When every buffer is in use a new one is allocated (counted in `misses`).
+    """
+
+    def __init__(self, count: int, shape: tuple, dtype=np.uint8):
+        self.shape = tuple(shape)
+        self.dtype = dtype
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._free = [np.empty(self.shape, dtype=dtype) for _ in range(count)]
+        self.size = count
+
+    def acquire(self) -> np.ndarray:
+        with self._lock:
+            if self._free:
+                return self._free.pop()
+            self.misses += 1
+            self.size += 1
+        return np.empty(self.shape, dtype=self.dtype)
+
+    def release(self, frame: np.ndarray):
+        if frame.shape == self.shape and frame.dtype == self.dtype:
+            with self._lock:
+                self._free.append(frame)
+
+
+class DetectionPipeline:
+    """
+    decode thread -> [decode queue] -> inference (caller's thread) -> [encode queue] -> encode thread
+
+    Decoding (cv2 read) and encoding (annotation + writer) run in native code that releases
+    the GIL, so they overlap with inference on multi-core boards. The bounded queues cap the
+    number of frames held in memory. Errors of the decode/encode threads are raised in the caller.
+    """
+
+    def __init__(
+        self,
+        frames: Iterator,
+        encode: Callable[[object], None],
+        *,
+        decode_depth: int = DECODE_QUEUE_DEPTH,
+        encode_depth: int = ENCODE_QUEUE_DEPTH,
+    ):
+        self.frames = frames
+        self.encode = encode
+        self.decode_depth = max(1, decode_depth)
+        self.encode_depth = max(1, encode_depth)
+        self.decode_timer = StageTimer("decode")
+        self.infer_timer = StageTimer("infer")
+        self.encode_timer = StageTimer("encode")
+        self._decoded: queue.Queue = queue.Queue(maxsize=self.decode_depth)
+        self._to_encode: queue.Queue = queue.Queue(maxsize=self.encode_depth)
+        self._stop_event = threading.Event()
+        self._errors: list[BaseException] = []
+        self._decoder = threading.Thread(target=self._decode, name="yolo-decode", daemon=True)
+        self._encoder = threading.Thread(target=self._encode, name="yolo-encode", daemon=True)
+        self._decode_done = False
+        self._start_time = None
+        self._end_time = None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        self._decoder.start()
+        self._encoder.start()
+
+    def _put(self, q: queue.Queue, item) -> bool:
+        """Blocking put that gives up when the pipeline stops."""
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self):
+        try:
+            while not self._stop_event.is_set():
+                with self.decode_timer.working(items=0):
+                    frame = next(self.frames, _END)
+                if frame is _END:
+                    break
+                self.decode_timer.items += 1
+                if not self._put(self._decoded, frame):
+                    return
+        except BaseException as exc:
+            self._errors.append(exc)
+        finally:
+            # the generator owns the capture, close it on the thread that runs it
+            self.frames.close()
+            self._put(self._decoded, _END)
+
+    def _encode(self):
+        try:
+            while True:
+                try:
+                    item = self._to_encode.get(timeout=_POLL_SECONDS)
+                except queue.Empty:
+                    if self._stop_event.is_set():
+                        return
+                    continue
+                if item is _END:
+                    return
+                with self.encode_timer.working():
+                    self.encode(item)
+        except BaseException as exc:
+            self._errors.append(exc)
+            # unblock the producers
+            self._stop_event.set()
+
+    def _raise_errors(self):
+        if self._errors:
+            raise self._errors[0]
+
+    def next_batch(self, size: int) -> list:
+        """Up to `size` decoded frames in order; an empty list once the source is exhausted."""
+        batch = []
+        while len(batch) < size and not self._decode_done:
+            try:
+                frame = self._decoded.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                self._raise_errors()
+                continue
+            if frame is _END:
+                self._decode_done = True
+                break
+            batch.append(frame)
+        self._raise_errors()
+        return batch
+
+    def submit(self, item):
+        """Hand an inference result to the encode thread (blocks while its queue is full)."""
+        if not self._put(self._to_encode, item):
+            self._raise_errors()
+            raise RuntimeError("Detection pipeline stopped")
+
+    def finish(self):
+        """Wait until every submitted result is encoded."""
+        self._put(self._to_encode, _END)
+        self._encoder.join()
+        self._end_time = time.perf_counter()
+        self._raise_errors()
+
+    def stop(self, timeout: float | None = 5.0):
+        """Stop both threads (after an error or once finished)."""
+        self._stop_event.set()
+        self._encoder.join(timeout)
+        self._decoder.join(timeout)
+        if self._end_time is None:
+            self._end_time = time.perf_counter()
+
+    def utilization(self) -> dict:
+        """Busy time and share of the wall time of each stage."""
+        if self._start_time is None:
+            return {}
+        wall = (self._end_time or time.perf_counter()) - self._start_time
+        stages = {}
+        for timer in (self.decode_timer, self.infer_timer, self.encode_timer):
+            stages[timer.name] = {
+                "busy_seconds": round(timer.busy_seconds, 3),
+                "utilization": round(timer.busy_seconds / wall, 3) if wall > 0 else 0.0,
+                "items": timer.items,
+            }
+        return {
+            "wall_seconds": round(wall, 3),
+            "decode_queue_depth": self.decode_depth,
+            "encode_queue_depth": self.encode_depth,
+            "stages": stages,
+        }
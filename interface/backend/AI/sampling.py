@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Callable
+import math
+import os
+import time
+
+import cv2
+
+# Above this many frames to skip, seek (the demuxer jumps to the previous keyframe) instead of grabbing.
+SEEK_MIN_FRAMES = int(os.environ.get("YOLO_SEEK_MIN_FRAMES", "90"))
+
+
+class FrameSampler:
+    """
+    Pick frames from a capture by presentation timestamp so that exactly `target_fps`
+    frames per second of video are analyzed (29.97 -> 5 fps keeps 5, not 29.97/6).
+    Discarded frames are only `grab()`bed (demuxed and decoded, never converted to BGR),
+    and long gaps are crossed by seeking. Live sources are sampled on the wall clock.
+    With a `pool`, kept frames are decoded into its preallocated buffers.
+    `start_time` is where the capture was positioned before `first_frame` was read, and
+    sampling stops at `end_time` (seconds), so a time range of a file can be processed alone.
+    """
+
+    def __init__(
+        self,
+        cap: cv2.VideoCapture,
+        first_frame,
+        target_fps: float,
+        *,
+        input_fps: float | None = None,
+        live: bool = False,
+        reopen: Callable[[], cv2.VideoCapture] | None = None,
+        seek_min_frames: int = SEEK_MIN_FRAMES,
+        pool=None,
+        start_time: float = 0.0,
+        end_time: float | None = None,
+    ):
+        self.cap = cap
+        self.first_frame = first_frame
+        self.target_fps = float(target_fps)
+        self.input_fps = input_fps if input_fps and input_fps > 0 else None
+        self.live = live
+        self.reopen = reopen
+        self.seek_min_frames = seek_min_frames
+        # optional FramePool: kept frames are decoded into reused buffers
+        self.pool = pool
+        self.start_time = start_time
+        self.end_time = end_time
+        self.interval = 1.0 / self.target_fps if self.target_fps > 0 else 0.0
+        self.frames_grabbed = 0
+        # frames grabbed since the (re)opening of the capture
+        self._pass_frames = 0
+        self.frames_sampled = 0
+        # timestamps of the kept frames, in order, for the consumer to pop
+        self.timestamps: deque[float] = deque()
+        self.seeks = 0
+        self._use_index = False
+        self._last_pts = None
+        # timestamps of a looped source continue after its previous pass
+        self._offset = 0.0
+        self._first_time = None
+        self._last_time = None
+        self._live_start = time.monotonic()
+
+    def _position(self) -> float:
+        """Timestamp (seconds) of the frame just grabbed."""
+        if self.live:
+            return time.monotonic() - self._live_start
+        pts = None if self._use_index else self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if pts is None or (self._last_pts is not None and pts <= self._last_pts):
+            # container without usable (increasing) timestamps: fall back to the frame index
+            self._use_index = True
+            pts = (self._pass_frames - 1) / (self.input_fps or self.target_fps)
+            if self._offset == 0.0:
+                # frames are counted from where the capture was positioned
+                pts += self.start_time
+        self._last_pts = pts
+        return self._offset + pts
+
+    def _grab(self) -> bool:
+        if self.cap.grab():
+            self.frames_grabbed += 1
+            self._pass_frames += 1
+            return True
+        if self.reopen is None:
+            return False
+        # end of a looped file: start again, timestamps keep increasing
+        self._offset = (self._last_time or 0.0) + (1.0 / self.input_fps if self.input_fps else self.interval)
+        self._last_pts = None
+        self.cap.release()
+        self.cap = self.reopen()
+        self._pass_frames = 0
+        if not self.cap.grab():
+            return False
+        self.frames_grabbed += 1
+        self._pass_frames = 1
+        return True
+
+    def _seek(self, target: float, position: float) -> bool:
+        """Jump close to `target` when many frames would otherwise be grabbed for nothing."""
+        if self.live or self._use_index or self.input_fps is None:
+            return False
+        if (target - position) * self.input_fps < self.seek_min_frames:
+            return False
+        # land one frame early so the next grab() reaches the target frame
+        if not self.cap.set(cv2.CAP_PROP_POS_MSEC, max(0.0, (target - self._offset - 1.0 / self.input_fps) * 1000.0)):
+            return False
+        self.seeks += 1
+        self._last_pts = None
+        return True
+
+    def _ended(self, position: float) -> bool:
+        return self.end_time is not None and position + 1e-6 >= self.end_time
+
+    def _take(self, frame, position: float):
+        if self._first_time is None:
+            self._first_time = position
+        self._last_time = position
+        self.frames_sampled += 1
+        self.timestamps.append(position)
+        return frame
+
+    def frames(self):
+        """Generator of the sampled BGR frames, starting with the already read first frame."""
+        try:
+            self.frames_grabbed = self._pass_frames = 1
+            position = self._position()
+            if self._ended(position):
+                return
+            next_time = position
+            if self.start_time and self.interval:
+                # same time grid as a run over the whole file, so consecutive ranges add up
+                next_time = math.ceil((self.start_time - 1e-6) / self.interval) * self.interval
+            if position + 1e-6 >= next_time:
+                yield self._take(self.first_frame, position)
+                next_time += self.interval
+            while True:
+                if not self._grab():
+                    return
+                position = self._position()
+                if self._ended(position):
+                    return
+                if position + 1e-6 < next_time:
+                    self._seek(next_time, position)
+                    continue
+                buffer = self.pool.acquire() if self.pool is not None else None
+                ret, frame = self.cap.retrieve(image=buffer)
+                if not ret:
+                    return
+                yield self._take(frame, position)
+                # stay on the fixed time grid, without bursts after a gap in the source
+                next_time += self.interval
+                if next_time <= position:
+                    next_time = position + self.interval
+        finally:
+            self.cap.release()
+
+    def report(self) -> dict:
+        """Requested vs achieved sampling rate."""
+        span = (self._last_time - self._first_time) if self.frames_sampled > 1 else 0.0
+        # n samples cover n intervals of video (the last one ends after the last sample)
+        achieved = self.frames_sampled / (span + self.interval) if span > 0 and self.interval else None
+        return {
+            "requested_fps": self.target_fps,
+            "input_fps": round(self.input_fps, 3) if self.input_fps else None,
+            "achieved_fps": round(achieved, 3) if achieved is not None else None,
+            "frames_sampled": self.frames_sampled,
+            "frames_grabbed": self.frames_grabbed,
+            "seeks": self.seeks,
+            "timestamps": "wall_clock" if self.live else ("frame_index" if self._use_index else "pts"),
+        }
@@ -0,0 +1,300 @@
+from __future__ import annotations
+
+from concurrent.futures import FIRST_EXCEPTION, ProcessPoolExecutor, wait
+from pathlib import Path
+import json
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+import cv2
+
+from interface.backend.AI.detection_log import detection_log_path, merge_detection_logs
+from interface.backend.AI.ffmpeg_writer import FFMPEG_BIN, codec_arguments, ffmpeg_available
+from monitoring.live_stats import registry as live_stats
+from monitoring.metrics import stage_seconds
+
+# Worker processes for one file video: a number, or "auto" for one per core. 1 disables sharding.
+# Every worker loads its own model, so memory use grows with the count.
+SHARD_WORKERS = os.environ.get("YOLO_SHARD_WORKERS", "1")
+# videos shorter than this are not split, and no shard is made shorter (seconds)
+SHARD_MIN_SECONDS = float(os.environ.get("YOLO_SHARD_MIN_SECONDS", "60"))
+FFPROBE_BIN = "ffprobe"
+
+# how often the parent publishes the progress of the workers (seconds)
+_PROGRESS_SECONDS = 0.5
+# shared progress of the workers: frames done, detections, peak per frame (3 slots per shard)
+_progress = None
+
+
+def shard_count(workers: int | str | None, duration: float) -> int:
+    """Number of shards for a video of `duration` seconds."""
+    workers = SHARD_WORKERS if workers is None else workers
+    if str(workers).lower() == "auto":
+        workers = os.cpu_count() or 1
+    workers = max(1, int(workers))
+    return max(1, min(workers, int(duration // SHARD_MIN_SECONDS)))
+
+
+def keyframe_times(path: str | Path) -> list[float]:
+    """Timestamps (seconds) of the keyframes of the first video stream, [] when ffprobe is missing."""
+    if shutil.which(FFPROBE_BIN) is None:
+        return []
+    # demuxing only: packet flags tell keyframes without decoding anything
+    cmd = [
+        FFPROBE_BIN, "-v", "error", "-select_streams", "v:0",
+        "-show_entries", "packet=pts_time,flags", "-of", "csv=p=0", str(path),
+    ]
+    try:
+        output = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return []
+    times = []
+    for line in output.splitlines():
+        pts, _, flags = line.partition(",")
+        if "K" in flags and pts not in ("", "N/A"):
+            times.append(float(pts))
+    return sorted(times)
+
+
+def shard_ranges(duration: float, count: int, keyframes: list[float]) -> list[tuple[float, float | None]]:
+    """
+    Split [0, duration) into `count` contiguous (start, end) ranges, the last one open-ended.
+    Boundaries are moved to the nearest keyframe so each worker starts decoding right where
+    its range begins; without keyframes they are evenly spaced.
+    """
+    boundaries = []
+    for index in range(1, count):
+        target = duration * index / count
+        if keyframes:
+            target = min(keyframes, key=lambda keyframe: abs(keyframe - target))
+        if 0.0 < target < duration and (not boundaries or target > boundaries[-1]):
+            boundaries.append(target)
+    starts = [0.0, *boundaries]
+    ends = [*boundaries, None]
+    return list(zip(starts, ends))
+
+
+def _init_worker(progress, threads: int):
+    global _progress
+    _progress = progress
+    # split the cores between the workers instead of every torch/OpenCV pool using all of them
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _terminate(pool: ProcessPoolExecutor):
+    """Stop the workers of a failed run now, instead of letting them finish their shards."""
+    processes = list((pool._processes or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(5)
+
+
+def _run_shard(
+    index: int, video_path: str, start: float, end: float | None, output_dir: str, suffix: str, kwargs: dict
+) -> str:
+    """
+    Worker process: run the detector on one time range and return its recording path.
+    Shards are recorded in the container (hence codec) of the final output, so they can be joined as is.
+    """
+    from interface.backend.AI.yolo_detection_without_yolo import yolo_detection_without_yolo
+
+    key = f"shard-{index}"
+    done = threading.Event()
+
+    def publish():
+        while not done.wait(_PROGRESS_SECONDS):
+            entry = live_stats.get(key)
+            if entry is not None:
+                slot = 3 * index
+                _progress[slot] = entry.get("frames_done", 0)
+                _progress[slot + 1] = entry.get("total_detections", 0)
+                _progress[slot + 2] = entry.get("peak_detections_per_frame", 0)
+
+    publisher = threading.Thread(target=publish, daemon=True)
+    publisher.start()
+    try:
+        record_output, summary = yolo_detection_without_yolo(
+            live_input=False,
+            video_path=video_path,
+            output_dir=output_dir,
+            record_filename=f"shard-{index:03d}{suffix}",
+            stats_key=key,
+            start_seconds=start,
+            end_seconds=end,
+            shard_workers=1,
+            **kwargs,
+        )
+    finally:
+        done.set()
+        publisher.join()
+    slot = 3 * index
+    _progress[slot], _progress[slot + 1] = summary["frames_processed"], summary["total_detections"]
+    _progress[slot + 2] = summary["peak_detections_per_frame"]
+    return str(record_output)
+
+
+def concat_segments(segments: list[Path], output: Path):
+    """
+    Join the shard recordings, in order, into `output`. With ffmpeg, segments in the container
+    of `output` are copied without re-encoding; others (a shard fell back to another container)
+    are re-encoded for `output`.
+    """
+    suffix = output.suffix.lower()
+    codec = ["-c", "copy"] if all(segment.suffix.lower() == suffix for segment in segments) else codec_arguments(suffix)
+    if ffmpeg_available() and codec is not None:
+        listing = output.with_name(f"{output.stem}.segments.txt")
+        listing.write_text("".join(f"file '{segment.resolve()}'\n" for segment in segments), encoding="utf-8")
+        cmd = [
+            FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "concat", "-safe", "0", "-i", str(listing), *codec,
+        ]
+        if suffix == ".mp4" and codec[-1] == "copy":
+            cmd += ["-movflags", "+faststart"]
+        try:
+            subprocess.run([*cmd, str(output)], check=True)
+            return
+        finally:
+            listing.unlink(missing_ok=True)
+
+    # no ffmpeg, or a container it is not set up to encode: decode and write them again
+    from interface.backend.AI.yolo_detection_without_yolo import _open_writer
+
+    writer = None
+    try:
+        for segment in segments:
+            cap = cv2.VideoCapture(str(segment))
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    if writer is None:
+                        height, width = frame.shape[:2]
+                        writer = _open_writer(output, cap.get(cv2.CAP_PROP_FPS) or 1.0, width, height)
+                    writer.write(frame)
+            finally:
+                cap.release()
+    finally:
+        if writer is not None:
+            writer.release()
+
+
+def merge_summaries(summaries: list[dict], wall_seconds: float) -> dict:
+    """One SimpleStats-style summary for the whole video from the summaries of its shards."""
+    frames = sum(summary["frames_processed"] for summary in summaries)
+    merged = {
+        "frames_processed": frames,
+        "total_time_seconds": round(wall_seconds, 3),
+        "average_fps": round(frames / wall_seconds, 2) if wall_seconds > 0 else 0.0,
+        "total_detections": sum(summary["total_detections"] for summary in summaries),
+        "peak_detections_per_frame": max((summary["peak_detections_per_frame"] for summary in summaries), default=0),
+    }
+    for key in ("inference_backend", "batch_size"):
+        if summaries and key in summaries[0]:
+            merged[key] = summaries[0][key]
+    return merged
+
+
+def run_sharded(
+    video_path: str | Path,
+    record_output: Path,
+    ranges: list[tuple[float, float | None]],
+    *,
+    stats_key: str | None = None,
+    frames_expected: int | None = None,
+    **kwargs,
+) -> tuple[Path, dict]:
+    """
+    Run the CPU detector on each time range in its own process, then merge the annotated
+    segments into `record_output` and the summaries into `<record_output>.json`.
+    `kwargs` are passed to every worker's `yolo_detection_without_yolo` call.
+    """
+    start_time = time.perf_counter()
+    count = len(ranges)
+    shard_dir = record_output.with_name(f"{record_output.stem}.shards")
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    live_stats.start(
+        stats_key, "video", backend="cpu", source=str(video_path), frames_done=0, total_detections=0, shards=count
+    )
+    if frames_expected:
+        live_stats.update(stats_key, frames_expected=frames_expected)
+    live_status = "failed"
+    # spawn: the parent runs threads (jobs, live camera) that must not be forked mid-operation
+    context = multiprocessing.get_context("spawn")
+    progress = context.Array("q", 3 * count, lock=False)
+    threads = max(1, (os.cpu_count() or 1) // count)
+    try:
+        pool = ProcessPoolExecutor(count, mp_context=context, initializer=_init_worker, initargs=(progress, threads))
+        try:
+            futures = [
+                pool.submit(_run_shard, index, str(video_path), start, end, str(shard_dir), record_output.suffix, kwargs)
+                for index, (start, end) in enumerate(ranges)
+            ]
+            while True:
+                finished, pending = wait(futures, timeout=_PROGRESS_SECONDS, return_when=FIRST_EXCEPTION)
+                live_stats.report_frames(
+                    stats_key,
+                    sum(progress[0::3]),
+                    sum(progress[1::3]),
+                    max(progress[2::3], default=0),
+                )
+                for future in finished:
+                    if future.exception() is not None:
+                        raise future.exception()
+                if not pending:
+                    break
+            segments = [Path(future.result()) for future in futures]
+        except BaseException:
+            _terminate(pool)
+            raise
+        pool.shutdown()
+        # shards fall back to .mp4 when .webm can't be written, as single-process runs do
+        suffixes = {segment.suffix.lower() for segment in segments}
+        if len(suffixes) == 1 and record_output.suffix.lower() not in suffixes:
+            record_output = record_output.with_suffix(segments[0].suffix)
+
+        summaries = [json.loads(segment.with_suffix(".json").read_text(encoding="utf-8")) for segment in segments]
+        merge_start = time.perf_counter()
+        if all(segment.exists() for segment in segments):
+            temp_output = record_output.with_name(f"{record_output.stem}.tmp{record_output.suffix}")
+            concat_segments(segments, temp_output)
+            temp_output.replace(record_output)
+            stage_seconds.observe(time.perf_counter() - merge_start, stage="merge", engine="yolo-cpu")
+
+        summary = merge_summaries(summaries, time.perf_counter() - start_time)
+        logs = [shard.get("detection_log") for shard in summaries]
+        if all(logs):
+            detection_log = merge_detection_logs(
+                [shard_dir / log["path"] for log in logs],
+                detection_log_path(record_output),
+                [shard["frames_processed"] for shard in summaries],
+            )
+            detection_log.class_names = {int(class_id): name for class_id, name in logs[0]["class_names"].items()}
+            summary["detection_log"] = detection_log.summary()
+        summary["sharding"] = {
+            "workers": count,
+            "ranges": [[round(start, 3), round(end, 3) if end is not None else None] for start, end in ranges],
+            "merge_seconds": round(time.perf_counter() - merge_start, 3),
+            "shards": summaries,
+        }
+        record_output.with_suffix(".json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        live_status = "done"
+        return record_output, summary
+    finally:
+        # partial segments, summaries and logs of a failed run go too
+        shutil.rmtree(shard_dir, ignore_errors=True)
+        live_stats.finish(stats_key, status=live_status)
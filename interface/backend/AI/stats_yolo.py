@@ -7,6 +7,8 @@ import time
 
 from hailo_apps.hailo_app_python.core.gstreamer.gstreamer_app import app_callback_class
 
+from monitoring.live_stats import registry as live_stats
+
 
 class UserCallback(app_callback_class):
     def __init__(
@@ -14,6 +16,7 @@ class UserCallback(app_callback_class):
         stats_interval: int = 60,
         log_interval: int = 300,
         track_stale_frames: int = 30,
+        live_key: str | None = None,
     ):
         super().__init__()
         self.stats_interval = max(1, stats_interval)
@@ -29,11 +32,18 @@ class UserCallback(app_callback_class):
         self._next_global_id = 1
         self._track_last_seen: Dict[int, int] = {}
         self._track_global_id: Dict[int, int] = {}
+        self.live_key = live_key
+        # optional DetectionLog, and extra entries of the summary
+        self.detection_log = None
+        self.extras = {}
 
     def record_detections(self, detection_count: int):
         self.total_detections += detection_count
         if detection_count > self.max_detections:
             self.max_detections = detection_count
+        live_stats.report_frames(
+            self.live_key, self.frame_count, self.total_detections, self.max_detections
+        )
 
     def maybe_print_stats(self):
         frame_id = self.frame_count
@@ -65,6 +75,9 @@ class UserCallback(app_callback_class):
     def set_crop_dir(self, target: Path):
         self.crop_dir = target
 
+    def set_detection_log(self, detection_log):
+        self.detection_log = detection_log
+
     def print_summary(self):
         total_seconds = time.perf_counter() - self.start_time
         avg_fps = self.frame_count / total_seconds if total_seconds > 0 else 0.0
@@ -87,6 +100,7 @@ class UserCallback(app_callback_class):
             "average_fps": round(avg_fps, 2),
             "total_detections": self.total_detections,
             "peak_detections_per_frame": self.max_detections,
+            **self.extras,
         }
 
     def get_global_id(self, track_id: int, frame_id: int) -> int:
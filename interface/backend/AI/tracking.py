@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import os
+
+import cv2
+import numpy as np
+
+# Run the detector every K sampled frames and track boxes in between: a number, or "auto"
+# to tune K from how well tracked boxes still match the detections. 1 detects every frame.
+KEYFRAME_INTERVAL = os.environ.get("YOLO_KEYFRAME_INTERVAL", "1")
+MAX_KEYFRAME_INTERVAL = int(os.environ.get("YOLO_MAX_KEYFRAME_INTERVAL", "8"))
+# optical flow runs on frames downscaled to this width
+TRACK_WIDTH = 320
+# points tracked per box (GRID x GRID)
+_GRID = 5
+# "auto" K: grow while tracked boxes agree this well with the next detections, halve below the second
+_STABLE = 0.75
+_UNSTABLE = 0.5
+_EMPTY = np.empty((0, 4), dtype=np.float32)
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """IoU of every (N, 4) xyxy box of `a` with every (M, 4) box of `b`."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return np.where(union > 0, intersection / np.maximum(union, 1e-9), 0.0)
+
+
+class FlowTracker:
+    """
+    Carry detection boxes across frames with sparse optical flow (pyramidal Lucas-Kanade),
+    as the median flow tracker does: a grid of points per box is tracked forward and back,
+    and the box follows the median motion and spread of the half that tracked best.
+    Detections handed to `reset` are matched by IoU with the tracked boxes to keep track ids.
+    """
+
+    def __init__(self, frame_shape: tuple, width: int = TRACK_WIDTH):
+        height, frame_width = frame_shape[:2]
+        self.scale = min(1.0, width / frame_width)
+        self.size = (round(frame_width * self.scale), round(height * self.scale))
+        self.boxes = _EMPTY
+        self.class_ids = np.empty(0)
+        self.confidences = np.empty(0)
+        self.track_ids = np.empty(0, dtype=np.int32)
+        self._next_id = 1
+        self._gray = None
+        self._points = None
+
+    def _prepare(self, frame: np.ndarray) -> np.ndarray:
+        if self.scale < 1.0:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+    def _grid_points(self) -> np.ndarray:
+        """(N, GRID*GRID, 2) points spread over the inner 80 % of each box, in tracking pixels."""
+        boxes = self.boxes * self.scale
+        steps = np.linspace(0.1, 0.9, _GRID)
+        xs = boxes[:, None, 0] + (boxes[:, None, 2] - boxes[:, None, 0]) * steps
+        ys = boxes[:, None, 1] + (boxes[:, None, 3] - boxes[:, None, 1]) * steps
+        grid_x = np.repeat(xs, _GRID, axis=1)
+        grid_y = np.tile(ys, (1, _GRID))
+        return np.stack([grid_x, grid_y], axis=2).astype(np.float32)
+
+    def update(self, frame: np.ndarray):
+        """Move the boxes to `frame`; returns (boxes, class ids, confidences, track ids)."""
+        gray = self._prepare(frame)
+        if self._gray is not None and len(self.boxes):
+            old = self._points.reshape(-1, 1, 2)
+            flow = dict(winSize=(15, 15), maxLevel=2)
+            new, status, _ = cv2.calcOpticalFlowPyrLK(self._gray, gray, old, None, **flow)
+            # forward-backward check: points that don't come back where they started are unreliable
+            back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self._gray, new, None, **flow)
+            error = np.linalg.norm(back - old, axis=2).reshape(len(self.boxes), -1)
+            old = old.reshape(len(self.boxes), -1, 2)
+            new = new.reshape(len(self.boxes), -1, 2)
+            status = (status & back_status).reshape(len(self.boxes), -1).astype(bool)
+            boxes = self.boxes.copy()
+            for index in range(len(boxes)):
+                ok = status[index]
+                if ok.any():
+                    ok &= error[index] <= np.median(error[index][ok])
+                if ok.sum() < 3:
+                    # lost: the box stays where it was until the next keyframe
+                    continue
+                before, after = old[index][ok], new[index][ok]
+                shift = np.median(after - before, axis=0) / self.scale
+                spread_before = np.median(np.abs(before - np.median(before, axis=0)))
+                spread_after = np.median(np.abs(after - np.median(after, axis=0)))
+                zoom = np.clip(spread_after / spread_before, 0.8, 1.25) if spread_before > 0 else 1.0
+                center = (boxes[index, :2] + boxes[index, 2:]) / 2 + shift
+                half = (boxes[index, 2:] - boxes[index, :2]) / 2 * zoom
+                boxes[index] = np.concatenate([center - half, center + half])
+            height, width = frame.shape[:2]
+            self.boxes = np.clip(boxes, 0, [width, height, width, height]).astype(np.float32)
+            self._points = self._grid_points()
+        self._gray = gray
+        return self.boxes, self.class_ids, self.confidences, self.track_ids
+
+    def reset(self, frame: np.ndarray, boxes: np.ndarray, class_ids: np.ndarray, confidences: np.ndarray) -> float | None:
+        """
+        Replace the tracked boxes with fresh detections of `frame`.
+        Returns how well the tracked boxes matched them (0..1), the track stability,
+        or None on the first frame.
+        """
+        first = self._gray is None
+        predicted, _, _, _ = self.update(frame)
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        track_ids = np.empty(len(boxes), dtype=np.int32)
+        matched_iou = 0.0
+        unmatched = np.ones(len(boxes), dtype=bool)
+        if len(predicted) and len(boxes):
+            ious = iou_matrix(predicted, boxes)
+            # a box only continues a track of the same class
+            ious[self.class_ids[:, None] != np.asarray(class_ids)[None, :]] = 0.0
+            # greedy matching, best overlaps first
+            used_tracks = set()
+            for flat in np.argsort(ious, axis=None)[::-1]:
+                track, detection = divmod(int(flat), ious.shape[1])
+                if ious[track, detection] < 0.3:
+                    break
+                if track in used_tracks or not unmatched[detection]:
+                    continue
+                used_tracks.add(track)
+                track_ids[detection] = self.track_ids[track]
+                matched_iou += ious[track, detection]
+                unmatched[detection] = False
+        for detection in np.flatnonzero(unmatched):
+            track_ids[detection] = self._next_id
+            self._next_id += 1
+
+        self.boxes = boxes
+        self.class_ids = np.asarray(class_ids)
+        self.confidences = np.asarray(confidences)
+        self.track_ids = track_ids
+        self._points = self._grid_points()
+        if first:
+            return None
+        total = max(len(predicted), len(boxes))
+        return float(matched_iou / total) if total else 1.0
+
+
+class KeyframeScheduler:
+    """
+    Decide which sampled frames go through the detector: one every `k`.
+    In "auto" mode, k grows by one while the track stability measured at keyframes stays
+    high and is halved when it drops (fast motion, objects entering or leaving).
+    """
+
+    def __init__(self, interval: int | str | None = None, max_interval: int = MAX_KEYFRAME_INTERVAL):
+        interval = KEYFRAME_INTERVAL if interval is None else interval
+        self.auto = str(interval).lower() == "auto"
+        self.max_interval = max(1, max_interval)
+        self.k = 1 if self.auto else max(1, int(interval))
+        self.enabled = self.auto or self.k > 1
+        self.keyframes = 0
+        self.tracked_frames = 0
+        self._since_keyframe = None
+        self._stability_sum = 0.0
+        self._measured = 0
+
+    def plan(self, count: int) -> list[bool]:
+        """Keyframe flags for the next `count` frames."""
+        flags = []
+        for _ in range(count):
+            is_keyframe = self._since_keyframe is None or self._since_keyframe + 1 >= self.k
+            self._since_keyframe = 0 if is_keyframe else self._since_keyframe + 1
+            flags.append(is_keyframe)
+        self.keyframes += sum(flags)
+        self.tracked_frames += count - sum(flags)
+        return flags
+
+    def record(self, stability: float | None):
+        if stability is None:
+            return
+        self._stability_sum += stability
+        self._measured += 1
+        if not self.auto:
+            return
+        if stability >= _STABLE:
+            self.k = min(self.k + 1, self.max_interval)
+        elif stability < _UNSTABLE:
+            self.k = max(1, self.k // 2)
+
+    def report(self) -> dict:
+        frames = self.keyframes + self.tracked_frames
+        return {
+            "interval": "auto" if self.auto else self.k,
+            "final_interval": self.k,
+            "keyframes": self.keyframes,
+            "tracked_frames": self.tracked_frames,
+            "inference_skipped_ratio": round(self.tracked_frames / frames, 3) if frames else 0.0,
+            "mean_track_stability": round(self._stability_sum / self._measured, 3) if self._measured else None,
+        }
@@ -18,12 +18,14 @@ import gi
 gi.require_version('Gst', '1.0')
 from gi.repository import Gst
 import hailo
+import numpy as np
 
 # Imports locaux
 from interface.backend.AI.cropping_yolo import (
     extract_frame_from_pad,
     save_detection_crops,
 )
+from interface.backend.AI.detection_log import DETECTION_LOG, DetectionLog, detection_log_path
 from interface.backend.AI.download_yolo import (
     crop_output_dir,
     recording_output_path,
@@ -33,6 +35,7 @@ from interface.backend.AI.gstreamer_yolo import (
     runtime_namespace,
 )
 from interface.backend.AI.stats_yolo import UserCallback, write_summary_json
+from monitoring.live_stats import registry as live_stats
 
 _ROI_HELPER_WARNING_EMITTED = False
 
@@ -101,6 +104,27 @@ STATS_INTERVAL = 60
 LOG_INTERVAL = 300
 TRACK_STALE_FRAMES = 30
 
+def log_detections(user_data, frame_id: int, buffer, detections):
+    """Append the detections of a frame (normalized boxes, global track ids) to the detection log."""
+    log = user_data.detection_log
+    timestamp = buffer.pts / Gst.SECOND if buffer.pts != Gst.CLOCK_TIME_NONE else None
+    count = len(detections)
+    boxes = np.empty((count, 4), dtype=np.float32)
+    class_ids = np.empty(count, dtype=np.int16)
+    confidences = np.empty(count, dtype=np.float32)
+    track_ids = np.full(count, -1, dtype=np.int32)
+    for index, detection in enumerate(detections):
+        bbox = detection.get_bbox()
+        boxes[index] = (bbox.xmin(), bbox.ymin(), bbox.xmin() + bbox.width(), bbox.ymin() + bbox.height())
+        class_ids[index] = detection.get_class_id()
+        confidences[index] = detection.get_confidence()
+        log.class_names.setdefault(int(class_ids[index]), detection.get_label())
+        track = detection.get_objects_typed(hailo.HAILO_UNIQUE_ID)
+        if len(track) == 1:
+            track_ids[index] = user_data.get_global_id(track[0].get_id(), frame_id)
+    log.append(frame_id, timestamp, boxes, class_ids, confidences, track_ids)
+
+
 def app_callback(pad, info, user_data):
     buf = info.get_buffer()
     if buf is None:
@@ -142,6 +166,9 @@ def app_callback(pad, info, user_data):
             id_resolver=user_data.get_global_id,
         )
 
+    if user_data.detection_log is not None:
+        log_detections(user_data, frame_id, buf, detections)
+
     user_data.record_detections(detection_count)
     user_data.maybe_print_stats()
 
@@ -177,6 +204,7 @@ def yolo_detection(
     env_file: str | Path | None = None,
     arch: str | None = None,
     hef_path: str | Path | None = None,
+    stats_key: str | None = None,
 ) -> Path:
     if not live_input and video_path is None:
         raise ValueError("video_path must be provided when live_input is False.")
@@ -210,6 +238,7 @@ def yolo_detection(
         stats_interval=stats_interval,
         log_interval=log_interval,
         track_stale_frames=TRACK_STALE_FRAMES,
+        live_key=stats_key,
     )
     app = RecordingDetectionApp(
         app_callback,
@@ -225,21 +254,40 @@ def yolo_detection(
         print(f"Recording detection stream to: {app.record_output}")
         user_data.set_recording_target(app.record_output)
     user_data.set_crop_dir(crop_dir)
+    if DETECTION_LOG:
+        user_data.set_detection_log(DetectionLog(detection_log_path(app.record_output)))
 
     finalized_recording: Path | None = None
+    live_stats.start(
+        stats_key,
+        "video",
+        backend="hailo",
+        source=runtime_ns.input,
+        frames_done=0,
+        total_detections=0,
+        recording_path=str(Path(app.record_tmp_output).resolve()) if app.record_enabled else None,
+    )
+    live_status = "failed"
     try:
         app.run()
+        live_status = "done"
     except SystemExit as exc:
         exit_code = exc.code if isinstance(exc.code, int) else 0
         if exit_code not in (0, 1, None):
             raise RuntimeError(f"GStreamerDetectionApp exited with code {exit_code}") from None
+        live_status = "done"
     finally:
         try:
             finalized_recording = app.finalize_recording()
             target_path = finalized_recording or app.record_output
+            if user_data.detection_log is not None:
+                user_data.detection_log.close()
+                user_data.detection_log.move(detection_log_path(target_path))
+                user_data.extras["detection_log"] = user_data.detection_log.summary()
             write_summary_json(user_data, target_path)
         finally:
             user_data.print_summary()
+            live_stats.finish(stats_key, status=live_status)
 
     return finalized_recording or app.record_output, user_data
 
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 from pathlib import Path
 import json
+import os
+import threading
 import time
 
 import cv2
+import numpy as np
 
 try:
     from ultralytics import YOLO
@@ -14,6 +17,18 @@ except ModuleNotFoundError as exc:
         "Install it with: pip install ultralytics"
     ) from exc
 
+from interface.backend.AI import sharding
+from interface.backend.AI.cpu_backends import CPU_BACKEND, max_batch_size, resolve_model, supports_input_size
+from interface.backend.AI.detection_log import DETECTION_LOG, DetectionLog, detection_log_path
+from interface.backend.AI.ffmpeg_writer import ENCODER_QUEUE_DEPTH, FfmpegPipeWriter
+from interface.backend.AI.motion import MOTION_THRESHOLD, MotionGate
+from interface.backend.AI.overlay import OverlayRenderer, detections_of
+from interface.backend.AI.pipeline import DECODE_QUEUE_DEPTH, ENCODE_QUEUE_DEPTH, DetectionPipeline, FramePool
+from interface.backend.AI.sampling import FrameSampler
+from interface.backend.AI.tracking import FlowTracker, KeyframeScheduler
+from monitoring.live_stats import registry as live_stats
+from monitoring.metrics import stage_seconds
+
 def recording_output_path(record_filename: str | None, output_dir: str | Path | None, recordings_dir: Path) -> Path:
     """
     Build a writable path for the final recording.
@@ -47,10 +62,20 @@ LOOP_FILE_SOURCE = False
 
 STATS_INTERVAL = 60
 LOG_INTERVAL = 300
+# Frames sent to the model per predict() call: a number, or "auto" to pick the fastest size at run time
+BATCH_SIZE = os.environ.get("YOLO_BATCH_SIZE", "auto")
+MAX_AUTO_BATCH_SIZE = 8
+# Model input size: empty for the model's own, a size in pixels, or "auto" to adapt it to the frame rate
+IMGSZ = os.environ.get("YOLO_IMGSZ", "")
+IMGSZ_MIN = int(os.environ.get("YOLO_IMGSZ_MIN", "320"))
+IMGSZ_MAX = int(os.environ.get("YOLO_IMGSZ_MAX", "640"))
+IMGSZ_STEP = 64
+# the input size is reconsidered after this much processing (seconds)
+RESOLUTION_WINDOW_SECONDS = 5.0
 
 
 class SimpleStats:
-    def __init__(self, stats_interval: int, log_interval: int):
+    def __init__(self, stats_interval: int, log_interval: int, live_key: str | None = None):
         self.stats_interval = max(1, stats_interval)
         self.log_interval = max(1, log_interval)
         self.start_time = time.perf_counter()
@@ -59,12 +84,18 @@ class SimpleStats:
         self.frame_count = 0
         self.total_detections = 0
         self.max_detections = 0
+        self.live_key = live_key
+        #extra entries of the summary (batch size, pipeline utilization...)
+        self.extras = {}
 
     def update(self, detection_count: int):
         self.frame_count += 1
         self.total_detections += detection_count
         if detection_count > self.max_detections:
             self.max_detections = detection_count
+        live_stats.report_frames(
+            self.live_key, self.frame_count, self.total_detections, self.max_detections
+        )
 
     def should_log_frame(self) -> bool:
         return self.frame_count == 1 or (self.frame_count % self.log_interval == 0)
@@ -96,13 +127,167 @@ class SimpleStats:
     def to_summary_dict(self) -> dict:
         total_seconds = time.perf_counter() - self.start_time
         avg_fps = self.frame_count / total_seconds if total_seconds > 0 else 0.0
-        return {
+        summary = {
             "frames_processed": self.frame_count,
             "total_time_seconds": round(total_seconds, 3),
             "average_fps": round(avg_fps, 2),
             "total_detections": self.total_detections,
             "peak_detections_per_frame": self.max_detections,
         }
+        summary.update(self.extras)
+        return summary
+
+
+class BatchSizeTuner:
+    """
+    Pick the predict() batch size at run time: start at 1 and double it while the time
+    per frame keeps dropping by more than 5 %, then keep the fastest size.
+    Calibration batches are real work, nothing is computed twice.
+    """
+
+    def __init__(self, max_size: int = MAX_AUTO_BATCH_SIZE):
+        self.size = 1
+        self.max_size = max(1, max_size)
+        self.settled = self.max_size == 1
+        self._best: tuple[float, int] | None = None
+        self._warmed_up = False
+
+    def record(self, frames: int, seconds: float):
+        if self.settled or frames < self.size:
+            # partial (last) batches are not comparable
+            return
+        if not self._warmed_up:
+            # the first call also pays for model initialization
+            self._warmed_up = True
+            return
+        per_frame = seconds / frames
+        if self._best is None or per_frame < self._best[0] * 0.95:
+            self._best = (per_frame, self.size)
+            if self.size * 2 <= self.max_size:
+                self.size *= 2
+                return
+        self.size = self._best[1]
+        self.settled = True
+
+
+class ResolutionController:
+    """
+    Closed loop on the inference input size (`imgsz`): after each window, the frames/s the
+    inference stage can sustain are compared with the target rate. Below it, the size steps
+    down; when the next size up (cost ~ pixels) would still keep 10 % headroom, it steps up.
+    Throttling or a busier board thus lowers the resolution instead of the frame rate.
+    """
+
+    def __init__(
+        self,
+        target_fps: float,
+        min_size: int = IMGSZ_MIN,
+        max_size: int = IMGSZ_MAX,
+        step: int = IMGSZ_STEP,
+        window_seconds: float = RESOLUTION_WINDOW_SECONDS,
+    ):
+        self.target_fps = target_fps
+        # model strides need multiples of 32
+        max_size = max(32, max_size // 32 * 32)
+        min_size = min(max(32, min_size // 32 * 32), max_size)
+        self.sizes = sorted({*range(min_size, max_size, max(32, step // 32 * 32)), max_size})
+        self.index = len(self.sizes) - 1
+        self.window_seconds = window_seconds
+        self.windows: list[dict] = []
+        self._window_start = None
+        self._frames = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def size(self) -> int:
+        return self.sizes[self.index]
+
+    def record(self, frames: int, busy_seconds: float) -> bool:
+        """Account a processed batch; True when the size changed."""
+        now = time.perf_counter()
+        if self._window_start is None:
+            # the first batch also pays for model initialization
+            self._window_start = now
+            return False
+        self._frames += frames
+        self._busy_seconds += busy_seconds
+        elapsed = now - self._window_start
+        if elapsed < self.window_seconds or self._busy_seconds <= 0:
+            return False
+
+        capacity = self._frames / self._busy_seconds
+        self._log_window(elapsed, capacity)
+        self._window_start, self._frames, self._busy_seconds = now, 0, 0.0
+        previous = self.index
+        if capacity < self.target_fps * 0.95 and self.index > 0:
+            self.index -= 1
+        elif self.index < len(self.sizes) - 1:
+            next_size = self.sizes[self.index + 1]
+            if capacity * (self.size / next_size) ** 2 >= self.target_fps * 1.1:
+                self.index += 1
+        return self.index != previous
+
+    def _log_window(self, elapsed: float, capacity: float):
+        window = {
+            "imgsz": self.size,
+            "frames": self._frames,
+            "achieved_fps": round(self._frames / elapsed, 2),
+            "capacity_fps": round(capacity, 2),
+        }
+        last = self.windows[-1] if self.windows else None
+        if last is not None and last["imgsz"] == self.size:
+            # consecutive windows at the same size are kept as one entry
+            frames = last["frames"] + self._frames
+            last["achieved_fps"] = round((last["achieved_fps"] * last["frames"] + window["achieved_fps"] * self._frames) / frames, 2)
+            last["capacity_fps"] = round((last["capacity_fps"] * last["frames"] + capacity * self._frames) / frames, 2)
+            last["frames"] = frames
+            last["windows"] += 1
+        else:
+            self.windows.append({**window, "windows": 1})
+
+    def report(self) -> dict:
+        return {
+            "mode": "auto",
+            "target_fps": round(self.target_fps, 3),
+            "min_imgsz": self.sizes[0],
+            "max_imgsz": self.sizes[-1],
+            "final_imgsz": self.size,
+            "windows": self.windows,
+        }
+
+
+def _batch_tuner(batch_size: int | str | None, live_input: bool) -> BatchSizeTuner:
+    if batch_size is None:
+        # batching delays every frame by the batch duration, keep live input responsive
+        batch_size = 1 if live_input else BATCH_SIZE
+    if str(batch_size).lower() == "auto":
+        return BatchSizeTuner()
+    tuner = BatchSizeTuner(max_size=int(batch_size))
+    tuner.size = tuner.max_size
+    tuner.settled = True
+    return tuner
+
+
+_thread_models = threading.local()
+
+
+def _load_model(model_path: Path, backend: str | None = None) -> tuple[YOLO, str]:
+    """
+    Return a warm YOLO model for this thread and the inference backend it runs on.
+    ultralytics models are not thread-safe, so each worker thread keeps its own
+    instance and reuses it for every video it processes.
+    ONNX / OpenVINO / NCNN models are exported next to the `.pt` on first use (see cpu_backends).
+    """
+    models = getattr(_thread_models, "models", None)
+    if models is None:
+        models = _thread_models.models = {}
+    key = (str(model_path.resolve()), backend or CPU_BACKEND)
+    if key not in models:
+        with stage_seconds.time(stage="model_load", engine="yolo-cpu"):
+            path, used_backend = resolve_model(model_path, backend)
+            # exported models don't carry their task, the .pt is always a detection model
+            models[key] = (YOLO(str(path), task="detect"), used_backend)
+    return models[key]
 
 
 def _open_capture(source) -> cv2.VideoCapture:
@@ -121,7 +306,12 @@ def _fourcc_candidates(suffix: str) -> list[str]:
     return ["mp4v", "avc1", "H264"]
 
 
-def _open_writer(path: Path, fps: float, width: int, height: int) -> cv2.VideoWriter:
+def _open_writer(path: Path, fps: float, width: int, height: int, bitrate_kbps: int | None = None) -> cv2.VideoWriter:
+    # Prefer ffmpeg: fast x264 presets, bitrate control, and a container that can be served while recording.
+    try:
+        return FfmpegPipeWriter(path, fps, width, height, key_interval=max(1, round(fps)), bitrate_kbps=bitrate_kbps)
+    except (RuntimeError, OSError):
+        pass
     for fourcc in _fourcc_candidates(path.suffix):
         writer = cv2.VideoWriter(
             str(path),
@@ -146,6 +336,30 @@ def _overlay_fps(frame, fps: float):
     )
 
 
+def frame_annotator(yolo_path: str | Path | None = None, backend: str | None = None):
+    """
+    Return `annotate(frame) -> (annotated_frame, detection_count)` for live streams.
+    The model is loaded for the calling thread, so call it from the thread that will use it.
+    """
+    model_path = Path(yolo_path) if yolo_path is not None else YOLO_FILE
+    if not model_path.exists():
+        raise FileNotFoundError(f"YOLO model not found: {model_path}")
+    model, _ = _load_model(model_path, backend)
+    renderers = {}
+
+    def annotate(frame):
+        result = model.predict(frame, verbose=False)[0]
+        renderer = renderers.get(frame.shape)
+        if renderer is None:
+            renderer = renderers[frame.shape] = OverlayRenderer(model.names, frame.shape)
+        boxes, class_ids, confidences = detections_of(result)
+        # the caller's frame is annotated in place
+        renderer.draw(frame, boxes, class_ids, confidences)
+        return frame, len(boxes)
+
+    return annotate
+
+
 def _write_summary_json(stats: SimpleStats, target_path: Path) -> Path:
     summary_path = target_path.with_suffix(".json")
     summary_path.write_text(json.dumps(stats.to_summary_dict(), indent=2), encoding="utf-8")
@@ -172,9 +386,38 @@ def yolo_detection_without_yolo(
     env_file: str | Path | None = None,
     arch: str | None = None,
     yolo_path: str | Path | None = None,
+    stats_key: str | None = None,
+    batch_size: int | str | None = None,
+    decode_queue_depth: int = DECODE_QUEUE_DEPTH,
+    encode_queue_depth: int = ENCODE_QUEUE_DEPTH,
+    backend: str | None = None,
+    shard_workers: int | str | None = None,
+    start_seconds: float = 0.0,
+    end_seconds: float | None = None,
+    keyframe_interval: int | str | None = None,
+    motion_threshold: float | None = None,
+    imgsz: int | str | None = None,
 ) -> Path:
-    """Run YOLO (.pt) inference without Hailo and record an annotated video."""
-    _ = (record_bitrate, use_frame, sync_with_source, dump_pipeline_graph, env_file, arch)
+    """
+    Run YOLO (.pt) inference without Hailo and record an annotated video.
+    When `stats_key` is set, progress is published to the live stats registry under that key.
+    `batch_size` frames go through the model per call (a number or "auto", default YOLO_BATCH_SIZE);
+    results are handled in frame order, so stats and output don't depend on it.
+    Decoding, inference and annotation/encoding run as a pipeline of three threads
+    linked by queues of `decode_queue_depth` frames and `encode_queue_depth` results.
+    `backend` selects the inference runtime (pytorch, onnx, openvino, openvino-int8 or ncnn,
+    default YOLO_CPU_BACKEND); the output and stats are the same whatever the runtime.
+    Long files are split into keyframe-aligned time ranges processed by `shard_workers`
+    processes (default YOLO_SHARD_WORKERS), whose recordings and summaries are then merged.
+    `start_seconds` / `end_seconds` restrict the analysis to a time range of a file.
+    With `keyframe_interval` (a number or "auto", default YOLO_KEYFRAME_INTERVAL) above 1,
+    the model only sees one sampled frame in K and boxes are tracked on the others.
+    With `motion_threshold` (default YOLO_MOTION_THRESHOLD) above 0, frames whose
+    thumbnail barely differs from the last inferred frame reuse its detections.
+    `imgsz` (default YOLO_IMGSZ) sets the model input size; "auto" adapts it between
+    YOLO_IMGSZ_MIN and YOLO_IMGSZ_MAX so inference keeps up with `frame_rate`.
+    """
+    _ = (use_frame, sync_with_source, dump_pipeline_graph, env_file, arch)
 
     if not live_input and video_path is None:
         raise ValueError("video_path must be provided when live_input is False.")
@@ -193,6 +436,44 @@ def yolo_detection_without_yolo(
     log_interval = log_interval or LOG_INTERVAL
 
     cap = _open_capture(source)
+    if not live_input and not loop_file_source:
+        input_fps = cap.get(cv2.CAP_PROP_FPS) or 0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        duration = total_frames / input_fps if input_fps > 0 and total_frames > 0 else 0.0
+        shards = sharding.shard_count(shard_workers, duration) if end_seconds is None and not start_seconds else 1
+        if shards > 1:
+            cap.release()
+            ranges = sharding.shard_ranges(duration, shards, sharding.keyframe_times(source))
+            return sharding.run_sharded(
+                source,
+                recording_output_path(record_filename, output_dir, RECORDINGS_DIR),
+                ranges,
+                stats_key=stats_key,
+                frames_expected=max(1, round(duration * min(float(frame_rate), input_fps))),
+                frame_rate=frame_rate,
+                record_bitrate=record_bitrate,
+                enable_recording=enable_recording,
+                stats_interval=stats_interval,
+                log_interval=log_interval,
+                show_fps=show_fps,
+                enable_callback=enable_callback,
+                yolo_path=str(model_path),
+                batch_size=batch_size,
+                decode_queue_depth=decode_queue_depth,
+                encode_queue_depth=encode_queue_depth,
+                backend=backend,
+                keyframe_interval=keyframe_interval,
+                motion_threshold=motion_threshold,
+                imgsz=imgsz,
+            )
+        if start_seconds:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start_seconds * 1000.0)
+
+    live_stats.start(stats_key, "video", backend="cpu", source=str(source), frames_done=0, total_detections=0)
+    live_status = "failed"
+    detection_log = None
+    writer = None
+    temp_output = None
     try:
         ret, frame = cap.read()
         if not ret:
@@ -211,81 +492,186 @@ def yolo_detection_without_yolo(
         )
         temp_output = temporary_recording_path(record_output)
 
-        writer = None
         if enable_recording:
             try:
-                writer = _open_writer(temp_output, target_fps, width, height)
+                writer = _open_writer(temp_output, target_fps, width, height, record_bitrate)
             except RuntimeError:
                 if record_output.suffix.lower() == ".webm":
                     fallback_output = record_output.with_suffix(".mp4")
                     temp_output = temporary_recording_path(fallback_output)
-                    writer = _open_writer(temp_output, target_fps, width, height)
+                    writer = _open_writer(temp_output, target_fps, width, height, record_bitrate)
                     record_output = fallback_output
                 else:
                     raise
 
-        model = YOLO(str(model_path))
-        stats = SimpleStats(stats_interval=stats_interval, log_interval=log_interval)
-
-        frame_index = 0
-        skip = 1
-        if input_fps > 0 and frame_rate:
-            skip = max(1, round(input_fps / frame_rate))
-
-        while True:
-            frame_index += 1
-
-            if skip > 1 and (frame_index % skip != 0):
-                ret, frame = cap.read()
-                if not ret:
-                    if loop_file_source and not live_input:
-                        cap.release()
-                        cap = _open_capture(source)
-                        ret, frame = cap.read()
-                        if not ret:
-                            break
-                    else:
-                        break
-                continue
-
-            results = model.predict(frame, verbose=False)
-            result = results[0]
-            boxes = result.boxes
-            detection_count = len(boxes) if boxes is not None else 0
-            stats.update(detection_count)
-
-            if enable_callback:
-                if stats.should_log_frame():
-                    if boxes is not None and len(boxes):
-                        class_ids = boxes.cls[:3].tolist()
-                        sample = ", ".join(result.names[int(cls_id)] for cls_id in class_ids)
-                    else:
-                        sample = "none"
-                    print(f"[Frame {stats.frame_count}] detections={detection_count} sample={sample}")
-                stats.maybe_print_stats()
+        if writer is not None:
+            # lets the API stream the recording while it is being written
+            live_stats.update(stats_key, recording_path=str(temp_output.resolve()))
+
+        detection_log = DetectionLog(detection_log_path(record_output)) if DETECTION_LOG else None
+
+        model, used_backend = _load_model(model_path, backend)
+        if detection_log is not None:
+            detection_log.class_names = dict(model.names)
+        live_stats.update(stats_key, inference_backend=used_backend)
+        stats = SimpleStats(stats_interval=stats_interval, log_interval=log_interval, live_key=stats_key)
+
+        # frames are picked by timestamp to analyze exactly `frame_rate` frames per second of video
+        sample_fps = min(float(frame_rate), input_fps)
+        looped = loop_file_source and not live_input
+        tuner = _batch_tuner(max_batch_size(used_backend) or batch_size, live_input)
+        keyframes = KeyframeScheduler(keyframe_interval)
+        tracker = FlowTracker(frame.shape) if keyframes.enabled else None
+        gate = MotionGate(MOTION_THRESHOLD if motion_threshold is None else motion_threshold)
+        imgsz = str(IMGSZ if imgsz is None else imgsz).lower()
+        if not supports_input_size(used_backend):
+            imgsz = ""
+        resolution = ResolutionController(sample_fps) if imgsz == "auto" else None
+        predict_args = {"imgsz": int(imgsz)} if imgsz.isdigit() else {}
+        last_detections = None
+        max_batch = tuner.max_size * (keyframes.max_interval if keyframes.auto else keyframes.k)
+        decode_depth = max(decode_queue_depth, max_batch)
+        # enough buffers for every frame the queues, the batch, the writer and the threads can hold
+        pool = FramePool(decode_depth + max_batch + encode_queue_depth + ENCODER_QUEUE_DEPTH + 3, frame.shape)
+        sampler = FrameSampler(
+            cap,
+            frame,
+            sample_fps,
+            input_fps=input_fps,
+            live=live_input,
+            reopen=(lambda: _open_capture(source)) if looped else None,
+            pool=pool,
+            start_time=start_seconds,
+            end_time=end_seconds,
+        )
 
-            annotated = result.plot()
-            if show_fps:
-                _overlay_fps(annotated, stats.average_fps())
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if total_frames > 0 and not live_input and not loop_file_source:
+            duration = min(end_seconds or total_frames / input_fps, total_frames / input_fps) - start_seconds
+            live_stats.update(stats_key, frames_expected=max(1, round(duration * sample_fps)))
 
-            if writer is not None:
-                writer.write(annotated)
+        renderer = OverlayRenderer(model.names, frame.shape)
+        # pixels -> normalized box coordinates of the detection log
+        frame_scale = np.array([width, height, width, height], dtype=np.float32)
 
-            ret, frame = cap.read()
-            if not ret:
-                if loop_file_source and not live_input:
-                    cap.release()
-                    cap = _open_capture(source)
-                    ret, frame = cap.read()
-                    if not ret:
-                        break
-                else:
+        def encode(item):
+            annotated, detections, average_fps = item
+            encode_start = time.perf_counter()
+            # drawn in place on the decoded buffer, then the buffer goes back to the pool
+            renderer.draw(annotated, *detections)
+            if show_fps:
+                _overlay_fps(annotated, average_fps)
+            if isinstance(writer, FfmpegPipeWriter):
+                # piped by the writer thread, the buffer goes back to the pool once written
+                writer.write(annotated, on_written=pool.release)
+            else:
+                writer.write(annotated)
+                pool.release(annotated)
+            stage_seconds.observe(time.perf_counter() - encode_start, stage="encode", engine="yolo-cpu")
+
+        pipeline = DetectionPipeline(
+            sampler.frames(),
+            encode,
+            decode_depth=decode_depth,
+            encode_depth=encode_queue_depth,
+        )
+        pipeline.start()
+        try:
+            while True:
+                # with keyframes, a batch holds about `tuner.size` frames that go through the model
+                # (live input is not held back waiting for K frames)
+                batch = pipeline.next_batch(tuner.size if live_input else tuner.size * keyframes.k)
+                if not batch:
                     break
 
+                if resolution is not None:
+                    predict_args["imgsz"] = resolution.size
+                batch_start = time.perf_counter()
+                with pipeline.infer_timer.working(len(batch)):
+                    plan = keyframes.plan(len(batch))
+                    # keyframes of a scene that did not change keep the previous detections
+                    infer = [is_keyframe and gate.should_infer(annotated) for annotated, is_keyframe in zip(batch, plan)]
+                    key_batch = [annotated for annotated, run in zip(batch, infer) if run]
+                    results = iter(())
+                    if key_batch:
+                        inference_start = time.perf_counter()
+                        results = iter(model.predict(key_batch, verbose=False, **predict_args))
+                        inference_time = time.perf_counter() - inference_start
+                        tuner.record(len(key_batch), inference_time)
+                        for _ in key_batch:
+                            stage_seconds.observe(inference_time / len(key_batch), stage="inference", engine="yolo-cpu")
+
+                    batch_detections = []
+                    for annotated, is_keyframe, run in zip(batch, plan, infer):
+                        track_ids = None
+                        if run:
+                            detections = detections_of(next(results))
+                            if tracker is not None:
+                                keyframes.record(tracker.reset(annotated, *detections))
+                                track_ids = tracker.track_ids
+                        elif is_keyframe or tracker is None:
+                            detections, track_ids = last_detections
+                        else:
+                            *detections, track_ids = tracker.update(annotated)
+                        last_detections = (detections, track_ids)
+                        xyxy, class_ids, confidences = detections
+                        detection_count = len(class_ids)
+                        stats.update(detection_count)
+                        batch_detections.append(detections)
+                        timestamp = sampler.timestamps.popleft()
+                        if detection_log is not None:
+                            detection_log.append(
+                                stats.frame_count, timestamp, xyxy / frame_scale, class_ids, confidences, track_ids
+                            )
+
+                        if enable_callback:
+                            if stats.should_log_frame():
+                                if detection_count:
+                                    sample = ", ".join(model.names[int(cls_id)] for cls_id in class_ids[:3])
+                                else:
+                                    sample = "none"
+                                print(f"[Frame {stats.frame_count}] detections={detection_count} sample={sample}")
+                            stats.maybe_print_stats()
+
+                if gate.enabled:
+                    live_stats.update(stats_key, frames_skipped=gate.frames_skipped)
+                # sizes are only compared once the batch size is settled
+                if resolution is not None and tuner.settled:
+                    if resolution.record(len(batch), time.perf_counter() - batch_start):
+                        live_stats.update(stats_key, imgsz=resolution.size)
+
+                for annotated, detections in zip(batch, batch_detections):
+                    if writer is not None:
+                        pipeline.submit((annotated, detections, stats.average_fps()))
+                    else:
+                        pool.release(annotated)
+            pipeline.finish()
+        finally:
+            pipeline.stop()
+        stats.extras["inference_backend"] = used_backend
+        stats.extras["batch_size"] = tuner.size
+        if keyframes.enabled:
+            stats.extras["keyframes"] = keyframes.report()
+        if gate.enabled:
+            stats.extras["motion_gate"] = gate.report()
+        if resolution is not None:
+            stats.extras["resolution"] = resolution.report()
+        elif "imgsz" in predict_args:
+            stats.extras["resolution"] = {"mode": "fixed", "final_imgsz": predict_args["imgsz"]}
+        stats.extras["pipeline"] = pipeline.utilization()
+        stats.extras["sampling"] = sampler.report()
+        stats.extras["frame_buffers"] = {"allocated": pool.size, "pool_misses": pool.misses}
+
         if writer is not None:
+            encode_start = time.perf_counter()
             writer.release()
+            stage_seconds.observe(time.perf_counter() - encode_start, stage="encode_finalize", engine="yolo-cpu")
+            if isinstance(writer, FfmpegPipeWriter):
+                stats.extras["encoder"] = writer.stats()
             temp_output.replace(record_output)
 
+        if detection_log is not None:
+            stats.extras["detection_log"] = detection_log.close()
         _write_summary_json(stats, record_output)
         stats_summary = stats.to_summary_dict()
         print("\n== Session summary ==")
@@ -296,9 +682,21 @@ def yolo_detection_without_yolo(
         if enable_recording:
             print(f"Recorded video: {record_output}")
 
+        live_status = "done"
         return record_output, stats_summary
     finally:
         cap.release()
+        if writer is not None and live_status != "done":
+            # failed run: don't leave the encoder process or a partial recording behind
+            if isinstance(writer, FfmpegPipeWriter):
+                writer.abort()
+            else:
+                writer.release()
+            temp_output.unlink(missing_ok=True)
+        if detection_log is not None:
+            # keep what was logged before a failure
+            detection_log.close()
+        live_stats.finish(stats_key, status=live_status)
 
 
 if __name__ == "__main__":
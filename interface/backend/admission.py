@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+from typing import Callable
+import logging
+import os
+import threading
+import time
+
+import psutil
+
+from monitoring.memory_monitoring import get_memory_info
+from monitoring.metrics import registry as metrics
+from monitoring.temperature_monitoring import get_cpu_temp
+
+# The Pi 5 firmware starts throttling the SoC at 80 °C (85 °C hard limit).
+TEMP_DEGRADE_C = float(os.environ.get("ADMISSION_TEMP_DEGRADE_C", "72"))
+TEMP_DEFER_C = float(os.environ.get("ADMISSION_TEMP_DEFER_C", "78"))
+RAM_DEGRADE_PERCENT = float(os.environ.get("ADMISSION_RAM_DEGRADE_PERCENT", "75"))
+RAM_DEFER_PERCENT = float(os.environ.get("ADMISSION_RAM_DEFER_PERCENT", "90"))
+# Pages moving to and from swap mean the working set no longer fits in RAM (MB/s, in + out).
+# Swap usage alone says little: idle pages sit in swap (zram on the Pi) for hours.
+SWAP_DEFER_MB_S = float(os.environ.get("ADMISSION_SWAP_DEFER_MB_S", "2"))
+# how long a queued job waits for the device to cool down / free memory before running degraded anyway
+MAX_WAIT_SECONDS = float(os.environ.get("ADMISSION_MAX_WAIT_SECONDS", "120"))
+# Retry-After sent when a new job is refused
+RETRY_AFTER_SECONDS = int(os.environ.get("ADMISSION_RETRY_AFTER_SECONDS", "30"))
+# readings are reused for this long (reading sysfs sensors is not free)
+READ_INTERVAL = 2.0
+WAIT_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+RUN = "run"
+DEGRADE = "degrade"
+DEFER = "defer"
+
+# next smaller Whisper model (".en" variants follow the same ladder)
+WHISPER_DOWNGRADE = {
+    "turbo": "small",
+    "large": "medium",
+    "large-v1": "medium",
+    "large-v2": "medium",
+    "large-v3": "medium",
+    "medium": "small",
+    "small": "base",
+    "base": "tiny",
+}
+
+admission_decisions = metrics.counter(
+    "pi2025_admission_decisions", "Admission decisions taken for analysis jobs.", ("kind", "action")
+)
+
+
+def swapped_bytes() -> int | None:
+    """Bytes swapped in and out since boot."""
+    try:
+        swap = psutil.swap_memory()
+    except (OSError, RuntimeError):
+        return None
+    return swap.sin + swap.sout
+
+
+def smaller_whisper_model(name: str) -> str | None:
+    base, english = (name[:-3], True) if name.endswith(".en") else (name, False)
+    smaller = WHISPER_DOWNGRADE.get(base)
+    if smaller is None:
+        return None
+    return f"{smaller}.en" if english and smaller in ("tiny", "base", "small", "medium") else smaller
+
+
+def degraded_params(kind: str, params: dict) -> tuple[dict, list[str]]:
+    """Cheaper parameters for a job: half the analyzed frame rate, or the next smaller Whisper model."""
+    params = dict(params)
+    changes = []
+    if kind == "video" and params.get("fps", 0) > 1:
+        fps = max(1, params["fps"] // 2)
+        changes.append(f"fps {params['fps']} -> {fps}")
+        params["fps"] = fps
+    elif kind == "audio":
+        smaller = smaller_whisper_model(params.get("model", "base"))
+        if smaller is not None:
+            changes.append(f"model {params['model']} -> {smaller}")
+            params["model"] = smaller
+    return params, changes
+
+
+class AdmissionController:
+    """
+    Decides from the live CPU temperature, RAM usage and swap activity whether a job runs as
+    requested, runs with cheaper parameters (degrade) or has to wait (defer).
+    New submissions are refused while the device is in the defer zone, queued jobs
+    wait for it to leave that zone (up to `max_wait`) when they reach a worker.
+    """
+
+    def __init__(
+        self,
+        *,
+        read_temperature: Callable[[], float | None] = get_cpu_temp,
+        read_memory: Callable[[], dict] = get_memory_info,
+        read_swapped: Callable[[], int | None] = swapped_bytes,
+        max_wait: float = MAX_WAIT_SECONDS,
+    ):
+        self.read_temperature = read_temperature
+        self.read_memory = read_memory
+        self.read_swapped = read_swapped
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._readings: dict | None = None
+        self._read_at = 0.0
+        # (time, swapped bytes) of the previous reading
+        self._swapped: tuple[float, int] | None = None
+
+    def readings(self) -> dict:
+        with self._lock:
+            if self._readings is None or time.monotonic() - self._read_at > READ_INTERVAL:
+                memory = self.read_memory()
+                now = time.monotonic()
+                swapped = self.read_swapped()
+                swap_rate = None
+                if swapped is not None and self._swapped is not None and now > self._swapped[0]:
+                    # averaged since the previous reading
+                    swap_rate = round((swapped - self._swapped[1]) / (now - self._swapped[0]) / 2**20, 2)
+                self._swapped = (now, swapped) if swapped is not None else None
+                self._readings = {
+                    "cpu_temperature_c": self.read_temperature(),
+                    "ram_percent_used": memory.get("ram_percent_used"),
+                    "swap_percent_used": memory.get("swap_percent_used"),
+                    "swap_io_mb_s": swap_rate,
+                }
+                self._read_at = now
+            return dict(self._readings)
+
+    def evaluate(self, kind: str, params: dict) -> dict:
+        """Decision for a job right now: action, reasons, readings and the parameters to run with."""
+        readings = self.readings()
+        temperature = readings["cpu_temperature_c"]
+        ram = readings["ram_percent_used"]
+        swap_rate = readings["swap_io_mb_s"]
+
+        defer_reasons = []
+        if temperature is not None and temperature >= TEMP_DEFER_C:
+            defer_reasons.append(f"cpu temperature {temperature} °C >= {TEMP_DEFER_C} °C")
+        if ram is not None and ram >= RAM_DEFER_PERCENT:
+            defer_reasons.append(f"ram {ram} % >= {RAM_DEFER_PERCENT} %")
+        if swap_rate is not None and swap_rate >= SWAP_DEFER_MB_S:
+            defer_reasons.append(f"swapping {swap_rate} MB/s >= {SWAP_DEFER_MB_S} MB/s")
+
+        degrade_reasons = []
+        if temperature is not None and temperature >= TEMP_DEGRADE_C:
+            degrade_reasons.append(f"cpu temperature {temperature} °C >= {TEMP_DEGRADE_C} °C")
+        if ram is not None and ram >= RAM_DEGRADE_PERCENT:
+            degrade_reasons.append(f"ram {ram} % >= {RAM_DEGRADE_PERCENT} %")
+
+        if defer_reasons:
+            action, reasons = DEFER, defer_reasons
+        elif degrade_reasons:
+            action, reasons = DEGRADE, degrade_reasons
+        else:
+            action, reasons = RUN, []
+        return {"action": action, "reasons": reasons, "readings": readings, "params": params}
+
+    def admit(self, kind: str, params: dict) -> dict:
+        """
+        Called by a worker before running a job: wait while the device is in the defer zone,
+        then return the decision with the (possibly degraded) parameters to use.
+        """
+        start = time.monotonic()
+        decision = self.evaluate(kind, params)
+        while decision["action"] == DEFER and time.monotonic() - start < self.max_wait:
+            logger.info("Deferring %s job: %s", kind, ", ".join(decision["reasons"]))
+            time.sleep(WAIT_INTERVAL)
+            decision = self.evaluate(kind, params)
+
+        waited = time.monotonic() - start
+        if decision["action"] != RUN:
+            # still hot after waiting: run, but cheaper
+            decision["params"], decision["changes"] = degraded_params(kind, params)
+            decision["action"] = DEGRADE if decision["changes"] else RUN
+        decision["waited_seconds"] = round(waited, 3)
+        decision["requested_params"] = params
+        admission_decisions.inc(kind=kind, action=decision["action"])
+        return decision
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import importlib
+import logging
+import os
+import threading
+
+from interface.backend.startup_profile import profiler
+
+# Import heavy engines in a background thread right after startup (set to 0 to load on first use).
+WARMUP = os.environ.get("BACKEND_WARMUP", "1") != "0"
+
+
+class LazyEngine:
+    """
+    Analysis function imported on first use: the modules behind it pull in
+    torch / ultralytics / GStreamer, which cost seconds at import time.
+    """
+
+    def __init__(self, module: str, attribute: str):
+        self.module = module
+        self.attribute = attribute
+        self._function = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._function is not None
+
+    def load(self):
+        if self._function is None:
+            with self._lock:
+                if self._function is None:
+                    with profiler.measure(self.module):
+                        module = importlib.import_module(self.module)
+                    self._function = getattr(module, self.attribute)
+        return self._function
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+transcribe = LazyEngine("models.speech_to_text.transcription", "transcribe")
+yolo_detection_without_yolo = LazyEngine(
+    "interface.backend.AI.yolo_detection_without_yolo", "yolo_detection_without_yolo"
+)
+yolo_detection = LazyEngine("interface.backend.AI.yolo_detection", "yolo_detection")
+frame_annotator = LazyEngine("interface.backend.AI.yolo_detection_without_yolo", "frame_annotator")
+
+
+def warm_up(hailo_present) -> threading.Thread:
+    """Import the engines in a daemon thread so the API is served meanwhile."""
+
+    def run():
+        engines = [transcribe, yolo_detection_without_yolo]
+        with profiler.measure("hailo_presence_probe"):
+            if hailo_present():
+                engines.append(yolo_detection)
+        for engine in engines:
+            try:
+                engine.load()
+            except Exception:
+                logging.exception("Warm-up import of %s failed", engine.module)
+        profiler.mark("warmup_done")
+
+    thread = threading.Thread(target=run, name="engine-warmup", daemon=True)
+    thread.start()
+    return thread
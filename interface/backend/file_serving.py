@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from email.utils import formatdate
+from pathlib import Path
+from typing import Callable
+import asyncio
+import mimetypes
+import os
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+
+CHUNK_SIZE = 256 * 1024
+# how often a file that is still being recorded is checked for new data (seconds)
+FOLLOW_INTERVAL = 0.5
+
+
+class RangeNotSatisfiable(ValueError):
+    """Raised for a Range header that does not overlap the file."""
+
+
+def file_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single `bytes=` range into inclusive (start, end) offsets.
+    Return None when the whole file should be sent (no header, or several ranges).
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes="):].strip()
+    if "," in spec:
+        return None
+    first, _, last = spec.partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            # suffix range: the last N bytes
+            length = int(last)
+            if length == 0:
+                raise RangeNotSatisfiable(header)
+            start = max(0, size - length)
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        raise RangeNotSatisfiable(header)
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """
+    Send `count` bytes of a file from `offset`, read in bounded chunks in a worker thread.
+    (uvicorn does not offer the ASGI zero-copy extension, so there is no sendfile path.)
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        offset: int,
+        count: int,
+        *,
+        status_code: int = 200,
+        headers: dict | None = None,
+        media_type: str | None = None,
+    ):
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.status_code = status_code
+        self.media_type = media_type
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(count)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD" or self.count == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await run_in_threadpool(f.read, min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # file was truncated while sending
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def final_recording_path(path: Path) -> Path | None:
+    """
+    Name a recording in progress is renamed to once complete:
+    `<stem>.tmp.<ext>` (CPU detector) or `<name>.part` (Hailo pipeline). None for other files.
+    """
+    if path.suffix == ".part":
+        return path.with_name(path.stem)
+    if Path(path.stem).suffix == ".tmp":
+        return path.with_name(Path(path.stem).stem + path.suffix)
+    return None
+
+
+def _renamed_to_final(f, path: Path) -> bool:
+    """True once the recording open as `f` was renamed to its final name (the writer is done)."""
+    final = final_recording_path(path)
+    if final is None or path.exists():
+        return False
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(final))
+    except FileNotFoundError:
+        return False
+
+
+async def follow_file(path: Path, is_growing: Callable[[], bool]):
+    """
+    Yield a file's content while it is written, until the writer is done and EOF is reached.
+    The open file keeps being read after the recording is renamed to its final name,
+    which also ends the stream without waiting for the run to be reported finished.
+    """
+    with open(path, "rb") as f:
+        while True:
+            chunk = await run_in_threadpool(f.read, CHUNK_SIZE)
+            if chunk:
+                yield chunk
+                continue
+            if not is_growing() or _renamed_to_final(f, path):
+                # the writer may have flushed a last part before finishing
+                chunk = await run_in_threadpool(f.read)
+                if chunk:
+                    yield chunk
+                return
+            await asyncio.sleep(FOLLOW_INTERVAL)
+
+
+def serve_file(request: Request, path: Path, is_growing: Callable[[], bool] | None = None) -> Response:
+    """
+    Serve a file with ETag/304 and single-range (206) support.
+    A file that is still being recorded is streamed as it grows, without a length.
+    """
+    # recordings in progress: `<stem>.tmp.<ext>` (CPU detector) is typed by its extension,
+    # `<name>.part` (Hailo pipeline) after the final file
+    media_type = mimetypes.guess_type(path.name.removesuffix(".part"))[0] or "application/octet-stream"
+    if is_growing is not None and is_growing():
+        return StreamingResponse(
+            follow_file(path, is_growing),
+            media_type=media_type,
+            headers={"Cache-Control": "no-store", "Accept-Ranges": "none"},
+        )
+
+    stat = os.stat(path)
+    etag = file_etag(stat)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), stat.st_size)
+        except RangeNotSatisfiable:
+            headers["Content-Range"] = f"bytes */{stat.st_size}"
+            return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        return FileRangeResponse(path, 0, stat.st_size, headers=headers, media_type=media_type)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+    return FileRangeResponse(
+        path,
+        start,
+        end - start + 1,
+        status_code=206,
+        headers=headers,
+        media_type=media_type,
+    )
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+import datetime
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+import time
+import uuid
+
+from monitoring.metrics import jobs_finished, stage_seconds
+
+JOBS_DIR = Path(os.environ.get("JOBS_DIR", "interface/backend/jobs"))
+# Heavy jobs share the CPU / Hailo device, so only a few may run at the same time.
+MAX_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))
+MAX_QUEUED = int(os.environ.get("JOB_QUEUE_SIZE", "8"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is already full."""
+
+
+class Job:
+    def __init__(
+        self,
+        kind: str,
+        params: dict,
+        inputs: list[dict] | None = None,
+        job_id: str | None = None,
+        key: str | None = None,
+    ):
+        self.id = job_id or uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        # staged files of the job: [{"path": ..., "sha256": ...}, ...]
+        self.inputs = inputs or []
+        # identifies identical work (content + parameters), used to coalesce duplicates
+        self.key = key
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = datetime.datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "inputs": self.inputs,
+            "key": self.key,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Job":
+        job = cls(
+            data["kind"],
+            data.get("params", {}),
+            data.get("inputs"),
+            data["job_id"],
+            data.get("key"),
+        )
+        job.status = data.get("status", QUEUED)
+        job.result = data.get("result")
+        job.error = data.get("error")
+        job.created_at = data.get("created_at", job.created_at)
+        job.started_at = data.get("started_at")
+        job.finished_at = data.get("finished_at")
+        return job
+
+
+class JobManager:
+    """
+    Bounded worker pool draining a persistent job queue.
+    Every state change is written to `<jobs_dir>/<job_id>.json`, so queued jobs
+    survive a backend restart as long as their staged input still exists.
+    """
+
+    def __init__(
+        self,
+        handlers: dict[str, Callable[[Job], dict]],
+        *,
+        jobs_dir: str | Path = JOBS_DIR,
+        max_workers: int = MAX_WORKERS,
+        max_queued: int = MAX_QUEUED,
+    ):
+        self.handlers = handlers
+        self.jobs_dir = Path(jobs_dir)
+        self.max_workers = max(1, max_workers)
+        self.max_queued = max(1, max_queued)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queued)
+        self._jobs: dict[str, Job] = {}
+        # key -> id of the queued or running job doing that work
+        self._inflight: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+        self._stop_event = threading.Event()
+
+    def start(self):
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        self._restore()
+        self._stop_event.clear()
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self._worker, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None):
+        """
+        Stop the workers after their current job; queued jobs stay on disk.
+        `timeout` bounds the whole shutdown, not each worker.
+        """
+        self._stop_event.set()
+        for _ in self._threads:
+            try:
+                # wakes up an idle worker; with a full queue, workers see the stop event after their job
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+        self._threads.clear()
+
+    def submit(self, kind: str, params: dict, inputs: list[dict] | None = None, key: str | None = None) -> Job:
+        """Queue a job, or return the queued/running job that already has the same key."""
+        job, _ = self.submit_or_attach(kind, params, inputs, key)
+        return job
+
+    def submit_or_attach(
+        self,
+        kind: str,
+        params: dict,
+        inputs: list[dict] | None = None,
+        key: str | None = None,
+    ) -> tuple[Job, bool]:
+        """Like `submit`, also telling whether an in-flight job was reused."""
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            if key is not None and key in self._inflight:
+                return self._jobs[self._inflight[key]], True
+            job = Job(kind, params, inputs, key=key)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise QueueFullError(
+                    f"Job queue is full ({self.max_queued} jobs waiting), retry later."
+                ) from None
+            self._jobs[job.id] = job
+            if key is not None:
+                self._inflight[key] = job.id
+            self._save(job)
+        return job, False
+
+    def add_done(self, kind: str, params: dict, result: dict, inputs: list[dict] | None = None, key: str | None = None) -> Job:
+        """Record a job answered without running (from the result cache), so it is looked up like any other."""
+        job = Job(kind, params, inputs, key=key)
+        job.status = DONE
+        job.result = result
+        job.started_at = job.finished_at = job.created_at
+        with self._lock:
+            self.jobs_dir.mkdir(parents=True, exist_ok=True)
+            self._save(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            job = self._load(job_id)
+        return job
+
+    def active_ids(self) -> set[str]:
+        """Ids of the queued and running jobs."""
+        with self._lock:
+            return set(self._jobs)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def running_count(self) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if job.status == RUNNING)
+
+    def _worker(self):
+        while not self._stop_event.is_set():
+            job = self._queue.get()
+            if job is None:
+                break
+            self._run(job)
+
+    def _run(self, job: Job):
+        with self._lock:
+            job.status = RUNNING
+            started = datetime.datetime.now()
+            job.started_at = started.isoformat()
+            self._save(job)
+        queue_wait = (started - datetime.datetime.fromisoformat(job.created_at)).total_seconds()
+        stage_seconds.observe(max(0.0, queue_wait), stage="queue_wait", engine=job.kind)
+        try:
+            result = self.handlers[job.kind](job)
+        except Exception as exc:
+            logging.exception("Job %s (%s) failed", job.id, job.kind)
+            with self._lock:
+                job.status = FAILED
+                job.error = str(exc) or exc.__class__.__name__
+        else:
+            with self._lock:
+                job.status = DONE
+                job.result = result
+        with self._lock:
+            job.finished_at = datetime.datetime.now().isoformat()
+            self._save(job)
+            jobs_finished.inc(kind=job.kind, status=job.status)
+            # finished jobs are served from disk, keep only active ones in memory
+            self._jobs.pop(job.id, None)
+            if job.key is not None and self._inflight.get(job.key) == job.id:
+                del self._inflight[job.key]
+
+    def _job_file(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _save(self, job: Job):
+        # same atomic replace as save_cur_stats_json: readers never see a partial file
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=self.jobs_dir, delete=False) as tf:
+                json.dump(job.to_dict(), tf, indent=4)
+                tmpname = tf.name
+            os.replace(tmpname, self._job_file(job.id))
+        except Exception:
+            logging.exception("Failed to persist job %s", job.id)
+
+    def _load(self, job_id: str) -> Job | None:
+        # job ids are uuid hex strings, refuse anything that could escape jobs_dir
+        if not job_id.isalnum():
+            return None
+        try:
+            with open(self._job_file(job_id), "r") as f:
+                return Job.from_dict(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            return None
+
+    def _restore(self):
+        """Re-queue jobs that were queued or interrupted by the last shutdown."""
+        pending = []
+        for path in self.jobs_dir.glob("*.json"):
+            job = self._load(path.stem)
+            if job is not None and job.status in (QUEUED, RUNNING):
+                pending.append(job)
+        pending.sort(key=lambda job: job.created_at)
+
+        for job in pending:
+            if not all(os.path.exists(item["path"]) for item in job.inputs):
+                job.status = FAILED
+                job.error = "Input file was lost during a backend restart."
+                job.finished_at = datetime.datetime.now().isoformat()
+                self._save(job)
+                continue
+            job.status = QUEUED
+            job.started_at = None
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                job.status = FAILED
+                job.error = "Job queue was full when restoring jobs after a restart."
+                job.finished_at = datetime.datetime.now().isoformat()
+            else:
+                self._jobs[job.id] = job
+                if job.key is not None:
+                    self._inflight.setdefault(job.key, job.id)
+            self._save(job)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+from typing import Callable
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from monitoring.live_stats import registry as live_stats
+
+# Camera index (e.g. "0") or path of a video file, which is looped (stands in for the webcam).
+LIVE_SOURCE = os.environ.get("LIVE_SOURCE", "0")
+# Frames analyzed per second by the shared loop.
+LIVE_FPS = float(os.environ.get("LIVE_FPS", "15"))
+LIVE_JPEG_QUALITY = int(os.environ.get("LIVE_JPEG_QUALITY", "80"))
+# The loop keeps running this long after the last viewer left, so a page reload doesn't reopen the camera.
+LIVE_IDLE_SECONDS = float(os.environ.get("LIVE_IDLE_SECONDS", "10"))
+
+MJPEG_BOUNDARY = "frame"
+
+
+def parse_source(source: str | int) -> str | int:
+    """Camera indexes are given as digits, anything else is a file path or URL."""
+    if isinstance(source, str) and source.isdigit():
+        return int(source)
+    return source
+
+
+class LiveCamera:
+    """
+    One capture + inference loop shared by every viewer of the live stream.
+    Each annotated frame is JPEG-encoded once and handed to all connected viewers,
+    so a new viewer costs no extra decode, inference or encode.
+    The loop starts with the first viewer and stops once nobody watched for `idle_seconds`.
+    `annotate(frame) -> (annotated_frame, detection_count)` is loaded lazily on the loop thread.
+    """
+
+    def __init__(
+        self,
+        annotate_factory: Callable[[], Callable],
+        source: str | int = LIVE_SOURCE,
+        *,
+        fps: float = LIVE_FPS,
+        jpeg_quality: int = LIVE_JPEG_QUALITY,
+        idle_seconds: float = LIVE_IDLE_SECONDS,
+        stats_key: str = "live",
+    ):
+        self.annotate_factory = annotate_factory
+        self.source = parse_source(source)
+        self.fps = max(0.1, fps)
+        self.jpeg_quality = jpeg_quality
+        self.idle_seconds = idle_seconds
+        self.stats_key = stats_key
+        self._lock = threading.Lock()
+        self._viewers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._last_viewer_left = 0.0
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+        self._frame: bytes | None = None
+        self.error: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def viewer_count(self) -> int:
+        with self._lock:
+            return len(self._viewers)
+
+    def stop(self, timeout: float | None = None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _ensure_running(self):
+        # called with the lock held
+        if not self.running:
+            self._stop_event.clear()
+            self.error = None
+            self._thread = threading.Thread(target=self._run, name="live-camera", daemon=True)
+            self._thread.start()
+
+    async def frames(self):
+        """Yield JPEG frames as the shared loop produces them; a slow viewer skips frames."""
+        updates: asyncio.Queue = asyncio.Queue(maxsize=1)
+        with self._lock:
+            self._viewers[updates] = asyncio.get_running_loop()
+            self._ensure_running()
+            latest = self._frame
+        live_stats.update(self.stats_key, viewers=self.viewer_count())
+        try:
+            if latest is not None:
+                yield latest
+            while True:
+                frame = await updates.get()
+                if frame is None:
+                    # the loop stopped (end of source or error)
+                    return
+                yield frame
+        finally:
+            with self._lock:
+                self._viewers.pop(updates, None)
+                if not self._viewers:
+                    self._last_viewer_left = time.monotonic()
+            live_stats.update(self.stats_key, viewers=self.viewer_count())
+
+    @staticmethod
+    def _put_latest(updates: asyncio.Queue, frame: bytes | None):
+        # runs on the viewer's event loop: keep only the newest frame
+        if updates.full():
+            updates.get_nowait()
+        updates.put_nowait(frame)
+
+    def _publish(self, frame: bytes | None):
+        with self._lock:
+            self._frame = frame
+            viewers = list(self._viewers.items())
+        for updates, loop in viewers:
+            try:
+                loop.call_soon_threadsafe(self._put_latest, updates, frame)
+            except RuntimeError:
+                # event loop already closed
+                pass
+
+    def _should_stop(self) -> bool:
+        if self._stop_event.is_set():
+            return True
+        with self._lock:
+            # the loop stays attached until its cleanup is done, see the end of _run
+            return not self._viewers and time.monotonic() - self._last_viewer_left > self.idle_seconds
+
+    def _open(self):
+        import cv2
+
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            raise RuntimeError(f"Unable to open live source: {self.source}")
+        if isinstance(self.source, int):
+            # only the newest camera frame matters
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _run(self):
+        # OpenCV is imported by the loop thread, not at API startup
+        import cv2
+
+        live_stats.start(
+            self.stats_key, "live", backend="cpu", source=str(self.source),
+            frames_done=0, total_detections=0, viewers=self.viewer_count(),
+        )
+        status = "failed"
+        cap = None
+        frames_done = 0
+        total_detections = 0
+        peak = 0
+        try:
+            annotate = self.annotate_factory()
+            cap = self._open()
+            is_file = not isinstance(self.source, int)
+            source_fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+            # file sources are read faster than real time: drop frames to match the live rate
+            skip = max(1, round(source_fps / self.fps)) if is_file else 1
+            interval = 1.0 / self.fps
+            encode_params = [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality]
+            next_frame_time = time.monotonic()
+
+            while not self._should_stop():
+                for _ in range(skip - 1):
+                    cap.grab()
+                ret, frame = cap.read()
+                if not ret:
+                    if not is_file:
+                        raise RuntimeError("Failed to read from live source.")
+                    # loop the file
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = cap.read()
+                    if not ret:
+                        raise RuntimeError("Failed to read from live source.")
+
+                annotated, detection_count = annotate(frame)
+                ok, jpeg = cv2.imencode(".jpg", annotated, encode_params)
+                if ok:
+                    self._publish(jpeg.tobytes())
+
+                frames_done += 1
+                total_detections += detection_count
+                peak = max(peak, detection_count)
+                live_stats.report_frames(self.stats_key, frames_done, total_detections, peak)
+
+                if is_file:
+                    next_frame_time += interval
+                    delay = next_frame_time - time.monotonic()
+                    if delay > 0:
+                        time.sleep(delay)
+                    else:
+                        # inference slower than the target rate: don't try to catch up
+                        next_frame_time = time.monotonic()
+            status = "done"
+        except Exception as exc:
+            logging.exception("Live camera loop failed")
+            self.error = str(exc)
+        finally:
+            if cap is not None:
+                cap.release()
+            # finished before the next run starts on the same stats key
+            live_stats.finish(self.stats_key, status=status, error=self.error)
+            with self._lock:
+                # a restarted loop must not show this run's last frame first
+                self._frame = None
+                current = self._thread is threading.current_thread()
+                restart = current and status == "done" and bool(self._viewers) and not self._stop_event.is_set()
+                if current:
+                    self._thread = None
+                if restart:
+                    # a viewer arrived while this loop was shutting down
+                    self._ensure_running()
+            if current and not restart:
+                # wake up the viewers so their responses end
+                self._publish(None)
+
+
+async def mjpeg_stream(camera: LiveCamera):
+    """multipart/x-mixed-replace body of JPEG frames (MJPEG), playable by an <img> tag."""
+    async for jpeg in camera.frames():
+        yield (
+            f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+            + jpeg
+            + b"\r\n"
+        )
@@ -1,17 +1,185 @@
+# imported first: the startup profile is measured from here
+from interface.backend.startup_profile import profiler
 from typing import Annotated
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, File, UploadFile, Form
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.concurrency import run_in_threadpool
-from models.speech_to_text.transcription import transcribe
+from pathlib import Path
+with profiler.measure("fastapi"):
+    from fastapi import FastAPI, File, UploadFile, Form, Request
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.middleware.cors import CORSMiddleware
+    from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
+import time
 import json
+import logging
 import subprocess
+# whisper/torch, ultralytics and GStreamer/hailo are only imported on first use or by the warm-up thread
+from interface.backend import engines
+from interface.backend.admission import DEFER, RETRY_AFTER_SECONDS, AdmissionController, admission_decisions
+from interface.backend.engines import transcribe, yolo_detection, yolo_detection_without_yolo
+from interface.backend.file_serving import final_recording_path, serve_file
+from interface.backend.jobs import QUEUED, RUNNING, Job, JobManager, QueueFullError
+from interface.backend.live_camera import MJPEG_BOUNDARY, LiveCamera, mjpeg_stream
+from interface.backend.monitoring_feed import MonitoringFeed
+from interface.backend.result_cache import ResultCache, result_key
+from interface.backend.retention import RetentionManager
+from interface.backend.uploads import StagedUpload, discard_staged, stage_upload
 from monitoring.detect_hailo import is_hailo_hat_present
-if is_hailo_hat_present():
-    from interface.backend.AI.yolo_detection import yolo_detection
-from interface.backend.AI.yolo_detection_without_yolo import yolo_detection_without_yolo
+from monitoring.live_stats import registry as live_stats
+from monitoring.metrics import registry as metrics, stage_seconds
+profiler.mark("main_imported")
+
+OUTPUTS_DIR = Path("interface/backend/outputs")
+OUTPUTS_URL = "http://127.0.0.1:8000/outputs"
+RESULT_CACHE_DIR = OUTPUTS_DIR / ".cache"
+# files analyzed at the same time on CPU backends, across all jobs
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", max(1, (os.cpu_count() or 1) // 2)))
+# how often Server-Sent Events streams check the live stats registry for changes (seconds)
+SSE_POLL_INTERVAL = 0.5
+
+
+def output_url(path: str | Path) -> str:
+    """Public URL of a file under the outputs directory."""
+    return f"{OUTPUTS_URL}/{Path(path).resolve().relative_to(OUTPUTS_DIR.resolve()).as_posix()}"
+
+
+def run_video_file(job: Job, index: int, input_path: str, params: dict) -> dict:
+    """Run YOLO (with or without the Hailo HAT) on one staged video of a job."""
+    name = os.path.basename(input_path)
+    stem = os.path.splitext(name)[0]
+    output_dir = OUTPUTS_DIR / job.id / f"file-{index}"
+    record_filename = f"yolo-{name}"
+
+    if params["isHat"]:
+        if not is_hailo_hat_present():
+            raise RuntimeError("Hailo HAT requested but not detected.")
+        recorded_path, stats = yolo_detection(
+            live_input=False,
+            video_path=input_path,
+            frame_rate=params["fps"],
+            output_dir=output_dir / f"yolo-hat-{stem}",
+            record_filename=record_filename,
+            hef_path="interface/backend/AI/yolov11n.hef",
+            stats_key=f"{job.id}/{index}",
+        )
+    else:
+        recorded_path, stats = yolo_detection_without_yolo(
+            live_input=False,
+            video_path=input_path,
+            frame_rate=params["fps"],
+            output_dir=output_dir / f"yolo-no_hat-{stem}",
+            record_filename=record_filename,
+            yolo_path="interface/backend/AI/yolov11n.pt",
+            stats_key=f"{job.id}/{index}",
+        )
+
+    if not isinstance(stats, dict):
+        stats = stats.to_summary_dict()
+    return {"video": output_url(recorded_path), "recording_path": str(recorded_path), "stats": stats}
+
+
+def run_audio_file(job: Job, index: int, input_path: str, params: dict) -> dict:
+    """Run Whisper on one staged audio of a job."""
+    audio_result, stats = transcribe(
+        input_path,
+        model_name=params["model"],
+        output_dir=str(OUTPUTS_DIR / job.id / f"file-{index}" / "stt"),
+        stats_key=f"{job.id}/{index}",
+    )
+    return {"text": audio_result, "stats": stats}
+
+
+def batch_result(kind: str, file_results: list[dict], wall_time: float) -> dict:
+    """
+    Per-file results plus aggregate throughput.
+    The first file's result is also copied at the top level (single-file response format).
+    """
+    aggregate = {
+        "files_processed": len(file_results),
+        "files_from_cache": sum(1 for item in file_results if item.get("cached")),
+        "wall_time_seconds": round(wall_time, 3),
+        "files_per_second": round(len(file_results) / wall_time, 3) if wall_time > 0 else 0.0,
+    }
+    if kind == "video":
+        frames = sum(item["stats"].get("frames_processed", 0) for item in file_results)
+        aggregate["frames_processed"] = frames
+        aggregate["frames_per_second"] = round(frames / wall_time, 2) if wall_time > 0 else 0.0
+        aggregate["total_detections"] = sum(item["stats"].get("total_detections", 0) for item in file_results)
+    return {**file_results[0], "files": file_results, "aggregate": aggregate}
+
+
+def run_batch(job: Job, run_file) -> dict:
+    """
+    Process every file of a job with a bounded number of files in flight.
+    The admission controller may first hold the job while the device is too hot or short
+    on memory, and lower its parameters; results are cached under the parameters actually used.
+    """
+    start = time.perf_counter()
+    try:
+        decision = admission.admit(job.kind, job.params)
+    except Exception:
+        logging.exception("Admission check failed, running job %s as requested", job.id)
+        decision = {"action": "run", "reasons": ["admission check failed"], "params": job.params}
+    params = decision.pop("params")
+
+    def process(index: int) -> dict:
+        item = job.inputs[index]
+        key = result_key(job.kind, item["sha256"], params)
+        try:
+            cached = result_cache.get(key)
+            if cached is not None:
+                retention.touch(cached["job_id"])
+                file_result = {**cached["result"], "cached": True}
+            else:
+                file_result = run_file(job, index, item["path"], params)
+                result_cache.put(key, job.id, file_result, OUTPUTS_DIR / job.id / f"file-{index}")
+                # the decision belongs to this run only, later cache hits must not replay it
+                file_result = {**file_result, "stats": {**file_result["stats"], "admission": decision}}
+        finally:
+            # delete input file to save memory
+            with stage_seconds.time(stage="cleanup", engine="backend"):
+                discard_staged(item["path"])
+        return {"file": os.path.basename(item["path"]), **file_result}
+
+    try:
+        if job.params.get("isHat"):
+            # the Hailo device runs one pipeline at a time
+            file_results = [process(index) for index in range(len(job.inputs))]
+        else:
+            file_results = list(file_executor.map(process, range(len(job.inputs))))
+    finally:
+        for item in job.inputs:
+            discard_staged(item["path"])
+        # new outputs on disk: check the quota now rather than at the next periodic sweep
+        retention.request_sweep()
+
+    result = batch_result(job.kind, file_results, time.perf_counter() - start)
+    result["admission"] = decision
+    return result
+
+
+# shared by all jobs: bounds the files analyzed at once, and its threads keep their models warm
+file_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix="file-worker")
+
+
+def run_video_job(job: Job) -> dict:
+    return run_batch(job, run_video_file)
+
+
+def run_audio_job(job: Job) -> dict:
+    return run_batch(job, run_audio_file)
+
+
+jobs = JobManager({"video": run_video_job, "audio": run_audio_job})
+result_cache = ResultCache(RESULT_CACHE_DIR)
+retention = RetentionManager(OUTPUTS_DIR, jobs_dir=jobs.jobs_dir, protected=jobs.active_ids)
+admission = AdmissionController()
+monitoring_feed = MonitoringFeed()
+# one capture + inference loop for every viewer of /live/stream
+live_camera = LiveCamera(lambda: engines.frame_annotator(yolo_path="interface/backend/AI/yolov11n.pt"))
+
 # define life of the application
 # The first part of the function, before the yield, will be executed before the application starts.
 # And the part after the yield will be executed after the application has finished.
@@ -19,14 +187,24 @@ from interface.backend.AI.yolo_detection_without_yolo import yolo_detection_with
 async def lifespan(app: FastAPI):
     # Launch monitoring
     subprocess.Popen(["python3","monitoring/all_monitoring.py"])
+    # Start analysis workers (re-queues jobs left over from the last run)
+    jobs.start()
+    # Delete old / least recently accessed job outputs in the background
+    retention.start()
+    # Import heavy engines in the background, requests are served meanwhile
+    if engines.WARMUP:
+        engines.warm_up(is_hailo_hat_present)
+    profiler.check_budget("app_ready")
     yield
     # Stop monitoring
+    jobs.stop(timeout=5)
+    file_executor.shutdown(wait=False, cancel_futures=True)
+    retention.stop(timeout=5)
+    live_camera.stop(timeout=5)
 
 app = FastAPI(lifespan=lifespan)
 
 
-VIDEO_RESULT_PATH = "result.webm"
-
 # Autorise all origins so frontend can call backend (maybe change origin to ["http://localhost:3000"] to increase security)
 app.add_middleware(
     CORSMiddleware,
@@ -36,106 +214,278 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-os.makedirs("interface/backend/outputs",exist_ok=True)
-app.mount("/outputs", StaticFiles(directory="interface/backend/outputs"), name="outputs")
+os.makedirs(OUTPUTS_DIR,exist_ok=True)
+
+
+def is_being_recorded(path: Path) -> bool:
+    """True while a running detection is still writing this file."""
+    return any(entry.get("recording_path") == str(path) for entry in live_stats.active("video"))
+
+
+# serve outputs with Range / ETag support, recordings in progress are streamed while they grow
+@app.api_route("/outputs/{file_path:path}", methods=["GET", "HEAD"])
+async def get_output(file_path: str, request: Request):
+    outputs_root = OUTPUTS_DIR.resolve()
+    path = (outputs_root / file_path).resolve()
+    hidden = any(part.startswith(".") for part in Path(file_path).parts)
+    if hidden or not path.is_relative_to(outputs_root):
+        return JSONResponse(status_code=404, content={"error": "Not found"})
+    if not path.is_file():
+        # link to a recording in progress that has been completed since
+        final = final_recording_path(path)
+        if final is not None and final.is_file():
+            return RedirectResponse(output_url(final), status_code=307)
+        return JSONResponse(status_code=404, content={"error": "Not found"})
+    retention.touch(Path(file_path).parts[0])
+    return serve_file(request, path, is_growing=lambda: is_being_recorded(path))
+
+
+async def submit_job(kind: str, params: dict, staged_files: list[StagedUpload]):
+    """
+    Queue a job for all uploaded files and answer right away with its id, or 429 when the queue is full,
+    or 503 while the device is too hot / short on memory to take new work.
+    Files already analyzed with the same parameters are answered from the result cache,
+    and an upload identical to a queued/running job attaches to that job.
+    """
+    cached = [result_cache.get(result_key(kind, staged.sha256, params)) for staged in staged_files]
+    if all(entry is not None for entry in cached):
+        for staged, entry in zip(staged_files, cached):
+            staged.remove()
+            retention.touch(entry["job_id"])
+        file_results = [
+            {"file": staged.name, **entry["result"], "cached": True}
+            for staged, entry in zip(staged_files, cached)
+        ]
+        # a finished job record, so clients can handle this answer like any other job
+        job = jobs.add_done(kind, params, batch_result(kind, file_results, 0.0))
+        return {
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}",
+            "cached": True,
+            "result": job.result,
+        }
+
+    decision = await run_in_threadpool(admission.evaluate, kind, params)
+    if decision["action"] == DEFER:
+        admission_decisions.inc(kind=kind, action=DEFER)
+        for staged in staged_files:
+            staged.remove()
+        decision.pop("params")
+        return JSONResponse(
+            status_code=503,
+            content={"error": "Device busy (temperature or memory), retry later", "admission": decision},
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        )
+
+    key = result_key(kind, "+".join(staged.sha256 for staged in staged_files), params)
+    if jobs.running_count() + jobs.queue_depth() >= jobs.max_workers:
+        # the job will wait for a worker: don't keep its files in RAM (tmpfs) meanwhile
+        for staged in staged_files:
+            await run_in_threadpool(staged.move_to_disk)
+    inputs = [{"path": str(staged.path), "sha256": staged.sha256} for staged in staged_files]
+    try:
+        job, attached = jobs.submit_or_attach(kind, params, inputs, key)
+    except QueueFullError as exc:
+        for staged in staged_files:
+            staged.remove()
+        return JSONResponse(status_code=429, content={"error": str(exc)}, headers={"Retry-After": "10"})
+    if attached:
+        # the running job already has its own copy of this content
+        for staged in staged_files:
+            staged.remove()
+    return JSONResponse(
+        status_code=202,
+        content={"job_id": job.id, "status": job.status, "status_url": f"/jobs/{job.id}", "coalesced": attached},
+    )
 
 
-# return video result url and global statistics
+# queue a video analysis of every uploaded file, the result (video urls and statistics) is available on /jobs/{job_id}
 @app.post("/analyze-video/")
 async def analyze_video(files: list[UploadFile], isHat: bool = Form(), fps: int = Form()):
     
     if not files:
         return {"error": "No video provided"}
 
-    # check if uploads and outputs folders exist
-    os.makedirs("interface/backend/uploads",exist_ok=True)
-    # os.makedirs("outputs",exist_ok=True)
-    
-
-    video = files[0]
-    name = os.path.basename(video.filename)
-    stem = os.path.splitext(name)[0]
-    video_path = f"interface/backend/uploads/{name}" # save video at this path
-    
-
-    
-    VIDEO_RESULT_PATH = f"yolo-{name}"
-    
-    # save file
-    with open(video_path, "wb") as f:
-        f.write(await video.read())
-
-    # call YOLO on video_path
-    if isHat:
-        if is_hailo_hat_present():
-            recorded_path, stats = await run_in_threadpool(
-                yolo_detection,
-                live_input=False,
-                video_path=video_path,
-                frame_rate=fps,
-                output_dir="interface/backend/outputs/yolo-hat-{stem}",
-                record_filename=VIDEO_RESULT_PATH,
-                hef_path="interface/backend/AI/yolov11n.hef",
-            )
-    else:
-        recorded_path, stats = await run_in_threadpool(
-            yolo_detection_without_yolo,
-            live_input=False,
-            video_path=video_path,
-            frame_rate=fps,
-            output_dir="interface/backend/outputs/yolo-no_hat-{stem}",
-            record_filename=VIDEO_RESULT_PATH,
-            yolo_path="interface/backend/AI/yolov11n.pt",
-        )
+    # stream files to the staging area (tmpfs for small files, disk for big ones)
+    staged_files = [await stage_upload(video) for video in files]
 
-    # delete input file to save memory
-    os.remove(video_path)
-    
-    video_url = f"http://127.0.0.1:8000/outputs/yolo-{stem}/{VIDEO_RESULT_PATH}"
-    
-    return  {"video": video_url, "recording_path": str(recorded_path), "stats": stats}
+    return await submit_job("video", {"isHat": isHat, "fps": fps}, staged_files)
 
-# return transcription and global statistics
+# queue a transcription of every uploaded file, the result (transcriptions and statistics) is available on /jobs/{job_id}
 @app.post("/analyze-audio/")
 async def analyze_audio(files: list[UploadFile], model: str = Form("base")):
     
     if not files:
         return {"error": "No audio provided"}
-    
-    # check if uploads and outputs folders exist
-    os.makedirs("interface/backend/uploads",exist_ok=True)
-    # os.makedirs("outputs",exist_ok=True)
-    
 
-    audio = files[0]
-    audio_path = f"interface/backend/uploads/{audio.filename}" # save audio at this path
+    # stream files to the staging area (tmpfs for small files, disk for big ones)
+    staged_files = [await stage_upload(audio) for audio in files]
 
-    # save file
-    with open(audio_path, "wb") as f:
-        f.write(await audio.read())
+    return await submit_job("audio", {"model": model}, staged_files)
 
-    # call Whisper on audio_path
-    audio_result, stats = await run_in_threadpool(transcribe, audio_path, model_name=model, output_dir="interface/backend/outputs/stt")
+# return status of a job, with its result once done
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job"})
+    data = job.to_dict()
+    data["queue_depth"] = jobs.queue_depth()
+    if job.status == RUNNING:
+        # the annotated videos can be watched while they are being recorded
+        partial_videos = [
+            output_url(entry["recording_path"])
+            for entry in live_stats.find(job.id)
+            if entry["status"] == "running" and entry.get("recording_path")
+        ]
+        if partial_videos:
+            data["partial_video"] = partial_videos[0]
+            data["partial_videos"] = partial_videos
+    return data
+
+def current_statistics(kind: str, job_id: str | None):
+    """
+    Live stats of one job (one entry per file, plus totals), or of the most recently
+    started running file of this kind.
+    """
+    if job_id is None:
+        running = live_stats.active(kind)
+        return running[-1] if running else None
+
+    entries = [entry for entry in live_stats.find(job_id) if entry["kind"] == kind]
+    if not entries:
+        return None
+    job = jobs.get(job_id)
+    return {
+        "key": job_id,
+        "kind": kind,
+        # files of a batch start one after the other, the job tells whether more are coming
+        "status": job.status if job is not None else entries[-1]["status"],
+        "frames_done": sum(entry.get("frames_done", 0) for entry in entries),
+        "total_detections": sum(entry.get("total_detections", 0) for entry in entries),
+        "window_fps": round(sum(entry.get("window_fps", 0.0) for entry in entries if entry["status"] == "running"), 2),
+        "files": entries,
+    }
+
+
+async def statistics_events(request: Request, kind: str, job_id: str | None):
+    """Server-Sent Events: push the live stats each time the registry changes."""
+    last_version = None
+    while not await request.is_disconnected():
+        version = live_stats.version
+        if version != last_version:
+            last_version = version
+            entry = current_statistics(kind, job_id)
+            yield f"data: {json.dumps(entry)}\n\n"
+            if job_id is not None and entry is not None and entry["status"] not in (QUEUED, RUNNING):
+                break
+        await asyncio.sleep(SSE_POLL_INTERVAL)
 
-    # delete input file to save memory
-    os.remove(audio_path)
-    
-    
-    return  {"text": audio_result, "stats": stats}
 
 # return current statistics from current detection, null if no detection
 @app.get("/statistics-video/")
-async def get_video_statistics():
-    pass
+async def get_video_statistics(job_id: str | None = None):
+    return current_statistics("video", job_id)
+
+# stream statistics from current detection (Server-Sent Events)
+@app.get("/statistics-video/stream")
+async def stream_video_statistics(request: Request, job_id: str | None = None):
+    return StreamingResponse(statistics_events(request, "video", job_id), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 # return current statistics from current transcription, null if no transcription
 @app.get("/statistics-audio/")
-async def get_audio_statistics():
-    pass
+async def get_audio_statistics(job_id: str | None = None):
+    return current_statistics("audio", job_id)
+
+# stream statistics from current transcription (Server-Sent Events)
+@app.get("/statistics-audio/stream")
+async def stream_audio_statistics(request: Request, job_id: str | None = None):
+    return StreamingResponse(statistics_events(request, "audio", job_id), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+# stream annotated frames of the live camera (MJPEG, can be used as the src of an <img>)
+@app.get("/live/stream")
+async def stream_live():
+    return StreamingResponse(
+        mjpeg_stream(live_camera),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-store"},
+    )
+
+# return statistics of the live loop (viewers, fps, detections), null when it never ran
+@app.get("/live/")
+async def get_live():
+    entry = live_stats.get(live_camera.stats_key)
+    if entry is not None:
+        entry["viewers"] = live_camera.viewer_count()
+    return entry
+
+# return disk usage of the outputs directory and retention settings
+@app.get("/storage/")
+async def get_storage():
+    return retention.usage()
 
 # return monitoring information
 @app.get("/monitoring/")
 async def get_monitoring():
-    with open("current_monitoring_data.json","r") as f:
-        data = json.load(f)
-    return data
+    return monitoring_feed.snapshot()
+
+
+async def monitoring_events():
+    async for snapshot in monitoring_feed.subscribe():
+        yield f"data: {json.dumps(snapshot)}\n\n"
+
+# stream monitoring information (Server-Sent Events), sent only when a metric changes
+@app.get("/monitoring/stream")
+async def stream_monitoring():
+    return StreamingResponse(monitoring_events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def runtime_metrics():
+    """Gauges read at scrape time: job queue, live frame rates, storage and the monitoring snapshot."""
+    fps = {}
+    for entry in live_stats.active():
+        if "window_fps" in entry:
+            backend = entry.get("backend", "unknown")
+            fps[backend] = fps.get(backend, 0.0) + entry["window_fps"]
+    snapshot = monitoring_feed.snapshot()
+    memory = snapshot.get("memory", {})
+    swap = snapshot.get("swap", {})
+    temperature = snapshot.get("temperature", {})
+    energy = snapshot.get("energy", {})
+    storage = retention.usage()
+    return [
+        ("gauge", "pi2025_job_queue_depth", "Jobs waiting for a worker.", [({}, jobs.queue_depth())]),
+        ("gauge", "pi2025_jobs_running", "Jobs being processed.", [({}, jobs.running_count())]),
+        ("gauge", "pi2025_frames_per_second", "Frame rate of the running detections (last window).",
+         [({"backend": backend}, value) for backend, value in fps.items()]),
+        ("gauge", "pi2025_live_viewers", "Clients watching the live stream.", [({}, live_camera.viewer_count())]),
+        ("gauge", "pi2025_outputs_used_bytes", "Disk used by job outputs.", [({}, storage.get("used_bytes"))]),
+        ("gauge", "pi2025_memory_used_bytes", "RAM used on the device.", [({}, memory.get("used_ram"))]),
+        ("gauge", "pi2025_memory_used_ratio", "Fraction of the RAM used.",
+         [({}, memory["ram_percent_used"] / 100 if memory.get("ram_percent_used") is not None else None)]),
+        ("gauge", "pi2025_swap_used_bytes", "Swap used on the device.", [({}, swap.get("used_swap"))]),
+        ("gauge", "pi2025_temperature_celsius", "Chip temperatures.",
+         [({"sensor": "cpu"}, temperature.get("cpu_temperature_c")),
+          ({"sensor": "hailo"}, temperature.get("hailo_temperature_c"))]),
+        ("gauge", "pi2025_power_watts", "Total power drawn by the board.", [({}, energy.get("total_power_w"))]),
+        ("gauge", "pi2025_cpu_used_ratio", "Fraction of the CPU used.",
+         [({}, energy["cpu_percent_used"] / 100 if energy.get("cpu_percent_used") is not None else None)]),
+    ]
+
+
+metrics.add_collector(runtime_metrics)
+
+# return counters, histograms and gauges in the Prometheus text format, for scrapers
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.exposition(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# return per-import cost and time to readiness of the backend
+@app.get("/startup-profile/")
+async def get_startup_profile():
+    report = profiler.report()
+    report["engines_loaded"] = {
+        engine.module: engine.loaded
+        for engine in (transcribe, yolo_detection_without_yolo, yolo_detection)
+    }
+    return report
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+import asyncio
+import json
+import os
+
+from monitoring.global_monitoring_functions import glob_filename
+
+# how often the snapshot file is checked while at least one client is connected (seconds)
+POLL_INTERVAL = 1.0
+
+
+def _metrics(data: dict) -> dict:
+    """Snapshot without the top-level timestamp, which changes on every monitoring cycle."""
+    return {key: value for key, value in data.items() if key != "timestamp"}
+
+
+class MonitoringFeed:
+    """
+    In-memory copy of the merged monitoring snapshot written by `all_monitoring.py`.
+    The file is only parsed again when its mtime/size change, and connected clients
+    are notified only when a metric value differs from the previous snapshot.
+    """
+
+    def __init__(self, path: str | Path = glob_filename, poll_interval: float = POLL_INTERVAL):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._snapshot: dict = {}
+        self._signature = None
+        self._subscribers: set[asyncio.Queue] = set()
+        self._poller: asyncio.Task | None = None
+
+    def refresh(self) -> bool:
+        """Reload the snapshot if the file changed. Return True when a metric changed."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return False
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, PermissionError):
+            # keep serving the previous snapshot, retry on the next check
+            return False
+        self._signature = signature
+        changed = _metrics(data) != _metrics(self._snapshot)
+        self._snapshot = data
+        return changed
+
+    def snapshot(self) -> dict:
+        self.refresh()
+        return self._snapshot
+
+    async def subscribe(self):
+        """Yield the current snapshot, then every snapshot in which a metric changed."""
+        updates: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self._subscribers.add(updates)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        try:
+            yield self.snapshot()
+            while True:
+                yield await updates.get()
+        finally:
+            self._subscribers.discard(updates)
+
+    async def _poll(self):
+        # runs only while clients are connected
+        while self._subscribers:
+            if self.refresh():
+                for updates in list(self._subscribers):
+                    # a slow client only needs the latest snapshot
+                    if updates.full():
+                        updates.get_nowait()
+                    updates.put_nowait(self._snapshot)
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+# Size of the cached job output directories before the least recently used ones are deleted.
+MAX_CACHE_MB = int(os.environ.get("RESULT_CACHE_MAX_MB", "2048"))
+
+
+def result_key(kind: str, content_sha256: str, params: dict) -> str:
+    """Key identifying one analysis: what was analyzed, and with which parameters."""
+    payload = json.dumps({"kind": kind, "content": content_sha256, "params": params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def directory_size(path: Path) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class ResultCache:
+    """
+    Content-addressed cache of finished analysis results.
+    The cached files are the job output directories already under `outputs/`;
+    this class only keeps an index entry `<index_dir>/<key>.json` pointing to them.
+    """
+
+    def __init__(self, index_dir: str | Path, max_bytes: int = MAX_CACHE_MB * 1024 * 1024):
+        self.index_dir = Path(index_dir)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached entry (job_id, result, ...) or None on a miss."""
+        with self._lock:
+            entry = self._read(key)
+            if entry is None:
+                return None
+            if not Path(entry["output_dir"]).is_dir():
+                # outputs were deleted behind our back, the entry is stale
+                self._index_file(key).unlink(missing_ok=True)
+                return None
+            entry["last_used"] = time.time()
+            self._write(key, entry)
+            return entry
+
+    def put(self, key: str, job_id: str, result: dict, output_dir: str | Path):
+        output_dir = Path(output_dir)
+        entry = {
+            "key": key,
+            "job_id": job_id,
+            "result": result,
+            "output_dir": str(output_dir),
+            "size_bytes": directory_size(output_dir),
+            "created_at": time.time(),
+            "last_used": time.time(),
+        }
+        with self._lock:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            self._write(key, entry)
+            self._evict(keep=key)
+
+    def usage_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["size_bytes"] for entry in self._entries())
+
+    def _index_file(self, key: str) -> Path:
+        return self.index_dir / f"{key}.json"
+
+    def _read(self, key: str) -> dict | None:
+        try:
+            with open(self._index_file(key), "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, key: str, entry: dict):
+        try:
+            with tempfile.NamedTemporaryFile("w", dir=self.index_dir, delete=False) as tf:
+                json.dump(entry, tf, indent=4)
+                tmpname = tf.name
+            os.replace(tmpname, self._index_file(key))
+        except Exception:
+            logging.exception("Failed to write result cache entry %s", key)
+
+    def _entries(self) -> list[dict]:
+        entries = []
+        for path in self.index_dir.glob("*.json"):
+            entry = self._read(path.stem)
+            if entry is not None:
+                entries.append(entry)
+        return entries
+
+    def _evict(self, keep: str):
+        """Delete least recently used results until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry["last_used"])
+        total = sum(entry["size_bytes"] for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            if entry["key"] == keep:
+                continue
+            shutil.rmtree(entry["output_dir"], ignore_errors=True)
+            self._index_file(entry["key"]).unlink(missing_ok=True)
+            total -= entry["size_bytes"]
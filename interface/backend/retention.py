@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable
+import datetime
+import logging
+import os
+import shutil
+import threading
+import time
+
+from interface.backend.result_cache import directory_size
+from monitoring.metrics import stage_seconds
+
+# Byte quota for everything under the outputs directory.
+QUOTA_MB = int(os.environ.get("OUTPUTS_QUOTA_MB", "4096"))
+# Job directories not accessed for this long are deleted whatever the usage.
+MAX_AGE_HOURS = float(os.environ.get("OUTPUTS_MAX_AGE_HOURS", "72"))
+# Time between two sweeps (a finished job also triggers one).
+SWEEP_INTERVAL_SECONDS = int(os.environ.get("RETENTION_INTERVAL_SECONDS", "300"))
+
+
+class RetentionManager:
+    """
+    Background deletion of job output directories (`<outputs>/<job_id>/`).
+    Directories older than the max age go first, then the least recently accessed
+    ones until usage fits in the quota. Directories of running jobs are never touched.
+    Job files of finished jobs (`<jobs_dir>/<job_id>.json`) go with their directory,
+    or after the same max age when the job has no outputs (failed, cached answer).
+    The sweep thread runs at the lowest CPU priority so deletions on the SD card
+    don't compete with the inference write path.
+    """
+
+    def __init__(
+        self,
+        outputs_dir: str | Path,
+        *,
+        jobs_dir: str | Path | None = None,
+        quota_bytes: int = QUOTA_MB * 1024 * 1024,
+        max_age_seconds: float = MAX_AGE_HOURS * 3600,
+        interval: float = SWEEP_INTERVAL_SECONDS,
+        protected: Callable[[], set[str]] | None = None,
+    ):
+        self.outputs_dir = Path(outputs_dir)
+        self.jobs_dir = Path(jobs_dir) if jobs_dir is not None else None
+        self.quota_bytes = quota_bytes
+        self.max_age_seconds = max_age_seconds
+        self.interval = interval
+        self.protected = protected or set
+        self._last_access: dict[str, float] = {}
+        self._usage: dict = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="outputs-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def touch(self, job_id: str):
+        """Record an access to a job directory (served file, cache hit...)."""
+        with self._lock:
+            self._last_access[job_id] = time.time()
+
+    def request_sweep(self):
+        self._wake.set()
+
+    def usage(self) -> dict:
+        with self._lock:
+            return dict(self._usage)
+
+    def _run(self):
+        try:
+            # lowest CPU (and, with the default I/O scheduler, disk) priority for this thread only
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        while not self._stop_event.is_set():
+            try:
+                with stage_seconds.time(stage="cleanup", engine="retention"):
+                    self.sweep()
+            except Exception:
+                logging.exception("Output retention sweep failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def _job_dirs(self) -> list[tuple[str, int, float]]:
+        """(job_id, size, last access) of every job directory."""
+        job_dirs = []
+        for entry in os.scandir(self.outputs_dir):
+            if not entry.is_dir(follow_symlinks=False) or entry.name.startswith("."):
+                continue
+            with self._lock:
+                last_access = self._last_access.get(entry.name, 0.0)
+            last_access = max(last_access, entry.stat(follow_symlinks=False).st_mtime)
+            job_dirs.append((entry.name, directory_size(Path(entry.path)), last_access))
+        return job_dirs
+
+    def sweep(self):
+        if not self.outputs_dir.is_dir():
+            return
+        now = time.time()
+        protected = self.protected()
+        job_dirs = sorted(self._job_dirs(), key=lambda item: item[2])
+        total = sum(size for _, size, _ in job_dirs)
+        deleted = []
+
+        for job_id, size, last_access in job_dirs:
+            if job_id in protected:
+                continue
+            too_old = now - last_access > self.max_age_seconds
+            if not too_old and total <= self.quota_bytes:
+                # sorted by last access: every remaining directory is more recent
+                break
+            shutil.rmtree(self.outputs_dir / job_id, ignore_errors=True)
+            total -= size
+            deleted.append(job_id)
+            with self._lock:
+                self._last_access.pop(job_id, None)
+
+        if deleted:
+            logging.info("Output retention deleted %d job directories", len(deleted))
+        kept = {job_id for job_id, _, _ in job_dirs} - set(deleted)
+        self._prune_job_files(now, protected, kept, set(deleted))
+        with self._lock:
+            self._usage = {
+                "used_bytes": total,
+                "quota_bytes": self.quota_bytes,
+                "percent_used": round(100 * total / self.quota_bytes, 2) if self.quota_bytes else None,
+                "max_age_seconds": self.max_age_seconds,
+                "job_directories": len(job_dirs) - len(deleted),
+                "deleted_last_sweep": len(deleted),
+                "last_sweep": datetime.datetime.now().isoformat(),
+            }
+
+    def _prune_job_files(self, now: float, protected: set[str], kept: set[str], deleted: set[str]):
+        """Delete the files of finished jobs whose outputs were deleted, or that have no outputs and are too old."""
+        if self.jobs_dir is None or not self.jobs_dir.is_dir():
+            return
+        removed = 0
+        for path in self.jobs_dir.glob("*.json"):
+            job_id = path.stem
+            if job_id in protected or job_id in kept:
+                continue
+            if job_id not in deleted:
+                with self._lock:
+                    last_access = self._last_access.get(job_id, 0.0)
+                try:
+                    last_access = max(last_access, path.stat().st_mtime)
+                except FileNotFoundError:
+                    continue
+                if now - last_access <= self.max_age_seconds:
+                    continue
+            path.unlink(missing_ok=True)
+            removed += 1
+            with self._lock:
+                self._last_access.pop(job_id, None)
+        if removed:
+            logging.info("Output retention deleted %d job files", removed)
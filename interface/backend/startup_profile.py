@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+import logging
+import os
+import sys
+import threading
+import time
+
+# Time allowed between process start and the API accepting requests (seconds).
+STARTUP_BUDGET_SECONDS = float(os.environ.get("STARTUP_BUDGET_SECONDS", "2.0"))
+
+
+class StartupProfiler:
+    """Records how long each import / startup phase took, relative to process start."""
+
+    def __init__(self, budget_seconds: float = STARTUP_BUDGET_SECONDS):
+        self.budget_seconds = budget_seconds
+        self.origin = time.perf_counter()
+        self.events: list[dict] = []
+        self.imports: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def mark(self, event: str):
+        with self._lock:
+            self.events.append({"event": event, "at_seconds": round(self.elapsed(), 3)})
+
+    @contextmanager
+    def measure(self, name: str):
+        """Time an import and list the top-level packages it pulled in."""
+        before = set(sys.modules)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            new_modules = set(sys.modules) - before
+            with self._lock:
+                self.imports[name] = {
+                    "seconds": round(seconds, 3),
+                    "thread": threading.current_thread().name,
+                    "new_modules": len(new_modules),
+                    "new_packages": sorted({module.split(".")[0] for module in new_modules}),
+                }
+
+    def check_budget(self, event: str = "app_ready"):
+        """Mark `event` and warn when it happened after the startup budget."""
+        self.mark(event)
+        elapsed = self.elapsed()
+        if elapsed > self.budget_seconds:
+            slowest = sorted(self.imports.items(), key=lambda item: item[1]["seconds"], reverse=True)[:3]
+            logging.warning(
+                "Startup took %.2fs (budget %.2fs), slowest imports: %s",
+                elapsed,
+                self.budget_seconds,
+                ", ".join(f"{name}={info['seconds']}s" for name, info in slowest) or "none",
+            )
+
+    def report(self) -> dict:
+        with self._lock:
+            ready = next((event["at_seconds"] for event in self.events if event["event"] == "app_ready"), None)
+            return {
+                "budget_seconds": self.budget_seconds,
+                "ready_after_seconds": ready,
+                "within_budget": ready is not None and ready <= self.budget_seconds,
+                "events": list(self.events),
+                "imports": dict(self.imports),
+            }
+
+
+profiler = StartupProfiler()
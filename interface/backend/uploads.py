@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+from pathlib import Path
+import hashlib
+import os
+import shutil
+import time
+import uuid
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from monitoring.metrics import stage_seconds
+
+# Uploads are copied in fixed-size chunks so the backend never holds a whole file in RAM.
+CHUNK_SIZE = 1024 * 1024
+# Files up to this size stay on tmpfs, bigger ones are moved to disk while streaming.
+SPILL_THRESHOLD = int(os.environ.get("UPLOAD_SPILL_THRESHOLD_MB", "32")) * 1024 * 1024
+
+TMPFS_STAGING_DIR = Path(os.environ.get("UPLOAD_TMPFS_DIR", "/dev/shm/pi2025-uploads"))
+DISK_STAGING_DIR = Path(os.environ.get("UPLOAD_DISK_DIR", "interface/backend/uploads"))
+
+
+class StagedUpload:
+    """A file copied from the request body into the staging area."""
+
+    def __init__(self, path: Path, sha256: str, size: int):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+
+    @property
+    def name(self) -> str:
+        return self.path.name
+
+    @property
+    def stem(self) -> str:
+        return self.path.stem
+
+    @property
+    def on_tmpfs(self) -> bool:
+        return self.path.is_relative_to(TMPFS_STAGING_DIR)
+
+    def move_to_disk(self):
+        """Move a file staged on tmpfs to disk, so it doesn't hold RAM while its job waits in the queue."""
+        if self.on_tmpfs:
+            disk_path = _new_upload_path(_staging_root(prefer_tmpfs=False), self.name)
+            shutil.move(str(self.path), str(disk_path))
+            shutil.rmtree(self.path.parent, ignore_errors=True)
+            self.path = disk_path
+
+    def remove(self):
+        """Delete the staged file and its per-upload directory."""
+        discard_staged(self.path)
+
+
+def discard_staged(path: str | Path):
+    """Delete a staged file together with its per-upload directory."""
+    shutil.rmtree(Path(path).parent, ignore_errors=True)
+
+
+def _staging_root(prefer_tmpfs: bool) -> Path:
+    if prefer_tmpfs and TMPFS_STAGING_DIR.parent.is_dir():
+        try:
+            TMPFS_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+            return TMPFS_STAGING_DIR
+        except OSError:
+            pass
+    DISK_STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    return DISK_STAGING_DIR
+
+
+def _new_upload_path(root: Path, name: str) -> Path:
+    # One directory per upload keeps the original filename (used to name outputs)
+    # while two concurrent uploads of the same file can't overwrite each other.
+    upload_dir = root / uuid.uuid4().hex
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    return upload_dir / name
+
+
+def _spill_to_disk(f, path: Path, written: int | None = None):
+    """Move a partially written tmpfs file to disk and return the new handle and path."""
+    try:
+        f.close()
+    except OSError:
+        if written is None:
+            raise
+    if written is not None:
+        # the tmpfs write failed: drop the part of the chunk it flushed, the caller writes it again
+        os.truncate(path, written)
+    disk_path = _new_upload_path(_staging_root(prefer_tmpfs=False), path.name)
+    shutil.move(str(path), str(disk_path))
+    shutil.rmtree(path.parent, ignore_errors=True)
+    return open(disk_path, "ab"), disk_path
+
+
+async def stage_upload(upload: UploadFile, chunk_size: int = CHUNK_SIZE) -> StagedUpload:
+    """
+    Stream an uploaded file to the staging area in bounded chunks.
+    The SHA-256 of the content is computed while the file is copied.
+    """
+    name = os.path.basename(upload.filename or "upload")
+    declared_size = getattr(upload, "size", None)
+    prefer_tmpfs = declared_size is None or declared_size <= SPILL_THRESHOLD
+
+    path = _new_upload_path(_staging_root(prefer_tmpfs), name)
+    on_tmpfs = path.is_relative_to(TMPFS_STAGING_DIR)
+    start = time.perf_counter()
+    digest = hashlib.sha256()
+    size = 0
+
+    f = open(path, "wb")
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            size += len(chunk)
+            if on_tmpfs and size > SPILL_THRESHOLD:
+                f, path = await run_in_threadpool(_spill_to_disk, f, path)
+                on_tmpfs = False
+            try:
+                await run_in_threadpool(f.write, chunk)
+            except OSError:
+                # tmpfs full before reaching the threshold: continue on disk
+                if not on_tmpfs:
+                    raise
+                f, path = await run_in_threadpool(_spill_to_disk, f, path, size - len(chunk))
+                on_tmpfs = False
+                await run_in_threadpool(f.write, chunk)
+    except BaseException:
+        f.close()
+        shutil.rmtree(path.parent, ignore_errors=True)
+        raise
+    f.close()
+    await upload.close()
+    stage_seconds.observe(time.perf_counter() - start, stage="upload_write", engine="backend")
+
+    return StagedUpload(path, digest.hexdigest(), size)
@@ -1,4 +1,44 @@
 const BACKEND_URL = import.meta.env.VITE_BACKEND_URL;
+const JOB_POLL_INTERVAL_MS = 1000;
+
+// Analysis endpoints answer right away with a job id, poll the job until it is finished
+async function waitForJob(submitResponse) {
+  if (submitResponse.status === 429) {
+    throw new Error("Too many analyses in progress, retry later");
+  }
+  if (submitResponse.status === 503) {
+    throw new Error("Device too hot or short on memory, retry later");
+  }
+  if (!submitResponse.ok) {
+    throw new Error("Error during analyze");
+  }
+
+  const submitted = await submitResponse.json();
+  // identical content already analyzed with the same parameters
+  if (submitted.status === "done") {
+    return submitted.result;
+  }
+  const { job_id } = submitted;
+
+  while (true) {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+
+    const response = await fetch(`${BACKEND_URL}/jobs/${job_id}`, {
+      method: "GET",
+    });
+    if (!response.ok) {
+      throw new Error("Error during analyze");
+    }
+
+    const job = await response.json();
+    if (job.status === "done") {
+      return job.result;
+    }
+    if (job.status === "failed") {
+      throw new Error(job.error || "Error during analyze");
+    }
+  }
+}
 
 export async function analyzeVideo(files, isOnHat, fps) {
   const formData = new FormData();
@@ -15,11 +55,7 @@ export async function analyzeVideo(files, isOnHat, fps) {
     body: formData,
   });
 
-  if (!response.ok) {
-    throw new Error("Error during analyze");
-  }
-
-  return await response.json();
+  return await waitForJob(response);
 }
 
 export async function analyzeAudio(files, modelName) {
@@ -38,11 +74,7 @@ export async function analyzeAudio(files, modelName) {
     body: formData,
   });
 
-  if (!response.ok) {
-    throw new Error("Error during analyze");
-  }
-
-  return await response.json();
+  return await waitForJob(response);
 }
 
 export async function getMonitoring() {
@@ -55,4 +87,22 @@ export async function getMonitoring() {
   }
 
   return await response.json();
-}
\ No newline at end of file
+}
+// Receive monitoring information each time a metric changes (Server-Sent Events)
+export function subscribeMonitoring(onData) {
+  const source = new EventSource(`${BACKEND_URL}/monitoring/stream`);
+
+  source.onmessage = (event) => {
+    onData(JSON.parse(event.data));
+  };
+  source.onerror = (err) => {
+    console.error("Error during monitoring stream:", err);
+  };
+
+  return () => source.close();
+}
+
+// MJPEG stream of the live camera with detections, usable directly as the src of an <img>
+export function liveStreamUrl() {
+  return `${BACKEND_URL}/live/stream`;
+}
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from "react";
-import { getMonitoring } from "../api/api";
+import { subscribeMonitoring } from "../api/api";
 
 function Monitoring() {
   const [temperature, setTemperature] = useState(0);
@@ -10,29 +10,24 @@ function Monitoring() {
 
   
   useEffect(() => {
-    // function to fetch data
-    const fetchData = async () => {
+    // function to update all parameters
+    const updateData = (data) => {
       try {
-        const data = await getMonitoring();
-        // update all parameters
         setTemperature(data["temperature"]["cpu_temperature_c"] || 0);
         setMemoryUsed(data["memory"]["ram_percent_used"] || 0);
         setConsumption(data["energy"]["total_power_w"] || 0);
         setIsHat(data["hailo_presence"] || false);
         setIsCamera(data["cameras"]["Rpi_cameras"] || data["cameras"]["Usb_cameras"] || false);
       } catch (err) {
-        console.error("Error during monitoring fetch:", err);
+        console.error("Error during monitoring update:", err);
       }
     };
 
-    // initial fetch
-    fetchData();
-
-    // fetch all 10 seconds
-    const interval = setInterval(fetchData, 10000); // delay in milliseconds
+    // backend pushes a new snapshot only when a metric changes
+    const unsubscribe = subscribeMonitoring(updateData);
 
     // cleanup when component destructed
-    return () => clearInterval(interval);
+    return unsubscribe;
   }, []);
 
 
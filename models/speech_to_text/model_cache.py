@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import whisper
+
+from monitoring.metrics import stage_seconds
+
+# RAM that loaded Whisper models may use together before the least recently used ones are dropped
+BUDGET_MB = int(os.environ.get("WHISPER_CACHE_BUDGET_MB", "1024"))
+
+
+def model_size_bytes(model):
+    """Memory used by the weights and buffers of a torch model."""
+    size = sum(p.numel() * p.element_size() for p in model.parameters())
+    size += sum(b.numel() * b.element_size() for b in model.buffers())
+    return size
+
+
+class WhisperModelCache:
+    """
+    Keeps loaded Whisper models resident across requests, keyed by model name.
+    Least recently used models are evicted once the RAM budget is exceeded,
+    and concurrent requests for a model being loaded wait for that single load.
+    """
+
+    def __init__(self, budget_bytes=BUDGET_MB * 1024 * 1024, loader=whisper.load_model):
+        self.budget_bytes = budget_bytes
+        self.loader = loader
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        #name -> (model, size in bytes, lock serializing use of the model)
+        self._models = OrderedDict()
+        self._loading = {}
+
+    def get(self, name):
+        """Return (model, model lock, cache_hit, load_time)."""
+        while True:
+            with self._lock:
+                cached = self._models.get(name)
+                if cached is not None:
+                    self._models.move_to_end(name)
+                    self.hits += 1
+                    model, _, model_lock = cached
+                    return model, model_lock, True, 0.0
+                loading = self._loading.get(name)
+                if loading is None:
+                    loading = threading.Event()
+                    self._loading[name] = loading
+                    break
+            #another request is loading this model: wait for it, then read the cache again
+            loading.wait()
+
+        try:
+            start_load = time.time()
+            model = self.loader(name)
+            load_time = time.time() - start_load
+            stage_seconds.observe(load_time, stage="model_load", engine="whisper")
+            model_lock = threading.Lock()
+            with self._lock:
+                self.misses += 1
+                self._models[name] = (model, model_size_bytes(model), model_lock)
+                self._evict(keep=name)
+        finally:
+            with self._lock:
+                self._loading.pop(name).set()
+        return model, model_lock, False, load_time
+
+    @contextmanager
+    def use(self, name):
+        """
+        Borrow a model for one transcription.
+        Whisper installs decoding hooks on the model, so a model is used by one request at a time.
+        """
+        model, model_lock, cache_hit, load_time = self.get(name)
+        with model_lock:
+            yield model, {"cache_hit": cache_hit, "load_time": load_time}
+
+    def resident_bytes(self):
+        with self._lock:
+            return sum(size for _, size, _ in self._models.values())
+
+    def _evict(self, keep):
+        total = sum(size for _, size, _ in self._models.values())
+        for name in list(self._models):
+            if total <= self.budget_bytes:
+                break
+            if name == keep:
+                continue
+            _, size, _ = self._models.pop(name)
+            total -= size
+
+
+whisper_models = WhisperModelCache()
@@ -1,20 +1,29 @@
-import whisper
 import time
 import os
 import json
 
-def transcribe(file, model_name="base",output_dir="interface/backend/outputs/stt"):
-    # loading model
-    start_load = time.time()
-    model = whisper.load_model(model_name)
-    end_load = time.time()
-    load_time = end_load-start_load
+from models.speech_to_text.model_cache import whisper_models
+from monitoring.live_stats import registry as live_stats
+from monitoring.metrics import stage_seconds
 
-    # transcription
-    start_transcribe = time.time()
-    result = model.transcribe(file)
-    end_transcribe = time.time()
-    transcription_time = end_transcribe-start_transcribe
+# stats_key: when set, progress is published to the live stats registry under that key
+def transcribe(file, model_name="base",output_dir="interface/backend/outputs/stt",stats_key=None):
+    live_stats.start(stats_key, "audio", stage="loading_model", model_used=model_name)
+    try:
+        # loading model (reused from the process-wide cache when already resident)
+        with whisper_models.use(model_name) as (model, cache_info):
+            load_time = cache_info["load_time"]
+            live_stats.update(stats_key, stage="transcribing", load_time=load_time, cache_hit=cache_info["cache_hit"])
+
+            # transcription
+            start_transcribe = time.time()
+            result = model.transcribe(file)
+            end_transcribe = time.time()
+            transcription_time = end_transcribe-start_transcribe
+            stage_seconds.observe(transcription_time, stage="inference", engine="whisper")
+    except Exception:
+        live_stats.finish(stats_key, status="failed")
+        raise
 
     # statistics
     stats = {}
@@ -22,6 +31,9 @@ def transcribe(file, model_name="base",output_dir="interface/backend/outputs/stt
     stats["transcription_time"]=transcription_time
     stats["total_process_time"]=load_time+transcription_time
     stats["model_used"]=model_name
+    stats["cache_hit"]=cache_info["cache_hit"]
+    stats["cache_hits"]=whisper_models.hits
+    stats["cache_misses"]=whisper_models.misses
 
     file_name = os.path.splitext(os.path.basename(file))[0]
     # create outputs dir
@@ -35,6 +47,7 @@ def transcribe(file, model_name="base",output_dir="interface/backend/outputs/stt
     with open(json_path, "w", encoding="utf-8") as f:
         json.dump(stats, f, indent=4)
 
+    live_stats.finish(stats_key, stage="done", **stats)
     return result["text"], stats
 
 if '__main__'==__name__:
@@ -17,7 +17,6 @@ try:
     while True:
         #energy
         energy_info = get_energy_info()
-        cur_energy_info = get_energy_data_for_cur_log(energy_info)
         #camera
         cam_presence=get_cur_camera_presence()
         #hailo
@@ -30,25 +29,28 @@ try:
         mem_data = get_memory_info()
         cur_mem_disk_data=current_mem_disk_stats(mem_data,disk_data)
 
+        #parts of the current snapshot, written once per cycle so readers never see a half-updated state
+        cur_stats = {}
+
         #energy
         if energy_info:
             save_to_json(JSON_FILE, energy_info)
-            save_cur_stats_json(glob_filename,cur_energy_info)
+            cur_stats.update(get_energy_data_for_cur_log(energy_info))
             logging.info("Saved energy information")
         else:
             logging.warning("No energy data available yet")
         #camera
         save_to_json(CAMERA_LOG_FILE, cam_presence)
-        save_cur_stats_json(glob_filename, cam_presence)
+        cur_stats.update(cam_presence)
         logging.info("Saved camera presence information")
         #hailo
         save_to_json(HAILO_LOG_FILE, hailo_presence)
-        save_cur_stats_json(glob_filename, hailo_presence)
+        cur_stats.update(hailo_presence)
         logging.info("Saved hailo presence information")
         #temperature
         if temp_data:
             save_to_json(TEMP_LOG_FILE, temp_data)
-            save_cur_stats_json(glob_filename,cur_temp_data)
+            cur_stats.update(cur_temp_data)
             logging.info("Saved temperature information")
         else:
             logging.warning("No temperature data available yet")
@@ -56,11 +58,13 @@ try:
         if disk_data and mem_data:
             save_to_json("disk_log.json", {"timestamp": datetime.datetime.now().isoformat(), "disks": disk_data})
             save_to_json("memory_log.json", mem_data)
-            save_cur_stats_json(glob_filename, cur_mem_disk_data)
+            cur_stats.update(cur_mem_disk_data)
             logging.info("Saved memory information")
         else:
             logging.warning("No memory data available yet")
 
+        save_cur_stats_json(glob_filename, cur_stats)
+
         time.sleep(glob_interval)
 
 except KeyboardInterrupt:
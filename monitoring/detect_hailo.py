@@ -1,23 +1,144 @@
 import datetime
 import glob
+import importlib
+import logging
+import os
+import threading
 
 try:
     from global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
 except:
     from monitoring.global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
 
-def is_hailo_hat_present():
+HAILO_DEVICE_GLOB = "/dev/hailo*"
+
+
+def _load_hailort():
     try:
-        from hailort import Device
+        return importlib.import_module("hailort")
+    except ImportError:
+        return None
+
+
+class HailoService:
+    """
+    Presence/capability of the Hailo HAT, probed once and cached.
+    The cache is invalidated when the /dev/hailo* device nodes change.
+    Telemetry reads (temperature) share one long-lived Device handle, opened on the
+    first read, instead of opening a new Device on every call.
+    `device_module` is the hailort module (or a fake one exposing `Device` in tests).
+    """
+
+    def __init__(self, device_module=None, device_glob=HAILO_DEVICE_GLOB, module_loader=_load_hailort):
+        self.device_glob = device_glob
+        self._device_module = device_module
+        self._module_loader = module_loader
+        self._lock = threading.RLock()
+        self._signature = None
+        self._info = None
+        self._device = None
+
+    def _nodes_signature(self):
+        nodes = []
+        for path in sorted(glob.glob(self.device_glob)):
+            try:
+                stat = os.stat(path)
+                nodes.append((path, stat.st_ino, stat.st_ctime_ns))
+            except OSError:
+                continue
+        return tuple(nodes)
+
+    def _module(self):
+        if self._device_module is None and self._module_loader is not None:
+            self._device_module = self._module_loader()
+            #only try to import once
+            self._module_loader = None
+        return self._device_module
+
+    def _close_device(self):
+        if self._device is not None:
+            try:
+                #same as leaving the `with Device()` block
+                self._device.__exit__(None, None, None)
+            except Exception:
+                pass
+            self._device = None
+
+    def _open_device(self):
+        module = self._module()
+        if module is None:
+            return None
         try:
-            with Device() as _:
-                return True
+            device = module.Device()
+            device.__enter__()
         except Exception:
-            pass
-    except ImportError:
-        pass
+            return None
+        self._device = device
+        return device
+
+    def _probe(self, signature):
+        self._close_device()
+        device = self._open_device()
+        info = {
+            "present": device is not None or bool(signature),
+            "device_nodes": [node[0] for node in signature],
+            "runtime_available": self._module() is not None,
+            "probed_at": datetime.datetime.now().isoformat(),
+        }
+        if device is not None:
+            try:
+                info["board"] = str(device.control.identify())
+            except Exception:
+                pass
+        #don't hold the device in processes that only need presence (inference opens it too)
+        self._close_device()
+        self._info = info
+        self._signature = signature
+
+    def info(self):
+        """Cached presence/capability information (re-probed when /dev/hailo* changes)."""
+        signature = self._nodes_signature()
+        with self._lock:
+            if self._info is None or signature != self._signature:
+                self._probe(signature)
+            return dict(self._info)
+
+    def is_present(self):
+        return self.info()["present"]
+
+    def device(self):
+        """Shared Device handle, opened on first use; None without runtime or device."""
+        if not self.is_present():
+            return None
+        with self._lock:
+            if self._device is None:
+                self._open_device()
+            return self._device
+
+    def read_temperature(self):
+        with self._lock:
+            device = self.device()
+            if device is None:
+                return None
+            try:
+                return device.get_chip_temperature()
+            except Exception:
+                #the handle may be stale (device reset/unplugged): reopen it on the next read
+                logging.warning("Failed to read Hailo temperature, dropping device handle")
+                self._close_device()
+                return None
 
-    return bool(glob.glob("/dev/hailo*"))
+    def invalidate(self):
+        with self._lock:
+            self._close_device()
+            self._info = None
+
+
+hailo_service = HailoService()
+
+
+def is_hailo_hat_present():
+    return hailo_service.is_present()
 
 
 def get_cur_hailo_presence():
@@ -0,0 +1,145 @@
+import datetime
+import threading
+import time
+
+try:
+    from metrics import detections, frames_processed
+except ImportError:
+    from monitoring.metrics import detections, frames_processed
+
+#minimum time between two window FPS computations (seconds)
+WINDOW_SECONDS = 1.0
+#number of finished runs kept so clients can still read their final numbers
+KEEP_FINISHED = 20
+
+
+class LiveStatsRegistry:
+    """
+    In-memory statistics of the analyses running in this process.
+    Detection loops and transcriptions update it, the API reads it.
+    Every update bumps `version` so readers can cheaply tell when something changed.
+    """
+
+    def __init__(self, window_seconds=WINDOW_SECONDS, keep_finished=KEEP_FINISHED):
+        self.window_seconds = window_seconds
+        self.keep_finished = keep_finished
+        self.version = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._windows = {}
+        self._finished = []
+
+    def start(self, key, kind, **fields):
+        if key is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            self._entries[key] = {
+                "key": key,
+                "kind": kind,
+                "status": "running",
+                "started_at": datetime.datetime.now().isoformat(),
+                "elapsed_seconds": 0.0,
+                **fields,
+            }
+            #(start time, last window time, frames at last window)
+            self._windows[key] = (now, now, 0)
+            #a restarted key is running again, it must not be evicted as a finished one
+            if key in self._finished:
+                self._finished.remove(key)
+            self.version += 1
+
+    def update(self, key, **fields):
+        if key is None:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.update(fields)
+            window = self._windows.get(key)
+            if window is not None:
+                #finished entries keep their final elapsed time
+                entry["elapsed_seconds"] = round(time.perf_counter() - window[0], 3)
+            self.version += 1
+
+    def report_frames(self, key, frames_done, total_detections, peak_detections=None):
+        """Record progress of a detection loop, window FPS is recomputed about once per second."""
+        if key is None:
+            return
+        now = time.perf_counter()
+        with self._lock:
+            entry = self._entries.get(key)
+            state = self._windows.get(key)
+            #late reports of a finished run are ignored
+            if entry is None or state is None:
+                return
+            backend = entry.get("backend", "unknown")
+            frames_processed.inc(max(0, frames_done - entry.get("frames_done", 0)), backend=backend)
+            detections.inc(max(0, total_detections - entry.get("total_detections", 0)), backend=backend)
+            entry["frames_done"] = frames_done
+            entry["total_detections"] = total_detections
+            if peak_detections is not None:
+                entry["peak_detections_per_frame"] = peak_detections
+
+            start, last_time, last_frames = state
+            window = now - last_time
+            if window < self.window_seconds and "window_fps" in entry:
+                return
+            total = now - start
+            entry["window_fps"] = round((frames_done - last_frames) / window, 2) if window > 0 else 0.0
+            entry["average_fps"] = round(frames_done / total, 2) if total > 0 else 0.0
+            entry["elapsed_seconds"] = round(total, 3)
+            self._windows[key] = (start, now, frames_done)
+            self.version += 1
+
+    def finish(self, key, status="done", **fields):
+        if key is None:
+            return
+        with self._lock:
+            entry = self._entries.get(key)
+            window = self._windows.pop(key, None)
+            #already finished
+            if entry is None or window is None:
+                return
+            start, _, _ = window
+            entry.update(fields)
+            entry["status"] = status
+            entry["elapsed_seconds"] = round(time.perf_counter() - start, 3)
+            entry["finished_at"] = datetime.datetime.now().isoformat()
+            self._finished.append(key)
+            while len(self._finished) > self.keep_finished:
+                self._entries.pop(self._finished.pop(0), None)
+            self.version += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry is not None else None
+
+    def find(self, key):
+        """Entry `key` and the per-file entries `key/<index>` of a batch, in file order."""
+        def order(item):
+            #file indexes sort as numbers: key/2 before key/10
+            index = item[0][len(key) + 1:]
+            return (item[0] != key, int(index) if index.isdigit() else float("inf"), index)
+
+        with self._lock:
+            matches = [
+                (entry_key, entry)
+                for entry_key, entry in self._entries.items()
+                if entry_key == key or entry_key.startswith(f"{key}/")
+            ]
+            return [dict(entry) for _, entry in sorted(matches, key=order)]
+
+    def active(self, kind=None):
+        """Running entries (optionally of one kind), most recently started last."""
+        with self._lock:
+            return [
+                dict(entry)
+                for entry in self._entries.values()
+                if entry["status"] == "running" and (kind is None or entry["kind"] == kind)
+            ]
+
+
+registry = LiveStatsRegistry()
@@ -4,10 +4,10 @@ import datetime
 import time
 import logging
 
-from global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
-
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
-
+try:
+    from global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
+except ImportError:
+    from monitoring.global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
 
 
 def get_disk_info():
@@ -88,6 +88,8 @@ def current_mem_disk_stats(memory_info, disk_info):
 
 
 if __name__ == "__main__":
+    #configured only when run as a script: importers (the backend) keep their own logging setup
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
     try:
         while True:
             memory_info = get_memory_info()
@@ -0,0 +1,193 @@
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+#upper bounds (seconds) of the stage duration histogram buckets, from one frame to a long transcription
+STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_value(value):
+    if value is None:
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        return tuple(zip(self.labelnames, key)) + tuple(extra)
+
+    def samples(self):
+        """[(name, labels, value)] in exposition order."""
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in sorted(self._values.items())]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        return [(f"{self.name}_total", labels, value) for _, labels, value in super().samples()]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                #one count per bucket (non cumulative), then sum and number of observations
+                counts = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, list(counts)) for key, counts in self._values.items())
+        samples = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append((f"{self.name}_bucket", self._labels(key, [("le", _format_value(float(bound)))]), cumulative))
+            samples.append((f"{self.name}_bucket", self._labels(key, [("le", "+Inf")]), counts[-1]))
+            samples.append((f"{self.name}_sum", self._labels(key), counts[-2]))
+            samples.append((f"{self.name}_count", self._labels(key), counts[-1]))
+        return samples
+
+
+class MetricsRegistry:
+    """
+    Counters, gauges and histograms of this process, rendered in the Prometheus text format.
+    Collectors are called at scrape time for values that are cheaper to read than to track
+    (queue depth, RAM, temperature...): each returns [(metric type, name, help, [(labels dict, value)])].
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=STAGE_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def exposition(self):
+        lines = []
+
+        def family(metric_type, name, documentation, samples):
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        for metric in metrics:
+            family(metric.type, metric.name, metric.documentation, metric.samples())
+        for collector in collectors:
+            for metric_type, name, documentation, values in collector():
+                samples = [
+                    (name, tuple(sorted(labels.items())), value)
+                    for labels, value in values
+                    if value is not None
+                ]
+                family(metric_type, name, documentation, samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+#time spent per stage of a request: upload_write, queue_wait, model_load, inference, encode, cleanup
+stage_seconds = registry.histogram(
+    "pi2025_stage_duration_seconds",
+    "Time spent in one stage of an analysis request.",
+    ("stage", "engine"),
+)
+frames_processed = registry.counter(
+    "pi2025_frames_processed", "Video frames run through a detector.", ("backend",)
+)
+detections = registry.counter(
+    "pi2025_detections", "Objects detected in processed frames.", ("backend",)
+)
+jobs_finished = registry.counter(
+    "pi2025_jobs_finished", "Analysis jobs that reached a final status.", ("kind", "status")
+)
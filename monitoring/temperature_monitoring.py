@@ -6,7 +6,10 @@ import glob
 import statistics
 import logging
 
-from global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
+try:
+    from global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
+except ImportError:
+    from monitoring.global_monitoring_functions import save_cur_stats_json, save_to_json, glob_filename
 
 #ensure psutil name exists even if import fails
 psutil = None
@@ -16,7 +19,6 @@ try:
 except Exception:
     psutil = None
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
 
 #checking if the device the monitoring is used on is an rpi5
 def is_raspberry_pi():
@@ -36,12 +38,11 @@ def is_raspberry_pi():
 
     return False
 
-#Boolean variable initialisation (for hailo presence)
+#shared hailo presence service (one long-lived device handle for temperature reads)
 try:
-    from hailort import Device
-    HAILO = True
+    from detect_hailo import hailo_service
 except ImportError:
-    HAILO = False
+    from monitoring.detect_hailo import hailo_service
 
 file = "temp_stats.json"
 
@@ -126,14 +127,7 @@ def get_cpu_temp():
 
 #Function to get the Hailo hat temperature 
 def get_hailo_temperature():
-    if not HAILO:
-        return None
-
-    try:
-        with Device() as device:
-            return device.get_chip_temperature()
-    except:
-        return None
+    return hailo_service.read_temperature()
     
 
 def get_temp_info():
@@ -157,8 +151,10 @@ def get_temp_data_for_cur_log(data):
 
 
 if __name__ == "__main__":
+    #configured only when run as a script: importers (the backend) keep their own logging setup
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s: %(message)s")
     print(f"Raspberry Pi: {is_raspberry_pi()}")
-    print(f"Hailo available: {HAILO}")
+    print(f"Hailo available: {hailo_service.is_present()}")
     while True:
         data = get_temp_info()
         data_cur = get_temp_data_for_cur_log(data)
@@ -0,0 +1,24 @@
+import stat
+import sys
+
+import pytest
+
+from interface.backend.AI import ffmpeg_writer
+
+FAKE_FFMPEG = """#!{python}
+# copies the piped raw frames to the output file (the last argument)
+import shutil, sys
+with open(sys.argv[-1], "wb") as output:
+    shutil.copyfileobj(sys.stdin.buffer, output)
+"""
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """An `ffmpeg` executable that writes its raw input to the output path."""
+    path = tmp_path / "bin" / "ffmpeg"
+    path.parent.mkdir()
+    path.write_text(FAKE_FFMPEG.format(python=sys.executable), encoding="utf-8")
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setattr(ffmpeg_writer, "FFMPEG_BIN", str(path))
+    return path
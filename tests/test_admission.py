@@ -0,0 +1,156 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from interface.backend import admission, main
+from interface.backend.admission import DEFER, DEGRADE, RUN, AdmissionController
+from interface.backend.jobs import JobManager
+from interface.backend.result_cache import ResultCache
+from interface.backend.uploads import StagedUpload
+
+
+class Sensors:
+    """Temperature, memory and swap counters the tests can change."""
+
+    def __init__(self, temperature=50.0, ram=40.0, swap=0.0):
+        self.temperature = temperature
+        self.ram = ram
+        self.swap = swap
+        self.swapped = 0
+
+    def controller(self, **kwargs):
+        return AdmissionController(
+            read_temperature=lambda: self.temperature,
+            read_memory=lambda: {"ram_percent_used": self.ram, "swap_percent_used": self.swap},
+            read_swapped=lambda: self.swapped,
+            **kwargs,
+        )
+
+
+@pytest.fixture(autouse=True)
+def fresh_readings(monkeypatch):
+    monkeypatch.setattr(admission, "READ_INTERVAL", 0.0)
+    monkeypatch.setattr(admission, "WAIT_INTERVAL", 0.01)
+
+
+def test_thresholds():
+    sensors = Sensors()
+    controller = sensors.controller()
+    assert controller.evaluate("video", {})["action"] == RUN
+    sensors.temperature = admission.TEMP_DEGRADE_C
+    assert controller.evaluate("video", {})["action"] == DEGRADE
+    sensors.temperature = admission.TEMP_DEFER_C
+    decision = controller.evaluate("video", {})
+    assert decision["action"] == DEFER and "cpu temperature" in decision["reasons"][0]
+    sensors.temperature = 50.0
+    sensors.ram = admission.RAM_DEGRADE_PERCENT
+    assert controller.evaluate("video", {})["action"] == DEGRADE
+    sensors.ram = admission.RAM_DEFER_PERCENT
+    assert controller.evaluate("video", {})["action"] == DEFER
+
+
+def test_swap_usage_alone_does_not_defer():
+    sensors = Sensors(swap=95.0)
+    controller = sensors.controller()
+    controller.evaluate("video", {})
+    assert controller.evaluate("video", {})["action"] == RUN
+
+
+def test_swap_rate_from_psutil_counters(monkeypatch):
+    counters = iter([SimpleNamespace(sin=0, sout=0), SimpleNamespace(sin=20 * 2**20, sout=40 * 2**20)])
+    monkeypatch.setattr(admission.psutil, "swap_memory", lambda: next(counters))
+    now = 100.0
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now)
+    controller = AdmissionController(read_temperature=lambda: 50.0, read_memory=lambda: {"ram_percent_used": 40.0})
+    assert controller.readings()["swap_io_mb_s"] is None
+    now = 110.0
+    # 60 MB moved in 10 s
+    assert controller.readings()["swap_io_mb_s"] == 6.0
+
+
+def test_swapping_defers():
+    sensors = Sensors()
+    controller = sensors.controller()
+    controller.evaluate("video", {})
+    sensors.swapped += 512 * 2**20
+    decision = controller.evaluate("video", {})
+    assert decision["action"] == DEFER and decision["reasons"][0].startswith("swapping")
+
+
+def test_degrade_halves_fps_and_picks_a_smaller_whisper_model():
+    sensors = Sensors(temperature=admission.TEMP_DEGRADE_C)
+    controller = sensors.controller()
+    video = controller.admit("video", {"fps": 15, "isHat": False})
+    assert video["action"] == DEGRADE
+    assert video["params"] == {"fps": 7, "isHat": False}
+    assert video["requested_params"]["fps"] == 15
+    audio = controller.admit("audio", {"model": "medium.en"})
+    assert audio["params"] == {"model": "small.en"}
+    assert admission.smaller_whisper_model("turbo") == "small"
+    assert admission.smaller_whisper_model("tiny") is None
+
+
+def test_nothing_to_degrade_runs_as_requested():
+    sensors = Sensors(temperature=admission.TEMP_DEGRADE_C)
+    decision = sensors.controller().admit("video", {"fps": 1})
+    assert decision["action"] == RUN and decision["params"] == {"fps": 1}
+
+
+def test_admit_waits_for_the_device_to_cool_down():
+    sensors = Sensors(temperature=admission.TEMP_DEFER_C)
+    controller = sensors.controller(max_wait=5)
+    calls = 0
+    read = controller.read_temperature
+
+    def cooling():
+        nonlocal calls
+        calls += 1
+        if calls == 3:
+            sensors.temperature = 50.0
+        return read()
+
+    controller.read_temperature = cooling
+    decision = controller.admit("video", {"fps": 10})
+    assert decision["action"] == RUN and decision["params"] == {"fps": 10}
+    assert decision["waited_seconds"] > 0
+
+
+def test_admit_runs_degraded_after_max_wait():
+    sensors = Sensors(temperature=admission.TEMP_DEFER_C)
+    decision = sensors.controller(max_wait=0.05).admit("video", {"fps": 10})
+    assert decision["action"] == DEGRADE and decision["params"]["fps"] == 5
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "result_cache", ResultCache(tmp_path / "cache"))
+    monkeypatch.setattr(main, "jobs", JobManager({"video": lambda job: {}}, jobs_dir=tmp_path / "jobs", max_queued=1))
+    return tmp_path
+
+
+def staged(tmp_path, sha256):
+    path = tmp_path / "staging" / sha256 / "clip.mp4"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"video")
+    return StagedUpload(path, sha256, 5)
+
+
+def test_submit_job_answers_503_while_deferring(backend, monkeypatch):
+    sensors = Sensors(temperature=admission.TEMP_DEFER_C)
+    monkeypatch.setattr(main, "admission", sensors.controller())
+    upload = staged(backend, "aaa")
+    response = asyncio.run(main.submit_job("video", {"fps": 10, "isHat": False}, [upload]))
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == str(admission.RETRY_AFTER_SECONDS)
+    assert not upload.path.exists()
+
+
+def test_submit_job_answers_429_when_the_queue_is_full(backend, monkeypatch):
+    monkeypatch.setattr(main, "admission", Sensors().controller())
+    first = asyncio.run(main.submit_job("video", {"fps": 10, "isHat": False}, [staged(backend, "aaa")]))
+    assert first.status_code == 202
+    upload = staged(backend, "bbb")
+    response = asyncio.run(main.submit_job("video", {"fps": 10, "isHat": False}, [upload]))
+    assert response.status_code == 429
+    assert not upload.path.exists()
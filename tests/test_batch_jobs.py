@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from interface.backend import main
+from interface.backend.jobs import DONE, Job, JobManager
+from interface.backend.result_cache import ResultCache
+from interface.backend.uploads import StagedUpload
+
+PARAMS = {"isHat": False, "fps": 10}
+
+
+class StubAdmission:
+    def __init__(self, action="run"):
+        self.action = action
+
+    def admit(self, kind, params):
+        return {"action": self.action, "reasons": ["cpu temperature 78 °C >= 72 °C"], "params": params}
+
+    def evaluate(self, kind, params):
+        return {"action": self.action, "reasons": [], "readings": {}, "params": params}
+
+
+class StubRetention:
+    def __init__(self):
+        self.touched = []
+
+    def touch(self, job_id):
+        self.touched.append(job_id)
+
+    def request_sweep(self):
+        pass
+
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUTS_DIR", tmp_path / "outputs")
+    monkeypatch.setattr(main, "result_cache", ResultCache(tmp_path / "outputs" / ".cache"))
+    monkeypatch.setattr(main, "retention", StubRetention())
+    monkeypatch.setattr(main, "admission", StubAdmission("degrade"))
+    monkeypatch.setattr(main, "jobs", JobManager({"video": main.run_video_job}, jobs_dir=tmp_path / "jobs"))
+    return tmp_path
+
+
+def staged_file(tmp_path, name, sha256):
+    path = tmp_path / "staging" / sha256 / name
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"video")
+    return StagedUpload(path, sha256, 5)
+
+
+def run_file(job, index, path, params):
+    output_dir = main.OUTPUTS_DIR / job.id / f"file-{index}"
+    output_dir.mkdir(parents=True)
+    (output_dir / "result.mp4").write_bytes(b"annotated")
+    return {"video": str(output_dir / "result.mp4"), "stats": {"frames_processed": 3, "total_detections": 2}}
+
+
+def test_admission_decision_is_not_cached(backend):
+    first = Job("video", PARAMS, [{"path": str(staged_file(backend, "a.mp4", "aaa").path), "sha256": "aaa"}])
+    result = main.run_batch(first, run_file)
+    assert result["stats"]["admission"]["action"] == "degrade"
+    assert result["admission"]["action"] == "degrade"
+
+    entry = main.result_cache.get(main.result_key("video", "aaa", PARAMS))
+    assert "admission" not in entry["result"]["stats"]
+
+    main.admission.action = "run"
+    second = Job("video", PARAMS, [{"path": str(staged_file(backend, "a.mp4", "aaa2").path), "sha256": "aaa"}])
+    replayed = main.run_batch(second, run_file)
+    assert replayed["cached"]
+    assert "admission" not in replayed["stats"]
+    assert replayed["admission"]["action"] == "run"
+    assert main.retention.touched == [first.id]
+
+
+def test_fully_cached_submission_gets_a_finished_job(backend):
+    for sha256 in ("aaa", "bbb"):
+        job = Job("video", PARAMS, [{"path": str(staged_file(backend, "x.mp4", sha256 + "0").path), "sha256": sha256}])
+        main.run_batch(job, run_file)
+
+    staged = [staged_file(backend, "a.mp4", "aaa"), staged_file(backend, "b.mp4", "bbb")]
+    response = asyncio.run(main.submit_job("video", PARAMS, staged))
+    assert response["status"] == DONE and response["cached"]
+    assert response["status_url"] == f"/jobs/{response['job_id']}"
+    job = main.jobs.get(response["job_id"])
+    assert job.status == DONE
+    assert [item["file"] for item in job.result["files"]] == ["a.mp4", "b.mp4"]
+    assert job.result["aggregate"]["files_from_cache"] == 2
+    assert not any(item.path.exists() for item in staged)
@@ -0,0 +1,95 @@
+import os
+import sys
+import types
+
+import pytest
+
+from interface.backend.AI import cpu_backends
+
+
+class StubYOLO:
+    """ultralytics.YOLO stand-in whose export writes the file an exporter would produce."""
+
+    exports = []
+    fail = False
+
+    def __init__(self, path):
+        self.path = path
+
+    def export(self, format, verbose=False, **kwargs):
+        StubYOLO.exports.append((format, kwargs))
+        if StubYOLO.fail:
+            raise ImportError(f"{format} runtime is not installed")
+        stem = os.path.splitext(self.path)[0]
+        if format == "onnx":
+            output = f"{stem}.onnx"
+            open(output, "wb").close()
+        else:
+            output = f"{stem}_{format}_model"
+            os.makedirs(output, exist_ok=True)
+        return output
+
+
+@pytest.fixture
+def exporter(monkeypatch):
+    StubYOLO.exports = []
+    StubYOLO.fail = False
+    monkeypatch.setitem(sys.modules, "ultralytics", types.SimpleNamespace(YOLO=StubYOLO))
+    return StubYOLO
+
+
+@pytest.fixture
+def model(tmp_path):
+    path = tmp_path / "yolo11n.pt"
+    path.write_bytes(b"weights")
+    return path
+
+
+def test_exported_model_is_cached_next_to_the_pt(exporter, model):
+    path, backend = cpu_backends.resolve_model(model, "onnx")
+    assert (path, backend) == (model.with_name("yolo11n.onnx"), "onnx")
+    assert path.exists()
+    # found again without exporting
+    assert cpu_backends.resolve_model(model, "ONNX") == (path, "onnx")
+    assert len(exporter.exports) == 1
+
+
+def test_export_is_renamed_to_the_cached_name(exporter, model):
+    path, backend = cpu_backends.resolve_model(model, "openvino-int8")
+    assert path == model.with_name("yolo11n_int8_openvino_model") and path.is_dir()
+    assert backend == "openvino-int8"
+    format, kwargs = exporter.exports[0]
+    assert format == "openvino" and kwargs["int8"] and kwargs["data"] == cpu_backends.INT8_DATA
+
+
+def test_stale_export_is_redone(exporter, model):
+    path, _ = cpu_backends.resolve_model(model, "onnx")
+    # a newer .pt makes the cached export stale
+    os.utime(path, (1, 1))
+    cpu_backends.resolve_model(model, "onnx")
+    assert len(exporter.exports) == 2
+
+
+def test_unavailable_backend_falls_back_to_pytorch(exporter, model):
+    exporter.fail = True
+    assert cpu_backends.resolve_model(model, "openvino") == (model, "pytorch")
+    assert not model.with_name("yolo11n_openvino_model").exists()
+
+
+def test_pytorch_and_non_pt_models_are_used_as_is(exporter, model, tmp_path):
+    assert cpu_backends.resolve_model(model, "pytorch") == (model, "pytorch")
+    onnx = tmp_path / "other.onnx"
+    assert cpu_backends.resolve_model(onnx, "openvino") == (onnx, "onnx")
+    assert exporter.exports == []
+
+
+def test_unknown_backend_is_rejected(model):
+    with pytest.raises(ValueError, match="Unknown CPU backend"):
+        cpu_backends.resolve_model(model, "tensorrt")
+
+
+def test_backend_capabilities():
+    assert cpu_backends.max_batch_size("ncnn") == 1
+    assert cpu_backends.max_batch_size("onnx") is None
+    assert not cpu_backends.supports_input_size("ncnn")
+    assert cpu_backends.supports_input_size("openvino")
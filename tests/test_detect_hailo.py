@@ -0,0 +1,109 @@
+from monitoring.detect_hailo import HailoService
+
+
+class FakeControl:
+    def identify(self):
+        return "Hailo-8L"
+
+
+class FakeDevice:
+    def __init__(self, module):
+        self.module = module
+        self.control = FakeControl()
+        self.open = False
+
+    def __enter__(self):
+        self.module.opened += 1
+        self.open = True
+        return self
+
+    def __exit__(self, *exc):
+        self.module.closed += 1
+        self.open = False
+
+    def get_chip_temperature(self):
+        if self.module.fail_reads:
+            self.module.fail_reads -= 1
+            raise RuntimeError("device reset")
+        self.module.reads += 1
+        return 51.5
+
+
+class FakeHailort:
+    """Stands in for the hailort module: counts Device opens, closes and reads."""
+
+    def __init__(self):
+        self.opened = 0
+        self.closed = 0
+        self.reads = 0
+        self.fail_reads = 0
+        self.devices = []
+
+    def Device(self):
+        device = FakeDevice(self)
+        self.devices.append(device)
+        return device
+
+
+def service(tmp_path, module):
+    (tmp_path / "hailo0").touch()
+    return HailoService(device_module=module, device_glob=str(tmp_path / "hailo*"))
+
+
+def test_presence_is_probed_once_and_cached(tmp_path):
+    module = FakeHailort()
+    hailo = service(tmp_path, module)
+    info = hailo.info()
+    assert info["present"] and info["runtime_available"]
+    assert info["board"] == "Hailo-8L"
+    assert hailo.is_present() and hailo.is_present()
+    # the probe opened the device once and did not keep it
+    assert module.opened == module.closed == 1
+
+
+def test_presence_is_probed_again_when_device_nodes_change(tmp_path):
+    module = FakeHailort()
+    hailo = service(tmp_path, module)
+    hailo.info()
+    (tmp_path / "hailo1").touch()
+    assert hailo.info()["device_nodes"] == [str(tmp_path / "hailo0"), str(tmp_path / "hailo1")]
+    assert module.opened == 2
+
+
+def test_temperature_reads_reuse_one_device_handle(tmp_path):
+    module = FakeHailort()
+    hailo = service(tmp_path, module)
+    assert [hailo.read_temperature() for _ in range(5)] == [51.5] * 5
+    # one open for the probe, one for the shared telemetry handle
+    assert module.opened == 2
+    assert module.reads == 5
+    assert hailo.device() is module.devices[-1] and module.devices[-1].open
+
+
+def test_failed_read_drops_the_handle_and_reopens(tmp_path):
+    module = FakeHailort()
+    hailo = service(tmp_path, module)
+    assert hailo.read_temperature() == 51.5
+    stale = hailo.device()
+    module.fail_reads = 1
+    assert hailo.read_temperature() is None
+    assert not stale.open
+    assert hailo.read_temperature() == 51.5
+    assert hailo.device() is not stale
+
+
+def test_without_runtime_or_device(tmp_path):
+    hailo = HailoService(device_module=None, device_glob=str(tmp_path / "hailo*"), module_loader=lambda: None)
+    assert not hailo.is_present()
+    assert hailo.device() is None
+    assert hailo.read_temperature() is None
+
+
+def test_invalidate_closes_the_handle(tmp_path):
+    module = FakeHailort()
+    hailo = service(tmp_path, module)
+    hailo.read_temperature()
+    hailo.invalidate()
+    assert module.opened == module.closed
+    hailo.info()
+    assert module.opened == 3
@@ -0,0 +1,62 @@
+import numpy as np
+
+from interface.backend.AI.detection_log import (
+    DETECTION_DTYPE,
+    DetectionLog,
+    merge_detection_logs,
+    read_detection_log,
+)
+
+
+def write_log(path, frames, chunk_rows=3):
+    """One detection per frame plus a second one on even frames."""
+    log = DetectionLog(path, chunk_rows=chunk_rows)
+    for frame in range(frames):
+        count = 2 if frame % 2 == 0 else 1
+        boxes = np.array([[0.1, 0.2, 0.3, 0.4], [0.5, 0.5, 1.0, 1.0]][:count])
+        log.append(frame, frame / 10, boxes, [frame % 3, 7][:count], [0.9, 0.5][:count], track_ids=[frame, -1][:count])
+    log.class_names = {7: "helmet", 0: "person"}
+    return log
+
+
+def test_round_trip_through_np_load(tmp_path):
+    log = write_log(tmp_path / "video.detections.npy", 5)
+    summary = log.close()
+    assert summary == {
+        "path": "video.detections.npy",
+        "rows": 8,
+        "frames": 5,
+        "class_names": {"0": "person", "7": "helmet"},
+    }
+
+    rows = np.load(tmp_path / "video.detections.npy", mmap_mode="r")
+    assert rows.dtype == DETECTION_DTYPE
+    assert rows["frame"].tolist() == [0, 0, 1, 2, 2, 3, 4, 4]
+    assert rows["class_id"].tolist() == [0, 7, 1, 2, 7, 0, 1, 7]
+    assert rows["track_id"].tolist() == [0, -1, 1, 2, -1, 3, 4, -1]
+    np.testing.assert_allclose(rows["time"][:3], [0.0, 0.0, 0.1])
+    np.testing.assert_allclose(rows["confidence"][:2], [0.9, 0.5])
+    first = rows[0]
+    np.testing.assert_allclose([first["x1"], first["y1"], first["x2"], first["y2"]], [0.1, 0.2, 0.3, 0.4])
+
+
+def test_running_log_is_readable_before_close(tmp_path):
+    log = write_log(tmp_path / "run.npy", 3)
+    log.flush()
+    assert read_detection_log(tmp_path / "run.npy")["frame"].tolist() == [0, 0, 1, 2, 2]
+    log.close()
+
+
+def test_merge_renumbers_shard_frames(tmp_path):
+    first = write_log(tmp_path / "shard-0.npy", 3)
+    first.close()
+    second = write_log(tmp_path / "shard-1.npy", 2)
+    second.close()
+
+    # the first shard covered 4 frames, the last one had no detection
+    merged = merge_detection_logs([first.path, second.path], tmp_path / "video.npy", [4, 2])
+    assert merged.summary()["rows"] == 8 and merged.frames == 6
+
+    rows = np.load(tmp_path / "video.npy")
+    assert rows["frame"].tolist() == [0, 0, 1, 2, 2, 4, 4, 5]
+    assert rows["class_id"].tolist() == [0, 7, 1, 2, 7, 0, 7, 1]
@@ -0,0 +1,35 @@
+import numpy as np
+
+from interface.backend.AI.ffmpeg_writer import FfmpegPipeWriter, codec_arguments
+
+
+def test_codec_arguments_per_container():
+    assert codec_arguments(".webm")[:2] == ["-c:v", "libvpx"]
+    assert codec_arguments(".mkv")[-2:] == ["-f", "matroska"]
+    assert "-crf" not in codec_arguments(".mp4", bitrate_kbps=800)
+    assert codec_arguments(".gif") is None
+
+
+def test_writer_pipes_every_frame(fake_ffmpeg, tmp_path):
+    output = tmp_path / "out.mp4"
+    writer = FfmpegPipeWriter(output, 10, 16, 8)
+    frame = np.zeros((8, 16, 3), dtype=np.uint8)
+    for value in range(5):
+        frame[...] = value
+        writer.write(frame)
+    writer.release()
+    data = np.frombuffer(output.read_bytes(), dtype=np.uint8).reshape(5, 8, 16, 3)
+    assert [int(image[0, 0, 0]) for image in data] == list(range(5))
+    assert writer.stats()["frames_encoded"] == 5
+
+
+def test_abort_kills_ffmpeg_and_returns_buffers(fake_ffmpeg, tmp_path):
+    writer = FfmpegPipeWriter(tmp_path / "out.mp4", 10, 16, 8, queue_depth=2)
+    returned = []
+    frames = [np.zeros((8, 16, 3), dtype=np.uint8) for _ in range(3)]
+    for frame in frames:
+        writer.write(frame, on_written=returned.append)
+    writer.abort()
+    assert writer.process.returncode is not None
+    assert not writer._thread.is_alive()
+    assert len(returned) == 3
@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from interface.backend import file_serving, main
+from interface.backend.file_serving import RangeNotSatisfiable, final_recording_path, follow_file, parse_range
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=10-19", 100) == (10, 19)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=0-10,20-30", 100) is None
+    with pytest.raises(RangeNotSatisfiable):
+        parse_range("bytes=100-", 100)
+
+
+def test_final_recording_path(tmp_path):
+    assert final_recording_path(tmp_path / "video.tmp.mp4") == tmp_path / "video.mp4"
+    assert final_recording_path(tmp_path / "detections.mkv.part") == tmp_path / "detections.mkv"
+    assert final_recording_path(tmp_path / "video.mp4") is None
+
+
+def test_follow_file_ends_when_the_recording_is_renamed(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_serving, "FOLLOW_INTERVAL", 0.01)
+    recording = tmp_path / "video.tmp.mp4"
+    recording.write_bytes(b"first")
+
+    async def follow():
+        # the run is still reported as recording the whole time
+        chunks = follow_file(recording, lambda: True)
+        received = [await chunks.__anext__()]
+        with open(recording, "ab") as f:
+            f.write(b"-last")
+        recording.replace(tmp_path / "video.mp4")
+        async for chunk in chunks:
+            received.append(chunk)
+        return b"".join(received)
+
+    assert asyncio.run(asyncio.wait_for(follow(), timeout=5)) == b"first-last"
+
+
+def test_in_progress_url_redirects_to_the_final_recording(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "OUTPUTS_DIR", tmp_path)
+    (tmp_path / "job" / "file-0").mkdir(parents=True)
+    (tmp_path / "job" / "file-0" / "video.mp4").write_bytes(b"video")
+
+    response = asyncio.run(main.get_output("job/file-0/video.tmp.mp4", None))
+    assert response.status_code == 307
+    assert response.headers["location"] == f"{main.OUTPUTS_URL}/job/file-0/video.mp4"
+    assert asyncio.run(main.get_output("job/file-0/other.tmp.mp4", None)).status_code == 404
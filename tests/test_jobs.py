@@ -0,0 +1,112 @@
+import os
+import threading
+import time
+
+from interface.backend.jobs import DONE, FAILED, QUEUED, JobManager
+from interface.backend.retention import RetentionManager
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def staged(tmp_path, name):
+    path = tmp_path / "staging" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"video")
+    return {"path": str(path), "sha256": name}
+
+
+def test_identical_submissions_share_one_job(tmp_path):
+    release = threading.Event()
+    manager = JobManager({"video": lambda job: release.wait(5) and {"frames": 3}}, jobs_dir=tmp_path / "jobs")
+    manager.start()
+    try:
+        first, attached = manager.submit_or_attach("video", {"fps": 10}, [staged(tmp_path, "a")], key="k")
+        assert not attached
+        second, attached = manager.submit_or_attach("video", {"fps": 10}, [staged(tmp_path, "a")], key="k")
+        assert attached and second is first
+        other, attached = manager.submit_or_attach("video", {"fps": 5}, [staged(tmp_path, "a")], key="k2")
+        assert not attached and other is not first
+        release.set()
+        wait_for(lambda: manager.get(first.id).status == DONE and manager.get(other.id).status == DONE)
+        # once finished, the same work is queued again
+        third, attached = manager.submit_or_attach("video", {"fps": 10}, [staged(tmp_path, "a")], key="k")
+        assert not attached and third.id != first.id
+    finally:
+        release.set()
+        manager.stop(timeout=5)
+    assert manager.get(first.id).result == {"frames": 3}
+
+
+def test_queued_jobs_survive_a_restart(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    before = JobManager({"video": lambda job: {}}, jobs_dir=jobs_dir)
+    jobs_dir.mkdir()
+    # not started: the jobs stay queued on disk when the backend goes down
+    kept = before.submit("video", {"fps": 10}, [staged(tmp_path, "a")], key="ka")
+    lost = before.submit("video", {"fps": 10}, [staged(tmp_path, "b")], key="kb")
+    os.remove(lost.inputs[0]["path"])
+
+    ran = []
+    after = JobManager({"video": lambda job: ran.append(job.id) or {"ok": True}}, jobs_dir=jobs_dir)
+    after.start()
+    try:
+        wait_for(lambda: after.get(kept.id).status == DONE)
+    finally:
+        after.stop(timeout=5)
+    assert ran == [kept.id]
+    assert after.get(kept.id).params == {"fps": 10}
+    assert after.get(lost.id).status == FAILED
+
+
+def test_restored_job_coalesces_new_submissions(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    job = JobManager({"video": lambda job: {}}, jobs_dir=jobs_dir).submit("video", {}, [staged(tmp_path, "a")], key="k")
+    after = JobManager({"video": lambda job: {}}, jobs_dir=jobs_dir)
+    after._restore()
+    assert after.get(job.id).status == QUEUED
+    assert after.submit_or_attach("video", {}, [staged(tmp_path, "a")], key="k") == (after.get(job.id), True)
+
+
+def age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_retention_prunes_finished_job_files(tmp_path):
+    outputs = tmp_path / "outputs"
+    jobs_dir = tmp_path / "jobs"
+    outputs.mkdir()
+    jobs_dir.mkdir()
+    for job_id in ("old", "recent", "cached", "fresh", "active"):
+        (jobs_dir / f"{job_id}.json").write_text("{}")
+    for job_id in ("old", "recent", "active"):
+        (outputs / job_id).mkdir()
+        (outputs / job_id / "video.mp4").write_bytes(b"x")
+    for path in (outputs / "old", outputs / "active", jobs_dir / "old.json", jobs_dir / "cached.json",
+                 jobs_dir / "recent.json", jobs_dir / "active.json"):
+        age(path, 7200)
+
+    retention = RetentionManager(outputs, jobs_dir=jobs_dir, max_age_seconds=3600, protected=lambda: {"active"})
+    retention.sweep()
+    # outputs deleted with their job file, an old job without outputs too,
+    # a job file older than its outputs stays while they are kept
+    assert sorted(path.stem for path in jobs_dir.glob("*.json")) == ["active", "fresh", "recent"]
+    assert sorted(path.name for path in outputs.iterdir()) == ["active", "recent"]
+
+
+def test_touched_job_file_is_kept(tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    jobs_dir.mkdir()
+    (jobs_dir / "cached.json").write_text("{}")
+    age(jobs_dir / "cached.json", 7200)
+    retention = RetentionManager(tmp_path / "outputs", jobs_dir=jobs_dir, max_age_seconds=3600)
+    (tmp_path / "outputs").mkdir()
+    retention.touch("cached")
+    retention.sweep()
+    assert (jobs_dir / "cached.json").exists()
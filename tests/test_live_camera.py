@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from interface.backend import live_camera
+from monitoring.live_stats import LiveStatsRegistry
+
+
+class StubCapture:
+    """Camera returning blank frames; `release` is slow so a viewer can arrive during shutdown."""
+
+    def __init__(self, releasing: threading.Event, release_delay: float):
+        self.releasing = releasing
+        self.release_delay = release_delay
+
+    def read(self):
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def grab(self):
+        return True
+
+    def get(self, prop):
+        return 0.0
+
+    def set(self, prop, value):
+        return True
+
+    def release(self):
+        self.releasing.set()
+        time.sleep(self.release_delay)
+
+
+class StubCamera(live_camera.LiveCamera):
+    def __init__(self, release_delay=0.3):
+        super().__init__(lambda: (lambda frame: (frame, 1)), 0, fps=50, idle_seconds=0.0)
+        self.releasing = threading.Event()
+        self.release_delay = release_delay
+
+    def _open(self):
+        return StubCapture(self.releasing, self.release_delay)
+
+
+async def watch(camera, count):
+    frames = camera.frames()
+    try:
+        for _ in range(count):
+            await asyncio.wait_for(frames.__anext__(), timeout=5)
+    finally:
+        await frames.aclose()
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_viewer_arriving_during_shutdown_keeps_live_stats(monkeypatch):
+    stats = LiveStatsRegistry(keep_finished=1)
+    monkeypatch.setattr(live_camera, "live_stats", stats)
+    camera = StubCamera()
+    try:
+        asyncio.run(watch(camera, 3))
+        # the first loop is idle and closing the camera when the second viewer connects
+        assert camera.releasing.wait(5)
+        first_run = stats.get("live")
+
+        async def second_session():
+            frames = camera.frames()
+            try:
+                await asyncio.wait_for(frames.__anext__(), timeout=5)
+                # other runs finishing must not evict the running "live" entry
+                stats.start("other", "video")
+                stats.finish("other")
+                for _ in range(5):
+                    await asyncio.wait_for(frames.__anext__(), timeout=5)
+                entry = stats.get("live")
+                assert entry is not None and entry["status"] == "running"
+                assert entry["started_at"] != first_run["started_at"]
+                assert entry["frames_done"] > 0
+            finally:
+                await frames.aclose()
+
+        asyncio.run(second_session())
+        assert camera.error is None
+        wait_for(lambda: not camera.running)
+        assert stats.get("live")["status"] == "done"
+    finally:
+        camera.stop(timeout=5)
+
+
+def test_finished_key_can_restart():
+    stats = LiveStatsRegistry(keep_finished=1)
+    stats.start("live", "live", backend="cpu")
+    stats.finish("live")
+    # a late report and a second finish of the old run are ignored
+    stats.report_frames("live", 10, 3)
+    stats.finish("live", status="failed")
+    assert stats.get("live")["status"] == "done"
+
+    stats.start("live", "live", backend="cpu")
+    stats.start("other", "video")
+    stats.finish("other")
+    stats.report_frames("live", 4, 1)
+    assert stats.get("live")["status"] == "running"
+    assert stats.get("live")["frames_done"] == 4
@@ -0,0 +1,27 @@
+from monitoring.live_stats import LiveStatsRegistry
+
+
+def test_find_returns_batch_files_in_index_order():
+    stats = LiveStatsRegistry()
+    for index in [0, 10, 2, 1, 11, 9]:
+        stats.start(f"job/{index}", "video")
+    stats.start("job", "video")
+    stats.start("jobless/0", "video")
+    assert [entry["key"] for entry in stats.find("job")] == [
+        "job", "job/0", "job/1", "job/2", "job/9", "job/10", "job/11"
+    ]
+
+
+def test_report_frames_computes_window_and_average_fps():
+    stats = LiveStatsRegistry(window_seconds=0.0)
+    stats.start("run", "video", backend="cpu")
+    stats.report_frames("run", 10, 4, 2)
+    entry = stats.get("run")
+    assert entry["frames_done"] == 10 and entry["total_detections"] == 4
+    assert entry["peak_detections_per_frame"] == 2
+    assert entry["window_fps"] > 0 and entry["average_fps"] > 0
+    version = stats.version
+    stats.finish("run", status="done")
+    assert stats.get("run")["status"] == "done"
+    assert stats.active() == []
+    assert stats.version == version + 1
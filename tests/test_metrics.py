@@ -0,0 +1,55 @@
+import pytest
+
+from monitoring.metrics import MetricsRegistry
+
+
+def test_counter_and_gauge_exposition():
+    registry = MetricsRegistry()
+    frames = registry.counter("frames", "Frames processed.", ("backend",))
+    frames.inc(3, backend="cpu")
+    frames.inc(backend="cpu")
+    frames.inc(2, backend="hailo")
+    registry.gauge("queue", "Queued jobs.").set(0.5)
+    assert registry.exposition() == (
+        "# HELP frames Frames processed.\n"
+        "# TYPE frames counter\n"
+        'frames_total{backend="cpu"} 4\n'
+        'frames_total{backend="hailo"} 2\n'
+        "# HELP queue Queued jobs.\n"
+        "# TYPE queue gauge\n"
+        "queue 0.5\n"
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    stage = registry.histogram("stage_seconds", "Stage time.", ("stage",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.7, 3):
+        stage.observe(value, stage="encode")
+    lines = registry.exposition().splitlines()
+    assert lines[2:] == [
+        'stage_seconds_bucket{stage="encode",le="0.1"} 1',
+        'stage_seconds_bucket{stage="encode",le="1.0"} 3',
+        'stage_seconds_bucket{stage="encode",le="+Inf"} 4',
+        'stage_seconds_sum{stage="encode"} 4.25',
+        'stage_seconds_count{stage="encode"} 4',
+    ]
+
+
+def test_collectors_skip_missing_values_and_escape_labels():
+    registry = MetricsRegistry()
+    registry.add_collector(lambda: [
+        ("gauge", "temperature", "Chip temperatures.", [({"sensor": 'c"p\\u'}, 51.0), ({"sensor": "hailo"}, None)]),
+    ])
+    assert registry.exposition().splitlines()[2:] == ['temperature{sensor="c\\"p\\\\u"} 51.0']
+
+
+def test_labels_are_checked():
+    registry = MetricsRegistry()
+    jobs = registry.counter("jobs", "Jobs.", ("kind", "status"))
+    with pytest.raises(ValueError):
+        jobs.inc(kind="video")
+    with pytest.raises(ValueError):
+        jobs.inc(-1, kind="video", status="done")
+    # registering the same name again returns the existing metric
+    assert registry.counter("jobs", "Jobs.", ("kind", "status")) is jobs
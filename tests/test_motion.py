@@ -0,0 +1,42 @@
+import numpy as np
+
+from interface.backend.AI.motion import MotionGate
+
+
+def frame(value=100, square=None):
+    image = np.full((120, 160, 3), value, dtype=np.uint8)
+    if square is not None:
+        x, y = square
+        image[y:y + 40, x:x + 40] = 255
+    return image
+
+
+def test_disabled_gate_infers_every_frame():
+    gate = MotionGate(0)
+    assert all(gate.should_infer(frame()) for _ in range(3))
+    assert gate.report()["frames_checked"] == 0
+
+
+def test_static_frames_are_skipped_until_something_moves():
+    gate = MotionGate(0.01)
+    assert gate.should_infer(frame(square=(10, 10)))
+    # sensor noise stays under the pixel delta
+    noisy = frame(square=(10, 10)).astype(np.int16) + np.random.default_rng(0).integers(-5, 6, (120, 160, 3))
+    assert not gate.should_infer(noisy.clip(0, 255).astype(np.uint8))
+    assert not gate.should_infer(frame(square=(10, 10)))
+    assert gate.should_infer(frame(square=(80, 60)))
+    assert gate.report() == {"threshold": 0.01, "frames_checked": 4, "frames_skipped": 2, "skipped_ratio": 0.5}
+
+
+def test_slow_changes_add_up_against_the_last_inferred_frame():
+    gate = MotionGate(0.5, pixel_delta=15)
+    assert gate.should_infer(frame(100))
+    # each step is under the pixel delta, the total is not
+    assert not gate.should_infer(frame(110))
+    assert gate.should_infer(frame(120))
+
+
+def test_inference_runs_at_least_every_max_skip_frames():
+    gate = MotionGate(0.01, max_skip=2)
+    decisions = [gate.should_infer(frame()) for _ in range(6)]
+    assert decisions == [True, False, False, True, False, False]
@@ -0,0 +1,48 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from interface.backend.AI.overlay import PALETTE_BGR, OverlayRenderer, detections_of
+
+
+def draw(frame, renderer, box, class_id=0, confidence=0.87):
+    renderer.draw(frame, np.array([box], dtype=np.float32), np.array([class_id]), np.array([confidence]))
+
+
+def test_draws_box_and_label_in_place():
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    renderer = OverlayRenderer({0: "person"}, frame.shape)
+    draw(frame, renderer, (50, 100, 150, 200))
+    color = PALETTE_BGR[0]
+    assert tuple(frame[150, 50]) == color and tuple(frame[200, 100]) == color
+    # the label sits above the box, filled with the class color
+    label = frame[100 - renderer.label_height:100, 50:60]
+    assert (label == color).all(axis=-1).any()
+    # inside of the box is untouched
+    assert not frame[150, 100].any()
+
+
+def test_glyph_patches_are_cached():
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    renderer = OverlayRenderer({0: "person"}, frame.shape)
+    draw(frame, renderer, (10, 50, 60, 100), confidence=0.88)
+    patches = dict(renderer._patches)
+    # "person " and the characters "0", ".", "8"
+    assert set(text for text, _ in patches) == {"person ", "0", ".", "8"}
+    draw(frame, renderer, (100, 50, 160, 100), confidence=0.80)
+    assert all(renderer._patches[key] is patch for key, patch in patches.items())
+    assert len(renderer._patches) == len(patches)
+
+
+def test_label_stays_within_the_frame():
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+    renderer = OverlayRenderer({3: "a-very-long-class-name"}, frame.shape)
+    # box touching the top-right corner: the label goes inside and is shifted left
+    draw(frame, renderer, (150, 0, 159, 30), class_id=3)
+    color = PALETTE_BGR[3]
+    assert (frame[0:renderer.label_height, 0:150] == color).all(axis=-1).any()
+
+
+def test_detections_of_empty_result():
+    boxes, class_ids, confidences = detections_of(SimpleNamespace(boxes=None))
+    assert boxes.shape == (0, 4) and len(class_ids) == len(confidences) == 0
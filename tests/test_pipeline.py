@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from interface.backend.AI.pipeline import DetectionPipeline, FramePool
+
+SHAPE = (8, 8, 3)
+
+
+class StubFrames:
+    """Frame generator standing in for FrameSampler.frames(): `count` frames filled with their index."""
+
+    def __init__(self, count):
+        self.count = count
+        self.produced = 0
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.closed or self.produced >= self.count:
+            raise StopIteration
+        self.produced += 1
+        return np.full(SHAPE, (self.produced - 1) % 256, dtype=np.uint8)
+
+    def close(self):
+        # the sampler releases its capture here
+        self.closed = True
+
+
+def test_frame_pool_grows_when_exhausted():
+    pool = FramePool(1, SHAPE)
+    first, second = pool.acquire(), pool.acquire()
+    assert pool.misses == 1 and pool.size == 2
+    pool.release(first)
+    pool.release(np.empty((4, 4, 3), dtype=np.uint8))  # not from this pool, dropped
+    assert pool.acquire() is first
+    assert pool.misses == 1
+    assert second.shape == SHAPE
+
+
+def test_pipeline_runs_every_frame_through_in_order():
+    frames = StubFrames(30)
+    encoded = []
+    pipeline = DetectionPipeline(frames, encoded.append, decode_depth=2, encode_depth=2)
+    pipeline.start()
+    try:
+        while batch := pipeline.next_batch(4):
+            for frame in batch:
+                pipeline.submit(int(frame[0, 0, 0]))
+        pipeline.finish()
+    finally:
+        pipeline.stop()
+    assert encoded == list(range(30))
+    assert frames.closed
+    assert pipeline.utilization()["stages"]["encode"]["items"] == 30
+
+
+def test_pipeline_raises_encode_errors_and_stops():
+    frames = StubFrames(10_000)
+
+    def encode(item):
+        if item == 3:
+            raise ValueError("encoder failed")
+
+    pipeline = DetectionPipeline(frames, encode, decode_depth=2, encode_depth=1)
+    pipeline.start()
+    with pytest.raises((ValueError, RuntimeError)):
+        for index in range(10_000):
+            pipeline.next_batch(1)
+            pipeline.submit(index)
+    pipeline.stop(timeout=5)
+    assert not pipeline._decoder.is_alive() and not pipeline._encoder.is_alive()
+    # the decode thread closed the frame generator
+    assert frames.closed
+    assert frames.produced < 10_000
+
+
+def test_pipeline_stop_unblocks_a_full_decode_queue():
+    frames = StubFrames(10_000)
+    pipeline = DetectionPipeline(frames, lambda item: None, decode_depth=1)
+    pipeline.start()
+    assert len(pipeline.next_batch(1)) == 1
+    # inference gives up: the decoder is blocked on its full queue
+    pipeline.stop(timeout=5)
+    assert not pipeline._decoder.is_alive() and not pipeline._encoder.is_alive()
+    assert frames.closed
@@ -0,0 +1,45 @@
+from interface.backend.result_cache import ResultCache, result_key
+
+
+def output_dir(tmp_path, job_id, size):
+    path = tmp_path / job_id / "file-0"
+    path.mkdir(parents=True)
+    (path / "video.mp4").write_bytes(b"x" * size)
+    return path
+
+
+def test_key_depends_on_content_kind_and_params():
+    key = result_key("video", "abc", {"fps": 10, "isHat": False})
+    assert key == result_key("video", "abc", {"isHat": False, "fps": 10})
+    assert key != result_key("video", "abd", {"fps": 10, "isHat": False})
+    assert key != result_key("video", "abc", {"fps": 5, "isHat": False})
+    assert key != result_key("audio", "abc", {"fps": 10, "isHat": False})
+
+
+def test_hit_returns_the_stored_result(tmp_path):
+    cache = ResultCache(tmp_path / ".cache")
+    assert cache.get("k") is None
+    cache.put("k", "job1", {"video": "url"}, output_dir(tmp_path, "job1", 10))
+    entry = cache.get("k")
+    assert entry["job_id"] == "job1" and entry["result"] == {"video": "url"}
+    assert cache.usage_bytes() == 10
+
+
+def test_entry_with_deleted_outputs_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path / ".cache")
+    path = output_dir(tmp_path, "job1", 10)
+    cache.put("k", "job1", {}, path)
+    (path / "video.mp4").unlink()
+    path.rmdir()
+    assert cache.get("k") is None
+    assert not (tmp_path / ".cache" / "k.json").exists()
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ResultCache(tmp_path / ".cache", max_bytes=25)
+    cache.put("a", "job-a", {}, output_dir(tmp_path, "job-a", 10))
+    cache.put("b", "job-b", {}, output_dir(tmp_path, "job-b", 10))
+    assert cache.get("a") is not None
+    cache.put("c", "job-c", {}, output_dir(tmp_path, "job-c", 10))
+    assert cache.get("b") is None and not (tmp_path / "job-b" / "file-0").exists()
+    assert cache.get("a") is not None and cache.get("c") is not None
@@ -0,0 +1,53 @@
+import os
+import time
+
+from interface.backend.retention import RetentionManager
+
+
+def job_dir(outputs, job_id, size, age=0):
+    path = outputs / job_id
+    path.mkdir(parents=True)
+    (path / "video.mp4").write_bytes(b"x" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def remaining(outputs):
+    return sorted(path.name for path in outputs.iterdir())
+
+
+def test_least_recently_accessed_go_first_until_under_quota(tmp_path):
+    for index, job_id in enumerate(("a", "b", "c", "d")):
+        job_dir(tmp_path, job_id, 100, age=400 - index * 100)
+    retention = RetentionManager(tmp_path, quota_bytes=250, max_age_seconds=3600)
+    retention.sweep()
+    assert remaining(tmp_path) == ["c", "d"]
+    usage = retention.usage()
+    assert usage["used_bytes"] == 200 and usage["deleted_last_sweep"] == 2
+    assert usage["job_directories"] == 2
+
+
+def test_touch_counts_as_an_access(tmp_path):
+    job_dir(tmp_path, "old", 100, age=300)
+    job_dir(tmp_path, "new", 100, age=100)
+    retention = RetentionManager(tmp_path, quota_bytes=150, max_age_seconds=3600)
+    # e.g. a cache hit on the old job's results
+    retention.touch("old")
+    retention.sweep()
+    assert remaining(tmp_path) == ["old"]
+
+
+def test_max_age_applies_under_quota(tmp_path):
+    job_dir(tmp_path, "expired", 10, age=7200)
+    job_dir(tmp_path, "recent", 10, age=60)
+    job_dir(tmp_path, ".cache", 10, age=7200)
+    RetentionManager(tmp_path, quota_bytes=10**6, max_age_seconds=3600).sweep()
+    assert remaining(tmp_path) == [".cache", "recent"]
+
+
+def test_running_jobs_are_never_deleted(tmp_path):
+    job_dir(tmp_path, "running", 100, age=7200)
+    job_dir(tmp_path, "done", 100, age=7200)
+    RetentionManager(tmp_path, quota_bytes=0, max_age_seconds=3600, protected=lambda: {"running"}).sweep()
+    assert remaining(tmp_path) == ["running"]
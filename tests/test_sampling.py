@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+import pytest
+
+from interface.backend.AI.pipeline import FramePool
+from interface.backend.AI.sampling import FrameSampler
+
+SHAPE = (8, 8, 3)
+
+
+class StubCapture:
+    """
+    cv2.VideoCapture stand-in: `count` frames at `fps`, each filled with its index.
+    Timestamps are the ones of the last grabbed frame, seeking lands on the requested frame.
+    """
+
+    def __init__(self, count, fps, *, timestamps=True, start_index=0):
+        self.count = count
+        self.fps = fps
+        self.timestamps = timestamps
+        self.index = start_index - 1
+        self.grabs = 0
+        self.released = False
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
+
+    def grab(self):
+        if self.index + 1 >= self.count:
+            return False
+        self.index += 1
+        self.grabs += 1
+        return True
+
+    def retrieve(self, image=None):
+        if image is None:
+            image = np.empty(SHAPE, dtype=np.uint8)
+        image[...] = self.index % 256
+        return True, image
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.index / self.fps * 1000.0 if self.timestamps else 0.0
+        return 0.0
+
+    def set(self, prop, value):
+        if prop != cv2.CAP_PROP_POS_MSEC:
+            return False
+        self.index = round(value / 1000.0 * self.fps) - 1
+        return True
+
+    def release(self):
+        self.released = True
+
+
+def sampler(cap, target_fps, **kwargs):
+    ok, first_frame = cap.read()
+    assert ok
+    return FrameSampler(cap, first_frame, target_fps, input_fps=cap.fps, **kwargs)
+
+
+def sample(cap, target_fps, **kwargs):
+    frame_sampler = sampler(cap, target_fps, **kwargs)
+    frames = [int(frame[0, 0, 0]) for frame in frame_sampler.frames()]
+    return frame_sampler, frames
+
+
+def test_sampler_keeps_the_first_frame_of_each_interval():
+    fps = 30000 / 1001
+    cap = StubCapture(300, fps)
+    frame_sampler, frames = sample(cap, 5)
+
+    timestamps = list(frame_sampler.timestamps)
+    assert len(frames) == len(timestamps) == 50
+    for index, timestamp in enumerate(timestamps):
+        # first frame at or after each point of the 0.2 s grid
+        assert 0 <= timestamp - index * 0.2 < 1 / fps + 1e-9
+    assert frames == [round(timestamp * fps) % 256 for timestamp in timestamps]
+    report = frame_sampler.report()
+    assert report["timestamps"] == "pts"
+    assert report["achieved_fps"] == pytest.approx(5, abs=0.05)
+    assert cap.released
+
+
+def test_sampler_ranges_add_up_to_the_whole_file():
+    fps = 30.0
+    _, whole = sample(StubCapture(300, fps), 4)
+
+    first_range, first = sample(StubCapture(300, fps), 4, end_time=4.0)
+    # a second worker positioned at 4 s
+    second_range, second = sample(StubCapture(300, fps, start_index=120), 4, start_time=4.0)
+    assert max(first_range.timestamps) < 4.0 <= min(second_range.timestamps)
+    assert first + second == whole
+
+
+def test_sampler_seeks_over_long_gaps():
+    _, grabbed_frames = sample(StubCapture(600, 30.0), 0.5, seek_min_frames=10**6)
+    cap = StubCapture(600, 30.0)
+    frame_sampler, frames = sample(cap, 0.5, seek_min_frames=10)
+    assert frames == grabbed_frames
+    assert frame_sampler.seeks > 0
+    assert cap.grabs < 600
+
+
+def test_sampler_falls_back_to_frame_index_without_timestamps():
+    frame_sampler, frames = sample(StubCapture(90, 30.0, timestamps=False), 10)
+    assert frames == list(range(0, 90, 3))
+    assert frame_sampler.report()["timestamps"] == "frame_index"
+
+
+def test_sampler_decodes_into_pool_buffers():
+    pool = FramePool(2, SHAPE)
+    buffers = {id(buffer) for buffer in pool._free}
+    frame_sampler = sampler(StubCapture(30, 30.0), 10, pool=pool)
+    frames = frame_sampler.frames()
+    next(frames)  # the first frame was read before sampling started
+    frame = next(frames)
+    assert id(frame) in buffers
+    pool.release(frame)
+    frames.close()
@@ -0,0 +1,63 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import psutil
+import pytest
+
+from interface.backend.AI import sharding
+
+
+def worker_processes():
+    # multiprocessing's resource tracker lives as long as the test process, it is not a worker
+    return [
+        child for child in psutil.Process().children(recursive=True)
+        if "multiprocessing.spawn" in " ".join(child.cmdline())
+    ]
+
+
+def test_shard_count_keeps_shards_long_enough(monkeypatch):
+    monkeypatch.setattr(sharding, "SHARD_MIN_SECONDS", 60.0)
+    assert sharding.shard_count(4, 30) == 1
+    assert sharding.shard_count(4, 150) == 2
+    assert sharding.shard_count(4, 3600) == 4
+    assert sharding.shard_count("1", 3600) == 1
+
+
+def test_shard_ranges_snap_to_keyframes():
+    assert sharding.shard_ranges(90, 3, []) == [(0.0, 30.0), (30.0, 60.0), (60.0, None)]
+    keyframes = [0.0, 8.0, 29.0, 33.0, 61.5, 80.0]
+    assert sharding.shard_ranges(90, 3, keyframes) == [(0.0, 29.0), (29.0, 61.5), (61.5, None)]
+    # two boundaries snapping to the same keyframe make one range less
+    assert sharding.shard_ranges(90, 3, [0.0, 45.0]) == [(0.0, 45.0), (45.0, None)]
+
+
+def test_terminate_stops_running_workers():
+    pool = ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn"))
+    futures = [pool.submit(time.sleep, 60) for _ in range(4)]
+    # wait until both workers are busy
+    deadline = time.monotonic() + 30
+    while sum(future.running() for future in futures) < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    processes = list(pool._processes.values())
+
+    start = time.monotonic()
+    sharding._terminate(pool)
+    assert time.monotonic() - start < 10
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_failed_run_removes_shard_files(tmp_path):
+    pytest.importorskip("ultralytics")
+    record_output = tmp_path / "out" / "result.mp4"
+    record_output.parent.mkdir()
+    with pytest.raises(FileNotFoundError):
+        sharding.run_sharded(
+            tmp_path / "missing.mp4",
+            record_output,
+            [(0.0, 60.0), (60.0, None)],
+            yolo_path=str(tmp_path / "missing.pt"),
+        )
+    assert list(record_output.parent.iterdir()) == []
+    assert worker_processes() == []
@@ -0,0 +1,58 @@
+import asyncio
+import subprocess
+import sys
+from pathlib import Path
+
+from interface.backend import main
+from interface.backend.engines import LazyEngine
+from interface.backend.startup_profile import StartupProfiler
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_engine_is_imported_on_first_call(tmp_path, monkeypatch):
+    (tmp_path / "slow_engine.py").write_text("calls = []\ndef run(x):\n    calls.append(x)\n    return x * 2\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    profiler = StartupProfiler()
+    monkeypatch.setattr("interface.backend.engines.profiler", profiler)
+    engine = LazyEngine("slow_engine", "run")
+    assert not engine.loaded and "slow_engine" not in sys.modules
+    assert engine(21) == 42
+    assert engine.loaded and engine(1) == 2
+    assert sys.modules["slow_engine"].calls == [21, 1]
+    assert profiler.report()["imports"]["slow_engine"]["new_packages"] == ["slow_engine"]
+
+
+def test_backend_import_leaves_engines_unloaded():
+    code = (
+        "import sys, interface.backend.main\n"
+        "heavy = ('torch', 'ultralytics', 'whisper', 'interface.backend.AI.yolo_detection_without_yolo')\n"
+        "print([name for name in heavy if name in sys.modules])\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_startup_profile_report():
+    profiler = StartupProfiler(budget_seconds=60)
+    with profiler.measure("json"):
+        import json  # noqa: F401
+    profiler.check_budget()
+    report = profiler.report()
+    assert report["within_budget"] and report["ready_after_seconds"] is not None
+    assert [event["event"] for event in report["events"]] == ["app_ready"]
+
+    late = StartupProfiler(budget_seconds=-1)
+    late.check_budget()
+    assert not late.report()["within_budget"]
+
+
+def test_startup_profile_route_lists_loaded_engines():
+    report = asyncio.run(main.get_startup_profile())
+    assert set(report["engines_loaded"]) == {
+        "models.speech_to_text.transcription",
+        "interface.backend.AI.yolo_detection_without_yolo",
+        "interface.backend.AI.yolo_detection",
+    }
+    assert "budget_seconds" in report and "imports" in report
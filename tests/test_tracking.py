@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+from interface.backend.AI.tracking import FlowTracker, KeyframeScheduler, iou_matrix
+
+
+def textured_frame(seed=0, shape=(240, 320)):
+    noise = np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+    gray = cv2.GaussianBlur(noise, (5, 5), 0)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def shifted(frame, dx, dy):
+    return np.roll(frame, (dy, dx), axis=(0, 1))
+
+
+def test_iou_matrix():
+    a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    b = np.array([[0, 0, 10, 10], [5, 0, 15, 10]], dtype=np.float32)
+    np.testing.assert_allclose(iou_matrix(a, b), [[1.0, 50 / 150], [0.0, 0.0]])
+
+
+def test_boxes_follow_the_image_motion():
+    frame = textured_frame()
+    tracker = FlowTracker(frame.shape)
+    box = np.array([[100, 80, 180, 160]], dtype=np.float32)
+    assert tracker.reset(frame, box, np.array([0]), np.array([0.9])) is None
+    boxes, class_ids, _, track_ids = tracker.update(shifted(frame, 6, -4))
+    np.testing.assert_allclose(boxes[0], [106, 76, 186, 156], atol=1.0)
+    assert class_ids.tolist() == [0] and track_ids.tolist() == [1]
+
+
+def test_reset_keeps_track_ids_and_measures_stability():
+    frame = textured_frame()
+    tracker = FlowTracker(frame.shape)
+    tracker.reset(frame, np.array([[100, 80, 180, 160], [10, 10, 50, 50]]), np.array([0, 1]), np.array([0.9, 0.8]))
+    moved = shifted(frame, 5, 0)
+    # the detector finds the first object where the flow put it, and a new one
+    stability = tracker.reset(
+        moved, np.array([[105, 80, 185, 160], [250, 150, 300, 200]]), np.array([0, 1]), np.array([0.9, 0.7])
+    )
+    assert tracker.track_ids.tolist() == [1, 3]
+    # one of two tracks matched almost perfectly
+    assert 0.45 < stability <= 0.5
+
+
+def test_fixed_keyframe_interval():
+    scheduler = KeyframeScheduler(3)
+    assert scheduler.plan(7) == [True, False, False, True, False, False, True]
+    report = scheduler.report()
+    assert report["keyframes"] == 3 and report["tracked_frames"] == 4
+    assert report["inference_skipped_ratio"] == round(4 / 7, 3)
+    assert not KeyframeScheduler(1).enabled
+
+
+def test_auto_interval_follows_track_stability():
+    scheduler = KeyframeScheduler("auto", max_interval=3)
+    assert scheduler.enabled and scheduler.k == 1
+    scheduler.record(None)
+    for _ in range(4):
+        scheduler.record(0.9)
+    assert scheduler.k == 3
+    scheduler.record(0.6)
+    assert scheduler.k == 3
+    scheduler.record(0.2)
+    assert scheduler.k == 1
+    assert scheduler.report()["mean_track_stability"] == round((0.9 * 4 + 0.6 + 0.2) / 6, 3)
@@ -0,0 +1,111 @@
+import asyncio
+import builtins
+import errno
+import hashlib
+import os
+
+import pytest
+
+from interface.backend import uploads
+
+
+class FakeUpload:
+    """UploadFile stand-in serving `data` in reads of at most `n` bytes."""
+
+    def __init__(self, data, filename="clip.mp4", size=None):
+        self.data = data
+        self.filename = filename
+        self.size = size
+        self.offset = 0
+        self.closed = False
+
+    async def read(self, n):
+        chunk = self.data[self.offset:self.offset + n]
+        self.offset += len(chunk)
+        return chunk
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def staging(tmp_path, monkeypatch):
+    tmpfs = tmp_path / "shm" / "uploads"
+    tmpfs.parent.mkdir()
+    disk = tmp_path / "disk"
+    monkeypatch.setattr(uploads, "TMPFS_STAGING_DIR", tmpfs)
+    monkeypatch.setattr(uploads, "DISK_STAGING_DIR", disk)
+    return tmpfs, disk
+
+
+def stage(upload, chunk_size=1000):
+    return asyncio.run(uploads.stage_upload(upload, chunk_size=chunk_size))
+
+
+def test_small_upload_stays_on_tmpfs(staging):
+    tmpfs, _ = staging
+    data = os.urandom(5000)
+    staged = stage(FakeUpload(data))
+    assert staged.path.is_relative_to(tmpfs) and staged.on_tmpfs
+    assert staged.path.read_bytes() == data
+    assert staged.sha256 == hashlib.sha256(data).hexdigest() and staged.size == 5000
+
+
+def test_upload_spills_to_disk_past_the_threshold(staging, monkeypatch):
+    _, disk = staging
+    monkeypatch.setattr(uploads, "SPILL_THRESHOLD", 2500)
+    data = os.urandom(5000)
+    staged = stage(FakeUpload(data))
+    assert staged.path.is_relative_to(disk)
+    assert staged.path.read_bytes() == data
+    assert staged.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_full_tmpfs_in_the_middle_of_a_write_keeps_the_file_intact(staging, monkeypatch):
+    tmpfs, disk = staging
+    real_open = builtins.open
+
+    class FullTmpfsFile:
+        """Flushes part of a chunk, then fails with ENOSPC, like a write to a full tmpfs."""
+
+        def __init__(self, path, mode):
+            self.file = real_open(path, mode)
+            self.written = 0
+
+        def write(self, data):
+            room = 2500 - self.written
+            if len(data) > room:
+                self.file.write(data[:room])
+                self.file.flush()
+                self.written += room
+                raise OSError(errno.ENOSPC, "No space left on device")
+            self.written += len(data)
+            return self.file.write(data)
+
+        def close(self):
+            self.file.close()
+
+    def fake_open(path, mode="r", *args, **kwargs):
+        if str(path).startswith(str(tmpfs)):
+            return FullTmpfsFile(path, mode)
+        return real_open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(uploads, "open", fake_open, raising=False)
+    data = os.urandom(5000)
+    staged = stage(FakeUpload(data))
+    assert staged.path.is_relative_to(disk)
+    assert staged.path.read_bytes() == data
+    assert hashlib.sha256(staged.path.read_bytes()).hexdigest() == staged.sha256
+    assert not any(tmpfs.iterdir())
+
+
+def test_move_to_disk_frees_tmpfs(staging):
+    tmpfs, disk = staging
+    data = os.urandom(3000)
+    staged = stage(FakeUpload(data))
+    staged.move_to_disk()
+    assert staged.path.is_relative_to(disk) and not staged.on_tmpfs
+    assert staged.path.read_bytes() == data
+    assert not any(tmpfs.iterdir())
+    staged.remove()
+    assert not any(disk.iterdir())
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+import psutil
+import pytest
+
+pytest.importorskip("ultralytics")
+
+from interface.backend.AI import yolo_detection_without_yolo as detector
+from monitoring.live_stats import registry as live_stats
+
+
+class FailingModel:
+    """Detects nothing, then fails on the `fail_at`-th predict() call."""
+
+    names = {0: "person"}
+
+    def __init__(self, fail_at):
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def predict(self, frames, verbose=False, **kwargs):
+        self.calls += 1
+        if self.calls >= self.fail_at:
+            raise RuntimeError("inference failed")
+        return [SimpleNamespace(boxes=None) for _ in frames]
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = tmp_path / "input.avi"
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for index in range(60):
+        writer.write(np.full((48, 64, 3), index * 4, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def test_failed_run_leaves_no_encoder_or_partial_recording(fake_ffmpeg, video, tmp_path, monkeypatch):
+    model_path = tmp_path / "model.pt"
+    model_path.touch()
+    monkeypatch.setattr(detector, "_load_model", lambda path, backend=None: (FailingModel(fail_at=4), "pytorch"))
+    output_dir = tmp_path / "out"
+
+    with pytest.raises(RuntimeError, match="inference failed"):
+        detector.yolo_detection_without_yolo(
+            False,
+            video_path=video,
+            output_dir=output_dir,
+            record_filename="result.mp4",
+            frame_rate=10,
+            yolo_path=model_path,
+            batch_size=1,
+            enable_callback=False,
+            shard_workers=1,
+            stats_key="failing-run",
+        )
+
+    children = psutil.Process().children(recursive=True)
+    assert not [child for child in children if str(fake_ffmpeg) in " ".join(child.cmdline())]
+    assert not (output_dir / "result.tmp.mp4").exists()
+    assert not (output_dir / "result.mp4").exists()
+    assert live_stats.get("failing-run")["status"] == "failed"
+
+
+def test_batch_tuner_doubles_while_time_per_frame_drops():
+    tuner = detector.BatchSizeTuner(max_size=8)
+    # first batch pays for model initialization and is ignored
+    tuner.record(1, 5.0)
+    assert tuner.size == 1 and not tuner.settled
+    tuner.record(1, 0.10)
+    assert tuner.size == 2
+    tuner.record(2, 0.16)
+    assert tuner.size == 4
+    # 4 % faster per frame is not worth the latency: back to 2
+    tuner.record(4, 0.31)
+    assert tuner.settled and tuner.size == 2
+    tuner.record(2, 0.01)
+    assert tuner.size == 2
+
+
+def test_batch_tuner_ignores_partial_batches_and_stops_at_max():
+    tuner = detector.BatchSizeTuner(max_size=2)
+    tuner.record(1, 5.0)
+    tuner.record(1, 0.10)
+    tuner.record(1, 0.01)
+    assert tuner.size == 2 and not tuner.settled
+    tuner.record(2, 0.10)
+    assert tuner.settled and tuner.size == 2
+
+
+def test_fixed_or_live_batch_size():
+    assert detector._batch_tuner(None, live_input=True).size == 1
+    fixed = detector._batch_tuner(4, live_input=False)
+    assert fixed.settled and fixed.size == 4
+    assert not detector._batch_tuner("auto", live_input=False).settled
+
+
+def test_resolution_steps_down_when_inference_falls_behind_and_back_up(monkeypatch):
+    now = 0.0
+    monkeypatch.setattr(detector, "time", SimpleNamespace(perf_counter=lambda: now))
+    controller = detector.ResolutionController(10, min_size=320, max_size=640, step=160, window_seconds=1)
+    assert controller.sizes == [320, 480, 640] and controller.size == 640
+
+    # the first batch (model initialization) only starts the window
+    assert not controller.record(1, 3.0)
+    now = 1.0
+    # 10 frames/s of capacity: on target
+    assert not controller.record(10, 1.0)
+    now = 2.0
+    # throttled: 5 frames/s
+    assert controller.record(10, 2.0)
+    assert controller.size == 480
+    now = 2.5
+    assert not controller.record(10, 0.2)
+    now = 3.0
+    # 50 frames/s at 480 leaves room for 640 (~28 frames/s)
+    assert controller.record(0, 0.0)
+    assert controller.size == 640
+
+    report = controller.report()
+    assert report["final_imgsz"] == 640 and report["min_imgsz"] == 320
+    assert [(window["imgsz"], window["windows"]) for window in report["windows"]] == [(640, 2), (480, 1)]
+    assert report["windows"][1]["capacity_fps"] == 50.0
+
+
+def test_resolution_sizes_are_multiples_of_32():
+    controller = detector.ResolutionController(10, min_size=300, max_size=650, step=100)
+    assert controller.sizes == [288, 384, 480, 576, 640]
+    assert all(size % 32 == 0 for size in controller.sizes)